@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_prd")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# apps are loaded by get_asgi_application()
+from recrutingapp.streaming import EventStreamApp  # noqa: E402
+from recrutingapp.cvskills import cv_skill_index  # noqa: E402
+from recrutingapp.suggest import skill_index  # noqa: E402
+
+skill_index.start()
+cv_skill_index.start()
+
+# response chat event streams, other requests go to Django
+application = EventStreamApp(django_application)
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "recrutingapp.middleware.InstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -60,6 +61,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Query count and timings (Server-Timing header, "recrutingapp.instrumentation" log)
+INSTRUMENTATION = {
+    "SAMPLE_RATE": 1.0,
+    "SERVER_TIMING": True,
+}
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -150,7 +157,7 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.TokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "userapp.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -159,6 +166,14 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# pub/sub of response chat events (recrutingapp.events)
+EVENTS_BROKER = "recrutingapp.events.InProcessBroker"
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "userapp.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "userapp.serializers.ClaimsTokenRefreshSerializer",
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Recruting",
     "DESCRIPTION": "Final project",
@@ -194,9 +209,15 @@ AUTH_USER_MODEL = "userapp.CustomUser"
 LOGOUT_REDIRECT_URL = "/api/"
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
+    "userapp.backends.CachedModelBackend",
 ]
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 EMAIL_HOST = "127.0.0.1"
 EMAIL_HOST_USER = ""
 EMAIL_HOST_PASSWORD = ""
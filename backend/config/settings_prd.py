@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "recrutingapp.middleware.InstrumentationMiddleware",
     # no need - nginx checked?
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -66,6 +67,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Query count and timings (Server-Timing header, "recrutingapp.instrumentation" log)
+INSTRUMENTATION = {
+    "SAMPLE_RATE": 0.1,
+    "SERVER_TIMING": True,
+}
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -160,7 +167,7 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.BasicAuthentication",
         "rest_framework.authentication.TokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "userapp.authentication.ClaimsJWTAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -169,6 +176,14 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# pub/sub of response chat events (recrutingapp.events)
+EVENTS_BROKER = "recrutingapp.events.InProcessBroker"
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "userapp.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "userapp.serializers.ClaimsTokenRefreshSerializer",
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Recruting",
     "DESCRIPTION": "Final project",
@@ -205,9 +220,20 @@ AUTH_USER_MODEL = "userapp.CustomUser"
 LOGOUT_REDIRECT_URL = "/api/"
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
+    "userapp.backends.CachedModelBackend",
 ]
 
+# shared by worker processes (permission cache, auth versions): file cache
+# works for a single host only and costs disk reads on every request, several
+# hosts need a shared in-memory cache (Redis or Memcached), e.g.
+# "django.core.cache.backends.redis.RedisCache" with "redis://redis:6379"
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/var/tmp/django_cache",
+    }
+}
+
 EMAIL_HOST = get_secret("EMAIL_HOST", "mail")
 EMAIL_HOST_USER = get_secret("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = get_secret("EMAIL_HOST_PASSWORD", "")
@@ -217,12 +243,26 @@ EMAIL_USE_TLS = False
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
+    "formatters": {
+        "metrics": {
+            "format": "{asctime} {view} {method} {status} queries={queries} "
+            "db={db_ms}ms serialize={serialize_ms}ms render={render_ms}ms "
+            "total={total_ms}ms {message}",
+            "style": "{",
+        },
+    },
     "handlers": {
         "file": {
             "level": "ERROR",
             "class": "logging.FileHandler",
             "filename": "./django_error.log",
         },
+        "metrics": {
+            "level": "INFO",
+            "class": "logging.FileHandler",
+            "filename": "./django_metrics.log",
+            "formatter": "metrics",
+        },
     },
     "loggers": {
         "django": {
@@ -230,5 +270,10 @@ LOGGING = {
             "level": "ERROR",
             "propagate": True,
         },
+        "recrutingapp.instrumentation": {
+            "handlers": ["metrics"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
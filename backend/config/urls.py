@@ -30,9 +30,12 @@ from recrutingapp.views import (
     CityViewSet,
     GenderViewSet,
     EmployeeProtectedViewSet,
+    ModerationViewSet,
     EmployerProtectedViewSet,
     NewsPostStaffViewSet,
     NewsTagsStaffViewSet,
+    ReferenceViewSet,
+    SkillViewSet,
     CVViewSet,
     VacancyResponseViewSet,
     VacancyViewSet,
@@ -47,11 +50,14 @@ router.register("public/news", NewsPublicViewSet)
 router.register("public/employers", EmployerPublicViewSet)
 router.register("protected/cities", CityViewSet, basename="common_cities")
 router.register("protected/genders", GenderViewSet, basename="common_genders")
+router.register("protected/reference", ReferenceViewSet, basename="common_reference")
+router.register("protected/skills", SkillViewSet, basename="common_skills")
 router.register("protected/news/tags", NewsTagsStaffViewSet, basename="news_tags")
 router.register("protected/news/posts", NewsPostStaffViewSet, basename="news_posts")
 router.register("protected/employees", EmployeeProtectedViewSet, basename="employees")
 router.register("protected/employers", EmployerProtectedViewSet, basename="employers")
 router.register("protected/cvs", CVViewSet, basename="cvs")
+router.register("protected/moderation", ModerationViewSet, basename="moderation")
 router.register("protected/vacancies", VacancyViewSet, basename="vacancies")
 router.register("protected/cv-responses", CVResponseViewSet, basename="cv_responses")
 router.register(
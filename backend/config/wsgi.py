@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_prd")
 
 application = get_wsgi_application()
+
+# apps are loaded by get_wsgi_application()
+from recrutingapp.cvskills import cv_skill_index  # noqa: E402
+from recrutingapp.suggest import skill_index  # noqa: E402
+
+skill_index.start()
+cv_skill_index.start()
@@ -9,6 +9,8 @@ from recrutingapp.models import (
     Region,
     Skill,
     DocumentStatus,
+    DocumentTransition,
+    ModerationLease,
 )
 
 
@@ -27,3 +29,5 @@ admin.site.register(City, admin.ModelAdmin)
 admin.site.register(Skill, admin.ModelAdmin)
 admin.site.register(Region, admin.ModelAdmin)
 admin.site.register(DocumentStatus, admin.ModelAdmin)
+admin.site.register(DocumentTransition, admin.ModelAdmin)
+admin.site.register(ModerationLease, admin.ModelAdmin)
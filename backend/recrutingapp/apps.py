@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RecrutingAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recrutingapp"
+
+    def ready(self):
+        from recrutingapp.signals import connect_signals
+
+        connect_signals()
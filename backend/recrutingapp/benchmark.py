@@ -0,0 +1,218 @@
+"""
+Endpoint benchmark with query, latency and memory budgets.
+
+GET routes of the API router (list, retrieve and extra GET actions)
+are requested for every role at several data scales. Data is generated
+by recrutingapp.datagen and rolled back after each scale.
+Per endpoint: status, query count, p50/p95 latency and peak allocated memory
+(tracemalloc). Results are saved as JSON baseline and compared with it.
+"""
+
+import logging
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, override_settings
+
+from recrutingapp.datagen import DataGenerator
+from recrutingapp.processcache import clear_process_caches
+from userapp.models import CustomUser, UserRoles
+
+API_PREFIX = "/api/v1.0/"
+ANONYMOUS = "anonymous"
+ROLES = [ANONYMOUS] + [role.value for role in UserRoles]
+
+DEFAULT_BUDGETS = {
+    # extra queries allowed
+    "queries": 0,
+    # allowed ratio to baseline p95 and peak memory
+    "time_ratio": 1.5,
+    "memory_ratio": 1.5,
+    # latency and memory changes below these are noise
+    "min_ms": 5.0,
+    "min_kb": 64.0,
+}
+
+
+def get_endpoints(router, api_prefix=API_PREFIX) -> list:
+    """(name, url, is_detail) of GET routes, detail urls have {pk}"""
+    endpoints = []
+    for prefix, viewset, _ in router.registry:
+        base = f"{api_prefix}{prefix}/"
+        if hasattr(viewset, "list"):
+            endpoints.append((f"{prefix}:list", base, False))
+        if hasattr(viewset, "retrieve"):
+            endpoints.append((f"{prefix}:retrieve", base + "{pk}/", True))
+        for action in viewset.get_extra_actions():
+            if "get" not in action.mapping:
+                continue
+            if action.detail:
+                url = base + "{pk}/" + action.url_path + "/"
+            else:
+                url = base + action.url_path + "/"
+            endpoints.append((f"{prefix}:{action.url_path}", url, action.detail))
+    return endpoints
+
+
+def get_first_id(response):
+    """Id of the first object of list response"""
+    if response.status_code != 200 or "json" not in response.get("Content-Type", ""):
+        return None
+    data = response.json()
+    if isinstance(data, dict):
+        data = data.get("results", [])
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return data[0].get("id")
+    return None
+
+
+def clear_caches():
+    """
+    Indexes, corpora and reference data of the process (ProcessCache) and
+    the shared cache: permission sets, auth versions and favorites are keyed
+    by ids, which are reused after rollback. Generated data is written
+    without signals, so the keys are not dropped by receivers
+    """
+    clear_process_caches()
+    cache.clear()
+
+
+def get_percentile(values, percent) -> float:
+    values = sorted(values)
+    index = min(int(round(percent / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+class EndpointBenchmark:
+    def __init__(self, router, repeat=20, seed=0, log=None):
+        self.endpoints = get_endpoints(router)
+        self.repeat = repeat
+        self.seed = seed
+        self.log = log or (lambda message: None)
+
+    def run(self, scales) -> dict:
+        """Results for all scales: "scale:role:endpoint" -> metrics"""
+        results = {}
+        # 4xx responses of anonymous requests are expected
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"]):
+                for scale in scales:
+                    with transaction.atomic():
+                        self.log(f"scale {scale}: generating data")
+                        DataGenerator(scale, seed=self.seed).run()
+                        # caches must not outlive generated data
+                        clear_caches()
+                        results.update(self.run_scale(scale))
+                        clear_caches()
+                        transaction.set_rollback(True)
+        finally:
+            request_logger.setLevel(level)
+        return results
+
+    def get_client(self, role) -> Client:
+        client = Client()
+        if role != ANONYMOUS:
+            user = (
+                CustomUser.objects.filter(role=role, username__startswith="gen_")
+                .order_by("pk")
+                .first()
+            )
+            client.force_login(user)
+        return client
+
+    def run_scale(self, scale) -> dict:
+        results = {}
+        for role in ROLES:
+            client = self.get_client(role)
+            # list urls give object ids for detail urls
+            ids = {}
+            for name, url, is_detail in self.endpoints:
+                prefix = name.split(":")[0]
+                if is_detail:
+                    if ids.get(prefix) is None:
+                        continue
+                    url = url.format(pk=ids[prefix])
+                metrics = self.measure(client, url)
+                if name.endswith(":list"):
+                    ids[prefix] = metrics.pop("first_id")
+                else:
+                    metrics.pop("first_id")
+                key = f"{scale}:{role}:{name}"
+                results[key] = metrics
+                self.log(
+                    f"{key:<55} {metrics['status']} "
+                    f"queries={metrics['queries']:<4} "
+                    f"p50={metrics['p50_ms']:.1f}ms p95={metrics['p95_ms']:.1f}ms "
+                    f"peak={metrics['peak_kb']:.0f}KB"
+                )
+        return results
+
+    def measure(self, client, url) -> dict:
+        response = client.get(url)  # warm up caches
+        first_id = get_first_id(response)
+
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        queries = []
+        with connection.execute_wrapper(
+            lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+        ):
+            response = client.get(url)
+
+        tracemalloc.start()
+        try:
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "status": response.status_code,
+            "queries": len(queries),
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(get_percentile(timings, 95), 2),
+            "peak_kb": round(peak / 1024, 1),
+            "first_id": first_id,
+        }
+
+
+def compare(results, baseline, budgets=None) -> list:
+    """Regressions of results against baseline results (messages)"""
+    budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+    regressions = []
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if current["status"] != base["status"]:
+            regressions.append(f"{key}: status {base['status']} -> {current['status']}")
+        if current["queries"] > base["queries"] + budgets["queries"]:
+            regressions.append(
+                f"{key}: queries {base['queries']} -> {current['queries']}"
+            )
+        time_limit = max(
+            base["p95_ms"] * budgets["time_ratio"], base["p95_ms"] + budgets["min_ms"]
+        )
+        if current["p95_ms"] > time_limit:
+            regressions.append(
+                f"{key}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        memory_limit = max(
+            base["peak_kb"] * budgets["memory_ratio"],
+            base["peak_kb"] + budgets["min_kb"],
+        )
+        if current["peak_kb"] > memory_limit:
+            regressions.append(
+                f"{key}: peak memory {base['peak_kb']}KB -> {current['peak_kb']}KB"
+            )
+    return regressions
@@ -0,0 +1,78 @@
+"""
+Validators for conditional GET (ETag, Last-Modified).
+
+Detail: updated_at of the object and of to-one relations rendered by
+the serializer (taken from queryset shape, recrutingapp.shaping).
+List: count and max(updated_at) over the filtered queryset.
+Both are hashed with request path, user and renderer into a weak ETag.
+"""
+
+import functools
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+from recrutingapp.shaping import get_queryset_shape, join_path
+
+TIMESTAMP_FIELD = "updated_at"
+
+
+def has_timestamp(model) -> bool:
+    try:
+        model._meta.get_field(TIMESTAMP_FIELD)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def get_timestamp_paths(serializer_class) -> tuple:
+    """
+    Paths to models with timestamp rendered by serializer,
+    "" is the serializer model itself
+    """
+    shape = get_queryset_shape(serializer_class)
+    paths = [""] if has_timestamp(shape.model) else []
+    for path in shape.select_related:
+        model = shape.model
+        for name in path.split("__"):
+            model = model._meta.get_field(name).related_model
+        if has_timestamp(model):
+            paths.append(path)
+    return tuple(paths)
+
+
+def get_timestamp_fields(serializer_class) -> list:
+    return [
+        join_path(path, TIMESTAMP_FIELD)
+        for path in get_timestamp_paths(serializer_class)
+    ]
+
+
+def get_timestamps(instance, serializer_class) -> list:
+    """Timestamps of loaded instance (relations should be joined)"""
+    timestamps = []
+    for path in get_timestamp_paths(serializer_class):
+        obj = instance
+        for name in path.split("__") if path else ():
+            obj = getattr(obj, name)
+            if obj is None:
+                break
+        if obj is not None:
+            timestamps.append(getattr(obj, TIMESTAMP_FIELD))
+    return timestamps
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8"))
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    response["Cache-Control"] = "private, no-cache"
+    patch_vary_headers(response, ("Authorization", "Cookie"))
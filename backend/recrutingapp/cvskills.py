@@ -0,0 +1,237 @@
+"""
+Search of approved CVs by employee skills.
+
+CVSkillIndex is an inverted index: skill id -> sorted NumPy array of ids of
+approved CVs whose employee has the skill. Required skills are intersected
+starting from the shortest array (binary search of its ids in the others),
+nice to have skills are united and counted per CV for ranking, no joins
+through Employee.skills. The index is a ProcessCache
+(recrutingapp.processcache), changes of CV statuses and employee skills are
+applied to it incrementally after commit by signal receivers
+(recrutingapp.signals). Matches are capped by MAX_SEARCH_RESULTS before
+they become SQL id lists.
+"""
+
+import threading
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from recrutingapp.models import CV, ConstDocumentStatus, Skill
+from recrutingapp.processcache import ProcessCache
+
+INDEX_TTL = 300
+
+# skill names in one search parameter
+MAX_SEARCH_SKILLS = 20
+# matched CVs passed to SQL (the best and newest)
+MAX_SEARCH_RESULTS = 1000
+
+EMPTY = np.empty(0, dtype=np.int64)
+
+
+def contains(posting, ids):
+    """Mask of ids found in sorted posting array"""
+    if not len(posting):
+        return np.zeros(len(ids), dtype=bool)
+    positions = np.searchsorted(posting, ids)
+    return posting[np.minimum(positions, len(posting) - 1)] == ids
+
+
+def group_rows(rows) -> dict:
+    """rows: (cv id, skill id or None) -> {cv id: skill ids}"""
+    skills = {}
+    for cv, skill in rows:
+        cv_skills = skills.setdefault(cv, set())
+        if skill is not None:
+            cv_skills.add(skill)
+    return skills
+
+
+class CVSkillIndex:
+    """Sorted approved CV ids per skill id"""
+
+    def __init__(self, rows):
+        """rows: (cv id, skill id or None) of approved CVs"""
+        self.cv_skills = {
+            cv: frozenset(skills) for cv, skills in group_rows(rows).items()
+        }
+        pairs = np.array(
+            [(skill, cv) for cv, skills in self.cv_skills.items() for skill in skills],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        # sorted by skill, then CV, arrays of skills are slices
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        skills, starts = np.unique(pairs[:, 0], return_index=True)
+        self.postings = dict(zip(skills.tolist(), np.split(pairs[:, 1], starts[1:])))
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.cv_skills)
+
+    def search(self, required=(), nice=()) -> tuple:
+        """
+        CV ids with all required skills (with any nice to have skill if
+        there are no required ones) and numbers of nice to have skills
+        """
+        postings = self.postings
+        if required:
+            lists = sorted((postings.get(pk, EMPTY) for pk in required), key=len)
+            ids = lists[0]
+            for posting in lists[1:]:
+                if not len(ids):
+                    break
+                ids = ids[contains(posting, ids)]
+        else:
+            ids = np.unique(
+                np.concatenate([EMPTY] + [postings.get(pk, EMPTY) for pk in nice])
+            )
+        scores = np.zeros(len(ids), dtype=np.int64)
+        for pk in nice:
+            posting = postings.get(pk)
+            if posting is not None:
+                scores += contains(posting, ids)
+        return ids, scores
+
+    def update(self, pks, rows):
+        """CVs pks are replaced by rows (cv id, skill id or None) of approved"""
+        skills = group_rows(rows)
+        with self.lock:
+            added, removed = {}, {}
+            for cv in set(pks) | skills.keys():
+                old = self.cv_skills.get(cv, frozenset())
+                new = frozenset(skills.get(cv, ()))
+                for skill in new - old:
+                    added.setdefault(skill, []).append(cv)
+                for skill in old - new:
+                    removed.setdefault(skill, []).append(cv)
+                if cv in skills:
+                    self.cv_skills[cv] = new
+                else:
+                    self.cv_skills.pop(cv, None)
+            # arrays are replaced, searches in progress keep the old ones
+            for skill in added.keys() | removed.keys():
+                posting = self.postings.get(skill, EMPTY)
+                if skill in removed:
+                    posting = posting[
+                        ~np.isin(posting, removed[skill], assume_unique=True)
+                    ]
+                if skill in added:
+                    posting = np.union1d(posting, np.array(added[skill], np.int64))
+                if len(posting):
+                    self.postings[skill] = posting
+                else:
+                    self.postings.pop(skill, None)
+
+
+def get_rows(queryset):
+    return queryset.filter(status=ConstDocumentStatus.approved).values_list(
+        "pk", "employee__skills"
+    )
+
+
+def build_cv_skill_index() -> CVSkillIndex:
+    return CVSkillIndex(list(get_rows(CV.objects.all()).iterator()))
+
+
+cv_skill_index = ProcessCache(build_cv_skill_index, INDEX_TTL)
+
+
+def parse_skills(value) -> list:
+    """Comma separated skill names"""
+    names = []
+    for name in value.split(","):
+        name = name.strip()
+        if name and name.lower() not in (n.lower() for n in names):
+            names.append(name)
+    return names
+
+
+def get_skill_ids(names) -> dict:
+    """Lower-cased name -> id of existing skills (case insensitive)"""
+    if not names:
+        return {}
+    q = Q()
+    for name in names:
+        q |= Q(name__iexact=name)
+    return {
+        name.lower(): pk
+        for pk, name in Skill.objects.filter(q).values_list("pk", "name")
+    }
+
+
+def search_cvs(queryset, required, nice, rank=False):
+    """
+    Approved CVs of queryset by skill names: all required ones, nice to
+    have ones add to rank (at least one of them without required ones).
+    Up to MAX_SEARCH_RESULTS best CVs (newest of equal ones) are taken,
+    ranked CVs are ordered by number of nice to have skills
+    """
+    skill_ids = get_skill_ids(required + nice)
+    if any(name.lower() not in skill_ids for name in required):
+        return queryset.none()
+    required = [skill_ids[name.lower()] for name in required]
+    nice = [skill_ids[name.lower()] for name in nice if name.lower() in skill_ids]
+    if not required and not nice:
+        return queryset.none()
+
+    ids, scores = cv_skill_index.get().search(required, nice)
+    if len(ids) > MAX_SEARCH_RESULTS:
+        top = np.lexsort((-ids, -scores))[:MAX_SEARCH_RESULTS]
+        ids, scores = ids[top], scores[top]
+    queryset = queryset.filter(pk__in=ids.tolist())
+    if rank and nice:
+        # one WHEN per score, not per CV
+        whens = [
+            When(pk__in=ids[scores == score].tolist(), then=Value(score))
+            for score in np.unique(scores[scores > 0]).tolist()
+        ]
+        queryset = queryset.annotate(
+            skill_score=Case(*whens, default=Value(0), output_field=IntegerField())
+        ).order_by("-skill_score", "-updated_at", "-pk")
+    return queryset
+
+
+def update_cvs(pks):
+    index = cv_skill_index.peek()
+    if index is not None:
+        index.update(pks, list(get_rows(CV.objects.filter(pk__in=pks))))
+
+
+def update_employees(pks):
+    index = cv_skill_index.peek()
+    if index is not None:
+        rows = list(get_rows(CV.objects.filter(employee__in=pks)))
+        index.update({cv for cv, _ in rows}, rows)
+
+
+def cv_saved(sender, instance, **kwargs):
+    """Signal receiver: saved or deleted CV"""
+    if cv_skill_index.peek() is not None:
+        pks = [instance.pk]
+        transaction.on_commit(lambda: update_cvs(pks))
+
+
+def cvs_transitioned(sender, transitions, **kwargs):
+    """Signal receiver: CVs moved by workflow"""
+    if cv_skill_index.peek() is not None and transitions:
+        pks = [transition.object_id for transition in transitions]
+        transaction.on_commit(lambda: update_cvs(pks))
+
+
+def employee_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Signal receiver: m2m_changed of Employee.skills"""
+    if cv_skill_index.peek() is None:
+        return
+    if action in ("post_add", "post_remove", "post_clear"):
+        if reverse:
+            if pk_set is None:
+                # skill.skills.clear()
+                cv_skill_index.invalidate()
+                return
+            # skill.skills.add(*employees)
+            pks = list(pk_set)
+        else:
+            pks = [instance.pk]
+        transaction.on_commit(lambda: update_employees(pks))
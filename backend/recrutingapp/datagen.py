@@ -0,0 +1,573 @@
+"""
+Synthetic data generator for realistic-scale benchmarks.
+
+Volumes are derived from the number of CVs. Output is deterministic
+for a seed: all values come from one random generator, timestamps are
+relative to a fixed date, objects get explicit ids after the current maximum
+(use an empty database for comparable runs). Rows bypass model instances
+and are written in chunks: COPY on PostgreSQL, executemany elsewhere.
+Sequences are reset at the end.
+"""
+
+import csv
+import datetime
+import io
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+
+from recrutingapp.models import (
+    CV,
+    City,
+    ConstDocumentStatus,
+    CVEducation,
+    CVExperience,
+    CVResponse,
+    DocumentMessage,
+    Employee,
+    Employer,
+    Favorite,
+    Gender,
+    Skill,
+    Vacancy,
+    VacancyResponse,
+)
+from recrutingapp.search import get_search_vector, is_fulltext_supported
+from userapp.models import CustomUser, UserRoles
+from userapp.utils import UserGroupUtils
+
+CHUNK_SIZE = 20000
+
+BASE_TIME = datetime.datetime(2024, 1, 1)
+TIME_SPAN = 2 * 365 * 24 * 3600
+
+# status weights of documents and responses
+DOCUMENT_STATUS_WEIGHTS = {
+    ConstDocumentStatus.approved: 70,
+    ConstDocumentStatus.draft: 15,
+    ConstDocumentStatus.pending: 10,
+    ConstDocumentStatus.rejected: 5,
+}
+RESPONSE_STATUS_WEIGHTS = {
+    ConstDocumentStatus.pending: 40,
+    ConstDocumentStatus.approved: 25,
+    ConstDocumentStatus.rejected: 25,
+    ConstDocumentStatus.draft: 10,
+}
+
+POSITIONS = (
+    "python developer",
+    "java developer",
+    "frontend developer",
+    "devops engineer",
+    "data scientist",
+    "qa engineer",
+    "system analyst",
+    "project manager",
+    "sales manager",
+    "accountant",
+    "designer",
+    "support specialist",
+    "team lead",
+    "hr manager",
+    "marketing manager",
+    "lawyer",
+    "driver",
+    "courier",
+    "cashier",
+    "office manager",
+)
+LEVELS = ("junior", "middle", "senior", "lead", "")
+WORDS = (
+    "python django postgresql linux docker kubernetes react vue sql java golang "
+    "teamwork analytics reports clients sales support design testing automation "
+    "backend frontend api microservices cloud aws security agile scrum office "
+    "logistics finance marketing negotiation budget planning english remote"
+).split()
+SKILL_NAMES = sorted(set(WORDS + [p.split()[0] for p in POSITIONS]))
+COMPANY_WORDS = ("tech", "soft", "group", "trade", "service", "lab", "systems", "pro")
+FIRST_NAMES = ("Alex", "Maria", "Ivan", "Olga", "Dmitry", "Anna", "Sergey", "Elena")
+LAST_NAMES = ("Ivanov", "Petrova", "Smirnov", "Volkova", "Kuznetsov", "Sokolova")
+INSTITUTIONS = ("MSU", "SPbU", "HSE", "MIPT", "Bauman MSTU", "ITMO", "College")
+
+
+class TableWriter:
+    """Buffered rows of one table (values in database format)"""
+
+    def __init__(self, model, fields, chunk_size=CHUNK_SIZE):
+        self.table = model._meta.db_table
+        self.columns = [model._meta.get_field(name).column for name in fields]
+        self.chunk_size = chunk_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, *row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(column) for column in self.columns)
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in self.rows:
+                    writer.writerow("\\N" if value is None else value for value in row)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {quote(self.table)} ({columns}) "
+                    "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    buffer,
+                )
+            else:
+                placeholders = ", ".join(["%s"] * len(self.columns))
+                cursor.executemany(
+                    f"INSERT INTO {quote(self.table)} ({columns}) "
+                    f"VALUES ({placeholders})",
+                    self.rows,
+                )
+        self.count += len(self.rows)
+        self.rows = []
+
+
+def get_next_id(model) -> int:
+    return (model.objects.aggregate(max_id=Max("pk"))["max_id"] or 0) + 1
+
+
+class DataGenerator:
+    """
+    Users of every role with profiles, CVs with experience and education,
+    vacancies, responses in every status with messages, favorites
+    """
+
+    def __init__(
+        self, cvs, seed=0, chunk_size=CHUNK_SIZE, password="password", log=None
+    ):
+        self.cvs = cvs
+        self.rnd = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.password = make_password(password, salt=f"gendata{seed}")
+        self.log = log or (lambda message: None)
+        self.writers = []
+
+    # values
+    def timestamps(self):
+        """(created_at, updated_at) in database text format"""
+        created = BASE_TIME + datetime.timedelta(seconds=self.rnd.randrange(TIME_SPAN))
+        updated = created + datetime.timedelta(
+            seconds=int(self.rnd.expovariate(1 / (7 * 24 * 3600)))
+        )
+        return (
+            created.strftime("%Y-%m-%d %H:%M:%S.%f"),
+            updated.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        )
+
+    def date(self, start_year, end_year) -> str:
+        start = datetime.date(start_year, 1, 1)
+        days = (datetime.date(end_year, 1, 1) - start).days
+        return (start + datetime.timedelta(days=self.rnd.randrange(days))).isoformat()
+
+    def text(self, words) -> str:
+        return " ".join(self.rnd.choices(WORDS, k=words))
+
+    def position(self) -> str:
+        # few positions are much more popular than others
+        index = min(int(self.rnd.paretovariate(1.2)) - 1, len(POSITIONS) - 1)
+        level = self.rnd.choice(LEVELS)
+        return f"{level} {POSITIONS[index]}".strip()
+
+    def salary(self) -> int:
+        return int(self.rnd.lognormvariate(11.5, 0.5)) // 1000 * 1000
+
+    def status(self, weights) -> str:
+        return self.rnd.choices(list(weights), weights=list(weights.values()))[0]
+
+    def city(self) -> int:
+        # first cities are the biggest
+        return self.city_ids[
+            min(int(self.rnd.expovariate(0.7)), len(self.city_ids) - 1)
+        ]
+
+    def writer(self, model, fields) -> TableWriter:
+        writer = TableWriter(model, fields, self.chunk_size)
+        self.writers.append(writer)
+        return writer
+
+    # generation
+    def run(self) -> dict:
+        """Generate all data, returns rows count per table"""
+        self.prepare()
+        self.create_employers()
+        self.create_employees()
+        self.create_responses()
+        self.create_favorites()
+        for writer in self.writers:
+            writer.flush()
+        self.finish()
+        return {writer.table: writer.count for writer in self.writers}
+
+    def prepare(self):
+        self.city_ids = list(City.objects.order_by("pk").values_list("pk", flat=True))
+        self.gender_ids = list(
+            Gender.objects.order_by("pk").values_list("pk", flat=True)
+        )
+        if not self.city_ids or not self.gender_ids:
+            raise ValueError("Master data required: load genders and cities")
+
+        UserGroupUtils.create_user_groups()
+        self.groups = {
+            role.value: [
+                group.pk for group in UserGroupUtils.get_groups_for_role(role.value)
+            ]
+            for role in UserRoles
+        }
+        Skill.objects.bulk_create(
+            [Skill(name=name) for name in SKILL_NAMES], ignore_conflicts=True
+        )
+        self.skill_ids = list(
+            Skill.objects.filter(name__in=SKILL_NAMES)
+            .order_by("name")
+            .values_list("pk", flat=True)
+        )
+        self.content_types = ContentType.objects.get_for_models(
+            CV, Vacancy, CVResponse, VacancyResponse
+        )
+
+        self.next_ids = {
+            model: get_next_id(model)
+            for model in (
+                CustomUser,
+                Employee,
+                Employer,
+                CV,
+                CVExperience,
+                CVEducation,
+                Vacancy,
+                CVResponse,
+                VacancyResponse,
+                DocumentMessage,
+                Favorite,
+            )
+        }
+        self.start_ids = dict(self.next_ids)
+
+        self.users = self.writer(
+            CustomUser,
+            [
+                "id",
+                "password",
+                "is_superuser",
+                "username",
+                "first_name",
+                "last_name",
+                "email",
+                "is_staff",
+                "role",
+                "is_active",
+                "is_validated",
+                "validation_code",
+                "date_created",
+            ],
+        )
+        self.user_groups = self.writer(
+            CustomUser.groups.through, ["customuser", "group"]
+        )
+
+        # (vacancy id, owner id) and (cv id, owner id) of approved documents
+        self.approved_vacancies = []
+        self.approved_cvs = []
+
+    def get_id(self, model) -> int:
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def create_user(self, role) -> int:
+        pk = self.get_id(CustomUser)
+        created_at, _ = self.timestamps()
+        self.users.add(
+            pk,
+            self.password,
+            0,
+            f"gen_{role}_{pk}",
+            self.rnd.choice(FIRST_NAMES),
+            self.rnd.choice(LAST_NAMES),
+            f"gen_{role}_{pk}@example.com",
+            0,
+            role,
+            1,
+            1,
+            "",
+            created_at,
+        )
+        for group_id in self.groups[role]:
+            self.user_groups.add(pk, group_id)
+        return pk
+
+    def create_employers(self):
+        logged = ["created_at", "updated_at", "updated_by"]
+        status = ["status", "status_info"]
+        employers = self.writer(
+            Employer,
+            ["id", "owner", "name", "established", "email", "city", "description"]
+            + ["welcome_letter"]
+            + logged
+            + status,
+        )
+        vacancies = self.writer(
+            Vacancy,
+            ["id", "owner", "employer", "title", "city", "position", "salary"]
+            + ["description"]
+            + logged
+            + status,
+        )
+
+        for _ in range(max(1, self.cvs // 100000)):
+            self.create_user(UserRoles.moderator.value)
+
+        vacancies_left = max(1, self.cvs // 2)
+        self.log(f"employers and {vacancies_left} vacancies")
+        while vacancies_left > 0:
+            user_id = self.create_user(UserRoles.employer.value)
+            employer_id = self.get_id(Employer)
+            employers.add(
+                employer_id,
+                user_id,
+                f"{self.rnd.choice(WORDS).title()} {self.rnd.choice(COMPANY_WORDS)}",
+                self.date(1990, 2023),
+                f"hr{employer_id}@gen-{user_id}.example.com",
+                self.city(),
+                self.text(10),
+                self.text(30),
+                *self.timestamps(),
+                user_id,
+                self.status(DOCUMENT_STATUS_WEIGHTS),
+                "",
+            )
+            # long tail: most employers have few vacancies
+            count = min(int(self.rnd.paretovariate(1.1)), 500, vacancies_left)
+            for _ in range(count):
+                vacancy_id = self.get_id(Vacancy)
+                position = self.position()
+                status_id = self.status(DOCUMENT_STATUS_WEIGHTS)
+                vacancies.add(
+                    vacancy_id,
+                    user_id,
+                    employer_id,
+                    position.title()[:60],
+                    self.city(),
+                    position,
+                    self.salary(),
+                    self.text(40),
+                    *self.timestamps(),
+                    user_id,
+                    status_id,
+                    "",
+                )
+                if status_id == ConstDocumentStatus.approved:
+                    self.approved_vacancies.append((vacancy_id, user_id))
+            vacancies_left -= count
+
+    def create_employees(self):
+        logged = ["created_at", "updated_at", "updated_by"]
+        employees = self.writer(
+            Employee,
+            ["id", "owner", "name", "birthday", "gender", "email", "city"]
+            + ["description"]
+            + logged,
+        )
+        employee_skills = self.writer(Employee.skills.through, ["employee", "skill"])
+        cvs = self.writer(
+            CV,
+            ["id", "owner", "employee", "title", "position", "salary", "description"]
+            + ["search_document", "experience_months", "status", "status_info"]
+            + logged,
+        )
+        experience = self.writer(
+            CVExperience,
+            ["id", "cv", "datefrom", "dateto", "is_current", "city", "company"]
+            + ["position", "content"],
+        )
+        education = self.writer(
+            CVEducation,
+            ["id", "cv", "date", "institution", "specialty", "content"],
+        )
+
+        cvs_left = self.cvs
+        self.log(f"employees and {cvs_left} CVs")
+        while cvs_left > 0:
+            user_id = self.create_user(UserRoles.employee.value)
+            employee_id = self.get_id(Employee)
+            city_id = self.city()
+            employees.add(
+                employee_id,
+                user_id,
+                f"{self.rnd.choice(FIRST_NAMES)} {self.rnd.choice(LAST_NAMES)}",
+                self.date(1960, 2006),
+                self.rnd.choice(self.gender_ids),
+                f"gen_employee_{user_id}@example.com",
+                city_id,
+                self.text(10),
+                *self.timestamps(),
+                user_id,
+            )
+            for skill_id in set(self.rnd.choices(self.skill_ids, k=6)):
+                employee_skills.add(employee_id, skill_id)
+
+            count = min(self.rnd.choice((1, 1, 2, 2, 3)), cvs_left)
+            for _ in range(count):
+                cv_id = self.get_id(CV)
+                documents = []
+                months = 0
+                year = self.rnd.randint(2000, 2020)
+                for _ in range(self.rnd.choice((0, 1, 2, 3, 4, 5))):
+                    company = f"{self.rnd.choice(WORDS).title()} {self.rnd.choice(COMPANY_WORDS)}"
+                    position = self.position()
+                    content = self.text(20)
+                    years = self.rnd.randint(1, 4)
+                    experience.add(
+                        self.get_id(CVExperience),
+                        cv_id,
+                        f"{year}-01-01",
+                        f"{min(year + years, 2024)}-01-01",
+                        0,
+                        city_id,
+                        company,
+                        position,
+                        content,
+                    )
+                    documents.extend((company, position, content))
+                    months += (min(year + years, 2024) - year) * 12
+                    year = min(year + years, 2023)
+                for _ in range(self.rnd.choice((0, 1, 1, 2))):
+                    institution = self.rnd.choice(INSTITUTIONS)
+                    specialty = self.rnd.choice(POSITIONS)
+                    content = self.text(10)
+                    education.add(
+                        self.get_id(CVEducation),
+                        cv_id,
+                        self.date(1980, 2020),
+                        institution,
+                        specialty,
+                        content,
+                    )
+                    documents.extend((institution, specialty, content))
+
+                position = self.position()
+                status_id = self.status(DOCUMENT_STATUS_WEIGHTS)
+                cvs.add(
+                    cv_id,
+                    user_id,
+                    employee_id,
+                    position.title()[:60],
+                    position,
+                    self.salary(),
+                    self.text(60),
+                    "\n".join(documents),
+                    months,
+                    status_id,
+                    "",
+                    *self.timestamps(),
+                    user_id,
+                )
+                if status_id == ConstDocumentStatus.approved:
+                    self.approved_cvs.append((cv_id, user_id))
+            cvs_left -= count
+
+    def create_responses(self):
+        fields = ["id", "owner", "cv", "vacancy", "status", "status_info"]
+        fields += ["created_at", "updated_at", "updated_by"]
+        messages = self.writer(
+            DocumentMessage,
+            ["id", "content_type", "object_id", "created_at", "sender", "content"],
+        )
+        if not self.approved_cvs or not self.approved_vacancies:
+            return
+
+        for model, count in (
+            (CVResponse, self.cvs // 10),
+            (VacancyResponse, self.cvs // 5),
+        ):
+            writer = self.writer(model, fields)
+            content_type_id = self.content_types[model].pk
+            pairs = set()
+            self.log(f"{count} {model._meta.verbose_name_plural}")
+            for _ in range(count):
+                cv_id, cv_owner = self.rnd.choice(self.approved_cvs)
+                vacancy_id, vacancy_owner = self.rnd.choice(self.approved_vacancies)
+                if (cv_id, vacancy_id) in pairs:
+                    continue
+                pairs.add((cv_id, vacancy_id))
+                # employer responds on CV, employee - on vacancy
+                owner, other = (
+                    (vacancy_owner, cv_owner)
+                    if model is CVResponse
+                    else (cv_owner, vacancy_owner)
+                )
+                response_id = self.get_id(model)
+                status_id = self.status(RESPONSE_STATUS_WEIGHTS)
+                created_at, updated_at = self.timestamps()
+                writer.add(
+                    response_id,
+                    owner,
+                    cv_id,
+                    vacancy_id,
+                    status_id,
+                    "",
+                    created_at,
+                    updated_at,
+                    owner,
+                )
+                if status_id == ConstDocumentStatus.draft:
+                    continue
+                for index in range(self.rnd.choice((0, 1, 2, 4))):
+                    messages.add(
+                        self.get_id(DocumentMessage),
+                        content_type_id,
+                        response_id,
+                        created_at,
+                        owner if index % 2 == 0 else other,
+                        self.text(12),
+                    )
+
+    def create_favorites(self):
+        favorites = self.writer(Favorite, ["id", "user", "content_type", "object_id"])
+        if not self.approved_cvs or not self.approved_vacancies:
+            return
+        # employers mark CVs, employees mark vacancies
+        for model, users, documents in (
+            (CV, self.approved_vacancies, self.approved_cvs),
+            (Vacancy, self.approved_cvs, self.approved_vacancies),
+        ):
+            content_type_id = self.content_types[model].pk
+            marked = set()
+            for _ in range(self.cvs // 10):
+                user_id = self.rnd.choice(users)[1]
+                object_id = self.rnd.choice(documents)[0]
+                if (user_id, object_id) in marked:
+                    continue
+                marked.add((user_id, object_id))
+                favorites.add(
+                    self.get_id(Favorite), user_id, content_type_id, object_id
+                )
+
+    def finish(self):
+        if is_fulltext_supported():
+            self.log("search vectors")
+            for model in (CV, Vacancy):
+                model.objects.filter(pk__gte=self.start_ids[model]).update(
+                    search_vector=get_search_vector(model)
+                )
+        # sequences after explicit ids
+        models = list(self.next_ids)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
@@ -0,0 +1,147 @@
+"""
+Events of response chats (new messages and status changes).
+
+Events are published after commit by signal receivers (recrutingapp.signals)
+to channel of the response document and delivered to its streams
+(recrutingapp.streaming). Broker class is set by EVENTS_BROKER setting:
+InProcessBroker delivers events to streams of the same process, a broker
+over shared pub/sub (e.g. Redis) is needed for several worker processes.
+"""
+
+import abc
+import asyncio
+import threading
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from recrutingapp.models import CVResponse, VacancyResponse
+from recrutingapp.serializers import DocumentMessageSerializer
+
+DEFAULT_BROKER = "recrutingapp.events.InProcessBroker"
+
+# documents with event streams
+STREAM_MODELS = (CVResponse, VacancyResponse)
+
+# undelivered events per stream, slow stream is closed on overflow
+QUEUE_SIZE = 100
+
+
+def get_channel(instance) -> str:
+    return f"{instance._meta.model_name}:{instance.pk}"
+
+
+class Subscription:
+    """Events of channel for one stream, consumed in its event loop"""
+
+    def __init__(self, channel, loop, maxsize=QUEUE_SIZE):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflow = False
+
+    def put(self, event):
+        """Called in subscription loop"""
+        if self.queue.full():
+            self.overflow = True
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        """Next event, None after overflow"""
+        if self.overflow:
+            return None
+        return await self.queue.get()
+
+
+class EventBroker(abc.ABC):
+    """Publish from any thread, subscribe in event loop"""
+
+    @abc.abstractmethod
+    def publish(self, channel, event):
+        """Deliver event to subscriptions of channel"""
+
+    @abc.abstractmethod
+    def subscribe(self, channel) -> Subscription:
+        """New subscription of channel"""
+
+    @abc.abstractmethod
+    def unsubscribe(self, subscription):
+        """Subscription gets no more events"""
+
+
+class InProcessBroker(EventBroker):
+    def __init__(self):
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscriptions = list(self.channels.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # loop is closed
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel) -> Subscription:
+        subscription = Subscription(channel, asyncio.get_running_loop())
+        with self.lock:
+            self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.channels.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.channels.pop(subscription.channel, None)
+
+
+_broker = None
+_lock = threading.Lock()
+
+
+def get_broker() -> EventBroker:
+    global _broker
+    if _broker is None:
+        with _lock:
+            if _broker is None:
+                path = getattr(settings, "EVENTS_BROKER", DEFAULT_BROKER)
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_on_commit(channel, event):
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
+
+
+def publish_message(sender, instance, created, **kwargs):
+    """Signal receiver: new message of streamed document"""
+    if not created:
+        return
+    content_type = ContentType.objects.get_for_id(instance.content_type_id)
+    if content_type.model_class() not in STREAM_MODELS:
+        return
+    event = DocumentMessageSerializer(instance).data
+    channel = f"{content_type.model}:{instance.object_id}"
+    publish_on_commit(channel, {"type": "message", "data": event})
+
+
+def publish_transitions(sender, transitions, **kwargs):
+    """Signal receiver: streamed documents moved by workflow"""
+    for transition in transitions:
+        channel = f"{sender._meta.model_name}:{transition.object_id}"
+        event = {"status": transition.target_id, "status_info": transition.info}
+        publish_on_commit(channel, {"type": "status", "data": event})
+
+
+def publish_status(sender, instance, created, **kwargs):
+    """Signal receiver: saved streamed document"""
+    if created:
+        return
+    event = {"status": instance.status_id, "status_info": instance.status_info}
+    publish_on_commit(get_channel(instance), {"type": "status", "data": event})
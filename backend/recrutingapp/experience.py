@@ -0,0 +1,51 @@
+"""
+Experience length of CVs (CV.experience_months).
+
+Months are recomputed with search data on every write of CV experience
+(recrutingapp.search.update_search_index). Current jobs grow with time
+without writes, their CVs are refreshed by `manage.py experience`
+(experienceworker service of docker-compose runs it daily).
+"""
+
+import datetime
+
+from recrutingapp.models import CV, CVExperience
+
+
+def get_experience_months(cv_ids) -> dict:
+    """Total experience months of CVs (current items up to today)"""
+    today = datetime.date.today()
+    months = {cv_id: 0 for cv_id in cv_ids}
+    items = CVExperience.objects.filter(cv_id__in=cv_ids).values_list(
+        "cv_id", "datefrom", "dateto", "is_current"
+    )
+    for cv_id, datefrom, dateto, is_current in items.iterator():
+        end = today if is_current or dateto is None else dateto
+        length = (end.year - datefrom.year) * 12 + end.month - datefrom.month
+        months[cv_id] += max(length, 0)
+    return months
+
+
+def update_current_experience(batch_size=10000) -> int:
+    """
+    Refresh experience months of CVs with current experience items (they
+    grow with time), to be run periodically. Returns CVs count
+    """
+    count = 0
+    ids = (
+        CVExperience.objects.filter(is_current=True)
+        .order_by("cv_id")
+        .values_list("cv_id", flat=True)
+        .distinct()
+    )
+    batch = list(ids[:batch_size])
+    while batch:
+        months = get_experience_months(batch)
+        CV.objects.bulk_update(
+            [CV(id=cv_id, experience_months=value) for cv_id, value in months.items()],
+            ["experience_months"],
+            batch_size=1000,
+        )
+        count += len(batch)
+        batch = list(ids.filter(cv_id__gt=batch[-1])[:batch_size])
+    return count
@@ -0,0 +1,47 @@
+"""
+Favorite object ids of user per content type (django cache framework).
+
+Set is loaded with one query on miss and dropped by Favorite signals
+(recrutingapp.signals), so listings mark favorites without Favorite joins
+or subqueries.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from recrutingapp.models import Favorite
+
+FAVORITES_CACHE_TIMEOUT = 3600
+
+FAVORITES_KEY = "favorites:{user_id}:{content_type_id}"
+
+
+class FavoriteCache:
+    @staticmethod
+    def get_key(user_id, content_type_id) -> str:
+        return FAVORITES_KEY.format(user_id=user_id, content_type_id=content_type_id)
+
+    @staticmethod
+    def get_ids(user_id, content_type_id) -> frozenset:
+        key = FavoriteCache.get_key(user_id, content_type_id)
+        ids = cache.get(key)
+        if ids is None:
+            ids = frozenset(
+                Favorite.objects.filter(
+                    user_id=user_id, content_type_id=content_type_id
+                ).values_list("object_id", flat=True)
+            )
+            cache.set(key, ids, FAVORITES_CACHE_TIMEOUT)
+        return ids
+
+    @staticmethod
+    def invalidate(user_id, content_type_id):
+        cache.delete(FavoriteCache.get_key(user_id, content_type_id))
+
+
+def favorite_changed(sender, instance, **kwargs):
+    """Signal receiver: saved or deleted Favorite"""
+    user_id, content_type_id = instance.user_id, instance.content_type_id
+    # again after commit, a request in between could cache old set
+    FavoriteCache.invalidate(user_id, content_type_id)
+    transaction.on_commit(lambda: FavoriteCache.invalidate(user_id, content_type_id))
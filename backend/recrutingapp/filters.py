@@ -1,7 +1,19 @@
+import datetime
+
 import django_filters.rest_framework as filters
+from dateutil.relativedelta import relativedelta
+from django.contrib.contenttypes.models import ContentType
 from django_filters.widgets import DateRangeWidget
+from rest_framework.exceptions import ValidationError
 
+from recrutingapp.cvskills import MAX_SEARCH_SKILLS, parse_skills, search_cvs
+from recrutingapp.favorites import FavoriteCache
+from recrutingapp.geo import DEFAULT_RADIUS, MAX_RADIUS, city_index
 from recrutingapp.models import NewsPost, CV, Vacancy
+from recrutingapp.search import search_queryset
+
+# bounds of age and experience filters, years
+MAX_YEARS = 150
 
 
 class NewsFilter(filters.FilterSet):
@@ -15,7 +27,108 @@ class NewsFilter(filters.FilterSet):
         fields = ["title", "created_at", "tags__name"]
 
 
-class CVFilter(filters.FilterSet):
+class SearchFilterMixin(filters.FilterSet):
+    """Full-text search by 'q' parameter (phrases in quotes, prefixes with *)"""
+
+    q = filters.CharFilter(method="filter_search")
+
+    def filter_search(self, queryset, name, value):
+        return search_queryset(queryset, value)
+
+
+class FavoriteFilterMixin(filters.FilterSet):
+    """Filter by user's favorites ('is_favorite' parameter)"""
+
+    is_favorite = filters.BooleanFilter(method="filter_is_favorite")
+
+    def filter_is_favorite(self, queryset, name, value):
+        user = getattr(self.request, "user", None)
+        if user is None or not user.is_authenticated:
+            return queryset.none() if value else queryset
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        ids = FavoriteCache.get_ids(user.pk, content_type.pk)
+        if value:
+            return queryset.filter(pk__in=ids)
+        return queryset.exclude(pk__in=ids)
+
+
+class LocationFilterMixin(filters.FilterSet):
+    """
+    Filter by city sets of location index (recrutingapp.geo): 'region' -
+    cities of region, 'near' - cities within 'radius' km around city (only
+    the city itself if it has no coordinates)
+    """
+
+    city_field = "city"
+
+    region = filters.NumberFilter(method="filter_region")
+    near = filters.NumberFilter(method="filter_near")
+    radius = filters.NumberFilter(method="filter_near")
+
+    def filter_cities(self, queryset, ids):
+        return queryset.filter(**{f"{self.city_field}__in": ids})
+
+    def filter_region(self, queryset, name, value):
+        return self.filter_cities(queryset, city_index.get().get_region(int(value)))
+
+    def filter_near(self, queryset, name, value):
+        # 'near' and 'radius' are applied together in filter_queryset
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        data = self.form.cleaned_data
+        near, radius = data.get("near"), data.get("radius")
+        if near is None:
+            if radius is not None:
+                raise ValidationError({"near": ["Required with radius."]})
+            return queryset
+        radius = DEFAULT_RADIUS if radius is None else float(radius)
+        if not 0 <= radius <= MAX_RADIUS:
+            raise ValidationError({"radius": [f"Must be from 0 to {MAX_RADIUS}."]})
+        return self.filter_cities(queryset, city_index.get().near(int(near), radius))
+
+
+class CVSkillFilterMixin(filters.FilterSet):
+    """
+    Filter of approved CVs by employee skills (comma separated names):
+    'skills' - all required, 'skills_any' - nice to have, at least one of
+    them without 'skills'. 'skills_rank' orders CVs by number of nice to
+    have skills (offset pagination)
+    """
+
+    skills = filters.CharFilter(method="filter_skills")
+    skills_any = filters.CharFilter(method="filter_skills")
+    skills_rank = filters.BooleanFilter(method="filter_skills")
+
+    def filter_skills(self, queryset, name, value):
+        # skill parameters are applied together in filter_queryset
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        data = self.form.cleaned_data
+        required = parse_skills(data.get("skills") or "")
+        nice = parse_skills(data.get("skills_any") or "")
+        if not required and not nice:
+            return queryset
+        for name, names in (("skills", required), ("skills_any", nice)):
+            if len(names) > MAX_SEARCH_SKILLS:
+                raise ValidationError(
+                    {name: [f"No more than {MAX_SEARCH_SKILLS} skills."]}
+                )
+        return search_cvs(queryset, required, nice, rank=data.get("skills_rank"))
+
+
+class CVFilter(
+    SearchFilterMixin,
+    FavoriteFilterMixin,
+    LocationFilterMixin,
+    CVSkillFilterMixin,
+    filters.FilterSet,
+):
+    city_field = "employee__city"
+
     position = filters.CharFilter(lookup_expr="icontains")
     description = filters.CharFilter(lookup_expr="icontains")
     salary_min = filters.NumberFilter(field_name="salary", lookup_expr="gte")
@@ -26,7 +139,34 @@ class CVFilter(filters.FilterSet):
     city = filters.CharFilter(
         field_name="employee__city__name", lookup_expr="icontains"
     )
-    is_favorite = filters.BooleanFilter()
+    age_min = filters.NumberFilter(
+        method="filter_age_min", min_value=0, max_value=MAX_YEARS
+    )
+    age_max = filters.NumberFilter(
+        method="filter_age_max", min_value=0, max_value=MAX_YEARS
+    )
+    experience_min = filters.NumberFilter(
+        method="filter_experience_min", min_value=0, max_value=MAX_YEARS
+    )
+    experience_max = filters.NumberFilter(
+        method="filter_experience_max", min_value=0, max_value=MAX_YEARS
+    )
+
+    # age and experience in full years, compared by indexed columns
+
+    def filter_age_min(self, queryset, name, value):
+        born_before = datetime.date.today() - relativedelta(years=int(value))
+        return queryset.filter(employee__birthday__lte=born_before)
+
+    def filter_age_max(self, queryset, name, value):
+        born_after = datetime.date.today() - relativedelta(years=int(value) + 1)
+        return queryset.filter(employee__birthday__gt=born_after)
+
+    def filter_experience_min(self, queryset, name, value):
+        return queryset.filter(experience_months__gte=int(value) * 12)
+
+    def filter_experience_max(self, queryset, name, value):
+        return queryset.filter(experience_months__lt=(int(value) + 1) * 12)
 
     class Meta:
         model = CV
@@ -37,7 +177,9 @@ class CVFilter(filters.FilterSet):
         ]
 
 
-class VacancyFilter(filters.FilterSet):
+class VacancyFilter(
+    SearchFilterMixin, FavoriteFilterMixin, LocationFilterMixin, filters.FilterSet
+):
     position = filters.CharFilter(lookup_expr="icontains")
     description = filters.CharFilter(lookup_expr="icontains")
     salary_min = filters.NumberFilter(field_name="salary", lookup_expr="gte")
@@ -46,7 +188,6 @@ class VacancyFilter(filters.FilterSet):
         field_name="updated_at", lookup_expr="gte"
     )
     city = filters.CharFilter(field_name="city__name", lookup_expr="icontains")
-    is_favorite = filters.BooleanFilter()
 
     class Meta:
         model = Vacancy
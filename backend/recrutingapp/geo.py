@@ -0,0 +1,124 @@
+"""
+City sets for location filters (region, radius around a city).
+
+CityIndex keeps city ids per region and cities with coordinates in a grid
+of GRID_DEGREES cells, so cities within a radius are found by distances to
+cities of the covered cells only. Location filters become indexed
+`city_id IN (...)` predicates instead of joins by city and region names.
+Cities without coordinates are in their regions, but not in the grid: radius
+around such a city is the city itself. The index is a ProcessCache
+(recrutingapp.processcache) rebuilt in request, invalidated by City signals
+(recrutingapp.signals), region of city is a City field.
+"""
+
+import math
+
+import numpy as np
+
+from recrutingapp.models import City
+from recrutingapp.processcache import ProcessCache
+
+INDEX_TTL = 300
+
+# radius search, km
+DEFAULT_RADIUS = 50
+MAX_RADIUS = 1000
+
+EARTH_RADIUS_KM = 6371.0
+
+GRID_DEGREES = 1.0
+GRID_COLUMNS = int(math.ceil(360 / GRID_DEGREES))
+
+# latitude degree length
+DEGREE_KM = math.pi * EARTH_RADIUS_KM / 180
+
+
+def get_cell(latitude, longitude) -> tuple:
+    return (
+        int(math.floor(latitude / GRID_DEGREES)),
+        int(math.floor((longitude + 180) / GRID_DEGREES)) % GRID_COLUMNS,
+    )
+
+
+class CityIndex:
+    """City ids by region and grid cell"""
+
+    def __init__(self, cities):
+        """cities: (pk, region id, latitude, longitude)"""
+        self.regions = {}
+        for pk, region, _, _ in cities:
+            self.regions.setdefault(region, []).append(pk)
+        located = [
+            city for city in cities if city[2] is not None and city[3] is not None
+        ]
+        self.ids = np.array([city[0] for city in located], dtype=np.int64)
+        self.coordinates = np.radians(
+            np.array([city[2:] for city in located], dtype=np.float64).reshape(-1, 2)
+        )
+        self.cities = {city[0]: city[2:] for city in cities}
+        cells = {}
+        for row, city in enumerate(located):
+            cells.setdefault(get_cell(city[2], city[3]), []).append(row)
+        self.cells = {key: np.array(rows) for key, rows in cells.items()}
+
+    def get_region(self, region_id) -> list:
+        return self.regions.get(region_id, [])
+
+    def get_cell_rows(self, latitude, longitude, radius):
+        """Rows of cities in cells covering the radius around the point"""
+        row_lo, _ = get_cell(max(latitude - radius / DEGREE_KM, -90), 0)
+        row_hi, _ = get_cell(min(latitude + radius / DEGREE_KM, 90), 0)
+        # parallels are shorter by cosine of the farthest latitude
+        edge = min(max(abs(latitude) + radius / DEGREE_KM, 0), 90)
+        cosine = math.cos(math.radians(edge))
+        if cosine * 180 * DEGREE_KM <= radius:
+            columns = range(GRID_COLUMNS)
+        else:
+            span = radius / (DEGREE_KM * cosine)
+            _, column = get_cell(0, longitude)
+            width = int(math.ceil(span / GRID_DEGREES))
+            columns = {
+                (column + offset) % GRID_COLUMNS for offset in range(-width, width + 1)
+            }
+        rows = [
+            self.cells[(row, column)]
+            for row in range(row_lo, row_hi + 1)
+            for column in columns
+            if (row, column) in self.cells
+        ]
+        return np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+    def within(self, latitude, longitude, radius) -> list:
+        """Ids of cities within radius (km) around the point"""
+        rows = self.get_cell_rows(latitude, longitude, radius)
+        if not len(rows):
+            return []
+        lat, lon = np.radians(latitude), np.radians(longitude)
+        coordinates = self.coordinates[rows]
+        # haversine
+        a = (
+            np.sin((coordinates[:, 0] - lat) / 2) ** 2
+            + np.cos(lat)
+            * np.cos(coordinates[:, 0])
+            * np.sin((coordinates[:, 1] - lon) / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        return self.ids[rows[distance <= radius]].tolist()
+
+    def near(self, city_id, radius) -> list:
+        """
+        Ids of cities within radius (km) around city,
+        only the city if it has no coordinates
+        """
+        latitude, longitude = self.cities.get(city_id, (None, None))
+        if latitude is None or longitude is None:
+            return [city_id] if city_id in self.cities else []
+        return self.within(latitude, longitude, radius)
+
+
+def build_city_index() -> CityIndex:
+    cities = City.objects.values_list("pk", "region_id", "latitude", "longitude")
+    return CityIndex(list(cities))
+
+
+city_index = ProcessCache(build_city_index, INDEX_TTL, background=False)
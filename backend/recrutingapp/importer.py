@@ -0,0 +1,227 @@
+"""
+Streaming bulk import of vacancies and CVs (JSONL or CSV).
+
+Rows are read one by one from a text stream and validated in batches
+with one import serializer. Cities and employers are resolved by id or name
+through in-memory lookup tables. Valid rows of a batch are inserted with
+bulk_create in one transaction, search data is updated for them.
+Import yields report records: one per failed row and the summary at the end.
+"""
+
+import abc
+import csv
+import itertools
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from recrutingapp.models import (
+    CV,
+    City,
+    CVEducation,
+    CVExperience,
+    Employee,
+    Employer,
+    Vacancy,
+)
+from recrutingapp.search import update_search_index
+from recrutingapp.serializers import CVImportSerializer, VacancyImportSerializer
+
+FORMATS = ("jsonl", "csv")
+BATCH_SIZE = 1000
+
+
+def detect_format(filename, default=FORMATS[0]) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in ("jsonl", "ndjson", "json"):
+        return "jsonl"
+    if extension == "csv":
+        return "csv"
+    return default
+
+
+def read_rows(stream, fmt):
+    """(line number, row, parse error) for rows of text stream"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # empty cells are missing values
+            yield reader.line_num, {k: v for k, v in row.items() if v != ""}, None
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, {"non_field_errors": [f"Invalid JSON: {e}"]}
+
+
+def get_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Lookup:
+    """
+    In-memory table of related objects: pk or name (case insensitive) -> pk.
+    Ambiguous names are not resolved.
+    """
+
+    def __init__(self, queryset, name_field="name"):
+        self.ids = set()
+        self.names = {}
+        for pk, name in queryset.values_list("pk", name_field).iterator():
+            self.ids.add(pk)
+            key = str(name).strip().lower()
+            self.names[key] = None if key in self.names else pk
+
+    def resolve(self, value):
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+            pk = int(value)
+            return pk if pk in self.ids else None
+        if isinstance(value, str):
+            return self.names.get(value.strip().lower())
+        return None
+
+
+class BaseImporter(abc.ABC):
+    """
+    Import for user: objects are owned by user, profile is checked
+    like in create actions. Subclasses build model objects from rows.
+    """
+
+    model = None
+    serializer_class = None
+
+    def __init__(self, user, batch_size=BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.lookups = self.get_lookups()
+
+    def get_lookups(self) -> dict:
+        return {"city": Lookup(City.objects.all())}
+
+    def validate_row(self, serializer, data) -> dict:
+        return serializer.run_validation(data)
+
+    @abc.abstractmethod
+    def save_batch(self, rows):
+        """Insert validated rows of batch with nested objects"""
+
+    def run(self, stream, fmt):
+        """Import rows from stream, yields report records"""
+        serializer = self.serializer_class(context={"lookups": self.lookups})
+        imported = failed = 0
+        for batch in get_batches(read_rows(stream, fmt), self.batch_size):
+            valid = []
+            for line_number, data, errors in batch:
+                if errors is None:
+                    try:
+                        valid.append(self.validate_row(serializer, data))
+                        continue
+                    except serializers.ValidationError as e:
+                        errors = e.detail
+                failed += 1
+                yield {"line": line_number, "errors": errors}
+            if valid:
+                with transaction.atomic():
+                    self.save_batch(valid)
+                imported += len(valid)
+        yield {"imported": imported, "failed": failed}
+
+
+class VacancyImporter(BaseImporter):
+    """
+    Vacancies of the user's employer profile,
+    superuser can set employer (id or name) per row
+    """
+
+    model = Vacancy
+    serializer_class = VacancyImportSerializer
+
+    def __init__(self, user, batch_size=BATCH_SIZE):
+        self.employer = Employer.objects.filter(owner=user).first()
+        if self.employer is None and not user.is_superuser:
+            raise serializers.ValidationError("No profile exists!")
+        super().__init__(user, batch_size)
+
+    def get_lookups(self) -> dict:
+        lookups = super().get_lookups()
+        lookups["employer"] = Lookup(Employer.objects.all())
+        return lookups
+
+    def validate_row(self, serializer, data) -> dict:
+        data = super().validate_row(serializer, data)
+        if not self.user.is_superuser or "employer" not in data:
+            data["employer"] = self.employer.pk if self.employer else None
+        if data["employer"] is None:
+            raise serializers.ValidationError({"employer": ["This field is required."]})
+        return data
+
+    def save_batch(self, rows):
+        vacancies = [
+            Vacancy(
+                owner=self.user,
+                updated_by=self.user,
+                employer_id=data.pop("employer"),
+                city_id=data.pop("city"),
+                **data,
+            )
+            for data in rows
+        ]
+        Vacancy.objects.bulk_create(vacancies)
+        update_search_index(Vacancy, [vacancy.pk for vacancy in vacancies])
+
+
+class CVImporter(BaseImporter):
+    """CVs of the user's employee profile with experience and education"""
+
+    model = CV
+    serializer_class = CVImportSerializer
+
+    def __init__(self, user, batch_size=BATCH_SIZE):
+        self.employee = Employee.objects.filter(owner=user).first()
+        if self.employee is None:
+            raise serializers.ValidationError("No profile exists!")
+        super().__init__(user, batch_size)
+
+    def save_batch(self, rows):
+        cvs = []
+        nested = []
+        for data in rows:
+            nested.append((data.pop("experience", []), data.pop("education", [])))
+            cvs.append(
+                CV(
+                    owner=self.user,
+                    updated_by=self.user,
+                    employee=self.employee,
+                    **data,
+                )
+            )
+        CV.objects.bulk_create(cvs)
+
+        experience = []
+        education = []
+        for cv, (experience_data, education_data) in zip(cvs, nested):
+            for item in experience_data:
+                experience.append(CVExperience(cv=cv, city_id=item.pop("city"), **item))
+            for item in education_data:
+                education.append(CVEducation(cv=cv, **item))
+        CVExperience.objects.bulk_create(experience)
+        CVEducation.objects.bulk_create(education)
+        update_search_index(CV, [cv.pk for cv in cvs])
+
+
+IMPORTERS = {
+    "vacancies": VacancyImporter,
+    "cvs": CVImporter,
+}
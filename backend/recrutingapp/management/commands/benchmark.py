@@ -0,0 +1,136 @@
+"""
+Endpoint benchmark (queries, latency, memory) against baseline file.
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recrutingapp.benchmark import DEFAULT_BUDGETS, EndpointBenchmark, compare
+
+MODES = ["check", "save"]
+
+BASELINE_VERSION = 1
+
+
+class Command(BaseCommand):
+    help = (
+        "This command using for benchmark of API GET endpoints for every role "
+        "and comparing with baseline (default) or saving baseline (-m save)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-m",
+            "--mode",
+            choices=MODES,
+            default=MODES[0],
+            dest="mode",
+            help="Compare with baseline or save new baseline",
+        )
+        parser.add_argument(
+            "--baseline",
+            default=str(settings.BASE_DIR / "benchmark_baseline.json"),
+            help="Baseline file",
+        )
+        parser.add_argument(
+            "--scales",
+            nargs="+",
+            type=int,
+            default=[1000, 10000],
+            help="Data scales (number of CVs)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Data seed")
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed requests per endpoint"
+        )
+        parser.add_argument(
+            "--query-budget",
+            type=int,
+            default=DEFAULT_BUDGETS["queries"],
+            help="Extra queries allowed",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=DEFAULT_BUDGETS["time_ratio"],
+            help="Allowed p95 latency ratio to baseline",
+        )
+        parser.add_argument(
+            "--memory-budget",
+            type=float,
+            default=DEFAULT_BUDGETS["memory_ratio"],
+            help="Allowed peak memory ratio to baseline",
+        )
+        parser.add_argument(
+            "--min-ms",
+            type=float,
+            default=DEFAULT_BUDGETS["min_ms"],
+            help="Latency increase below this is not a regression",
+        )
+
+    def handle(self, *args, **options):
+        from config.urls import router
+
+        baseline = None
+        if options["mode"] == MODES[0]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except FileNotFoundError:
+                raise CommandError(
+                    f"No baseline {options['baseline']}, run with -m save first"
+                )
+            if baseline.get("seed") != options["seed"]:
+                raise CommandError("Baseline was recorded with another seed")
+
+        start = time.perf_counter()
+        benchmark = EndpointBenchmark(
+            router,
+            repeat=options["repeat"],
+            seed=options["seed"],
+            log=self.stdout.write,
+        )
+        results = benchmark.run(options["scales"])
+        self.stdout.write(
+            f"{len(results)} measurements in {time.perf_counter() - start:.1f}s"
+        )
+
+        if options["mode"] == MODES[1]:
+            with open(options["baseline"], "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": BASELINE_VERSION,
+                        "seed": options["seed"],
+                        "repeat": options["repeat"],
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                    sort_keys=True,
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline saved: {options['baseline']}")
+            )
+            return
+
+        regressions = compare(
+            results,
+            baseline["results"],
+            {
+                "queries": options["query_budget"],
+                "time_ratio": options["time_budget"],
+                "memory_ratio": options["memory_budget"],
+                "min_ms": options["min_ms"],
+            },
+        )
+        missing = sorted(set(baseline["results"]) - set(results))
+        for key in missing:
+            self.stdout.write(self.style.WARNING(f"{key}: not measured"))
+        if regressions:
+            for message in regressions:
+                self.stdout.write(self.style.ERROR(message))
+            raise CommandError(f"{len(regressions)} regressions over budget")
+        self.stdout.write(self.style.SUCCESS("No regressions"))
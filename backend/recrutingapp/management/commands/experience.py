@@ -0,0 +1,45 @@
+"""
+Refresh of experience length of CVs with current jobs.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from recrutingapp.experience import update_current_experience
+
+MODES = ["once", "run"]
+
+# current jobs grow by months, daily refresh is enough
+INTERVAL = 24 * 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        "This command using for refreshing experience length of CVs with "
+        "current jobs once (default) or daily in loop (-m run)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-m",
+            "--mode",
+            choices=MODES,
+            default=MODES[0],
+            dest="mode",
+            help="Refresh mode",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=INTERVAL,
+            help="Seconds between refreshes (-m run)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = update_current_experience()
+            self.stdout.write(self.style.SUCCESS(f"cvs: {count} updated"))
+            if options["mode"] == MODES[0]:
+                return
+            time.sleep(options["interval"])
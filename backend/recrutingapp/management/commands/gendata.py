@@ -0,0 +1,55 @@
+"""
+Synthetic data for benchmarks (deterministic from seed).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recrutingapp.datagen import CHUNK_SIZE, DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "This command using for generation of users, profiles, CVs, vacancies, "
+        "responses, messages and favorites at given scale (--cvs)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cvs",
+            type=int,
+            default=10000,
+            help="Number of CVs, other volumes are derived from it",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per insert"
+        )
+        parser.add_argument(
+            "--password", default="password", help="Password of generated users"
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        generator = DataGenerator(
+            options["cvs"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            password=options["password"],
+            log=lambda message: self.stdout.write(
+                f"{time.perf_counter() - start:7.1f}s {message}"
+            ),
+        )
+        try:
+            with transaction.atomic():
+                counts = generator.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for table, count in counts.items():
+            self.stdout.write(f"{table}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Done in {time.perf_counter() - start:.1f}s")
+        )
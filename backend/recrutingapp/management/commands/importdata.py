@@ -0,0 +1,63 @@
+"""
+Bulk import of vacancies and CVs from JSONL/CSV file.
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from recrutingapp.importer import BATCH_SIZE, FORMATS, IMPORTERS, detect_format
+from userapp.models import CustomUser
+
+MODES = list(IMPORTERS)
+
+
+class Command(BaseCommand):
+    help = (
+        "This command using for bulk import of vacancies (default) "
+        "or CVs (-m cvs) owned by user, errors are printed as JSON lines"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL or CSV file")
+        parser.add_argument(
+            "-m",
+            "--mode",
+            choices=MODES,
+            default=MODES[0],
+            dest="mode",
+            help="Imported objects",
+        )
+        parser.add_argument(
+            "-u", "--user", required=True, help="Owner username (with profile)"
+        )
+        parser.add_argument(
+            "--format", choices=FORMATS, help="File format (default by extension)"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help="Rows per transaction"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(username=options["user"])
+            importer = IMPORTERS[options["mode"]](user, options["batch_size"])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"User {options['user']} not found")
+        except serializers.ValidationError as e:
+            raise CommandError(str(e.detail[0]))
+
+        fmt = options["format"] or detect_format(options["path"])
+        start = time.perf_counter()
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            for record in importer.run(stream, fmt):
+                if "line" in record:
+                    self.stdout.write(json.dumps(record, ensure_ascii=False))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{record['imported']} imported, {record['failed']} failed "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,162 @@
+"""
+Full-text search index maintenance and benchmark.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recrutingapp.models import CV, City, ConstDocumentStatus, Employee, Gender, Vacancy
+from recrutingapp.search import (
+    get_search_vector,
+    is_fulltext_supported,
+    search_queryset,
+    update_search_index_all,
+)
+from userapp.models import CustomUser, UserRoles
+
+MODES = ["reindex", "benchmark"]
+
+BENCHMARK_SIZES = [10000, 100000, 1000000]
+BENCHMARK_TERMS = ["python", "developer", "senior python"]
+BENCHMARK_WORDS = (
+    "python django postgresql developer engineer senior junior middle backend "
+    "frontend analyst manager sales accountant designer devops linux docker "
+    "teamlead support qa tester java golang react vue sql data scientist"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "This command using for rebuilding search data (default), "
+        "and comparing search latency with icontains filters (-m benchmark)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-m",
+            "--mode",
+            choices=MODES,
+            default=MODES[0],
+            dest="mode",
+            help="Rebuild index or run benchmark",
+        )
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=BENCHMARK_SIZES,
+            help="Benchmark: CV table sizes",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Benchmark: query repetitions per measurement",
+        )
+
+    def handle(self, *args, **options):
+        if options.get("mode") == MODES[0]:
+            for model in (CV, Vacancy):
+                count = update_search_index_all(model)
+                self.stdout.write(
+                    self.style.SUCCESS(f"{model._meta.verbose_name}: {count} indexed")
+                )
+
+        elif options.get("mode") == MODES[1]:
+            if not is_fulltext_supported():
+                self.stdout.write(
+                    self.style.WARNING(
+                        "Full-text search is PostgreSQL only, "
+                        "search path falls back to icontains"
+                    )
+                )
+            # all benchmark data is rolled back
+            with transaction.atomic():
+                self.benchmark(sorted(options["sizes"]), options["repeat"])
+                transaction.set_rollback(True)
+
+    def benchmark(self, sizes, repeat):
+        employee = self.get_benchmark_employee()
+        rnd = random.Random(0)
+        created = 0
+        for size in sizes:
+            if size > created:
+                self.create_cvs(employee, size - created, rnd)
+                created = size
+            for term in BENCHMARK_TERMS:
+                icontains_ms = self.measure(
+                    lambda: CV.objects.filter(description__icontains=term).order_by(
+                        "-updated_at"
+                    ),
+                    repeat,
+                )
+                search_ms = self.measure(
+                    lambda: search_queryset(CV.objects.all(), term), repeat
+                )
+                self.stdout.write(
+                    f"rows={size:<8} term={term!r:<16} "
+                    f"icontains={icontains_ms:9.2f}ms search={search_ms:9.2f}ms"
+                )
+
+    @staticmethod
+    def measure(get_queryset, repeat) -> float:
+        """Median time of first page and total count, ms"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset = get_queryset()
+            list(queryset[:10])
+            queryset.count()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    @staticmethod
+    def get_benchmark_employee() -> Employee:
+        gender = Gender.objects.first()
+        city = City.objects.first()
+        if not gender or not city:
+            raise CommandError("Master data required: load genders and cities")
+        user = CustomUser.objects.create_user(
+            username="searchbenchmark",
+            email="searchbenchmark@example.com",
+            role=UserRoles.employee.value,
+        )
+        return Employee.objects.create(
+            owner=user,
+            updated_by=user,
+            name="Benchmark",
+            birthday="1990-01-01",
+            gender=gender,
+            email=user.email,
+            city=city,
+        )
+
+    @staticmethod
+    def create_cvs(employee, count, rnd, batch_size=5000):
+        def text(words):
+            return " ".join(rnd.choice(BENCHMARK_WORDS) for _ in range(words))
+
+        user = employee.owner
+        for start in range(0, count, batch_size):
+            cvs = CV.objects.bulk_create(
+                CV(
+                    owner=user,
+                    updated_by=user,
+                    employee=employee,
+                    status_id=ConstDocumentStatus.approved,
+                    title=text(3),
+                    position=text(2),
+                    salary=rnd.randint(50, 500) * 1000,
+                    description=text(60),
+                    search_document=text(120),
+                )
+                for _ in range(min(batch_size, count - start))
+            )
+            if is_fulltext_supported():
+                CV.objects.filter(pk__in=[cv.pk for cv in cvs]).update(
+                    search_vector=get_search_vector(CV)
+                )
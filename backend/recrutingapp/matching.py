@@ -0,0 +1,429 @@
+"""
+Matching of approved CVs to vacancies and back.
+
+Approved documents are compiled once per process into a corpus of compact
+NumPy arrays: city/region ids, salary, experience months and skill/position
+token sets as COO pairs (row, token). One document is scored against the
+whole corpus with array operations only:
+
+- skills: share of vacancy skills covered by CV (employee skills),
+  vacancy skills are skill names found in vacancy text
+- location: same city 1, same region 0.5
+- salary: 1 when expected salary fits, decreasing with the overrun
+- position: cosine similarity of position word sets
+- experience: experience length up to EXPERIENCE_FULL_MONTHS (CVs only)
+
+Corpora are ProcessCaches (recrutingapp.processcache) invalidated by model
+signals (recrutingapp.signals) only when an approved document or data of
+its corpus row is changed (drafts, profiles without approved CVs and new
+skills don't rebuild them). TTL bounds staleness after bulk writes and for
+new skills found in vacancy texts. Invalidated corpus is rebuilt in
+background, requests use the previous one meanwhile.
+"""
+
+import numpy as np
+
+from recrutingapp.models import (
+    CV,
+    ConstDocumentStatus,
+    Employee,
+    Skill,
+    Vacancy,
+)
+from recrutingapp.search import WORD_RE
+from recrutingapp.processcache import ProcessCache
+
+CORPUS_TTL = 300
+
+EXPERIENCE_FULL_MONTHS = 60
+
+# longest skill name (in words) found in vacancy text
+SKILL_MAX_WORDS = 3
+
+# component weights for ranking CVs (candidates of vacancy)
+CANDIDATE_WEIGHTS = {
+    "skills": 0.35,
+    "location": 0.2,
+    "salary": 0.2,
+    "position": 0.15,
+    "experience": 0.1,
+}
+
+# component weights for ranking vacancies (matches of CV)
+VACANCY_WEIGHTS = {
+    "skills": 0.4,
+    "location": 0.2,
+    "salary": 0.25,
+    "position": 0.15,
+}
+
+
+def get_words(text) -> list:
+    return [word.lower() for word in WORD_RE.findall(text or "")]
+
+
+def get_skill_names() -> dict:
+    """Normalized skill name -> id"""
+    names = {}
+    for pk, name in Skill.objects.values_list("pk", "name").iterator():
+        key = " ".join(get_words(name))
+        if key:
+            names.setdefault(key, pk)
+    return names
+
+
+def find_skills(text, skill_names) -> set:
+    """Ids of skills named in text (word n-grams)"""
+    words = get_words(text)
+    found = set()
+    for size in range(1, SKILL_MAX_WORDS + 1):
+        for start in range(len(words) - size + 1):
+            pk = skill_names.get(" ".join(words[start : start + size]))
+            if pk is not None:
+                found.add(pk)
+    return found
+
+
+def make_pairs(token_sets):
+    """COO arrays (rows, tokens) and row sizes for list of token sets"""
+    sizes = np.fromiter((len(tokens) for tokens in token_sets), dtype=np.int32)
+    rows = np.repeat(np.arange(len(token_sets), dtype=np.int32), sizes)
+    tokens = np.fromiter(
+        (token for tokens in token_sets for token in tokens),
+        dtype=np.int32,
+        count=int(sizes.sum()),
+    )
+    return rows, tokens, sizes
+
+
+class MatchDocument:
+    """Features of one document: scored against corpus"""
+
+    def __init__(self, pk, city, region, salary, skills, words, experience=0):
+        self.pk = pk
+        self.city = city
+        self.region = region
+        self.salary = float(salary or 0)
+        self.skills = set(skills)
+        self.words = set(words)
+        self.experience = experience
+
+
+class MatchCorpus:
+    """Compiled features of approved documents of one model"""
+
+    def __init__(self, model, documents, skill_names=None):
+        self.model = model
+        # skill names found in vacancy texts, built with the corpus
+        self.skill_names = {} if skill_names is None else skill_names
+        self.ids = np.array([doc.pk for doc in documents], dtype=np.int64)
+        self.city = np.array([doc.city or 0 for doc in documents], dtype=np.int32)
+        self.region = np.array([doc.region or 0 for doc in documents], dtype=np.int32)
+        self.salary = np.array([doc.salary for doc in documents], dtype=np.float32)
+        self.experience = np.array(
+            [doc.experience for doc in documents], dtype=np.float32
+        )
+
+        self.skill_rows, self.skill_ids, self.skill_count = make_pairs(
+            [doc.skills for doc in documents]
+        )
+        self.skill_size = int(self.skill_ids.max()) + 1 if len(self.skill_ids) else 1
+
+        # position words are numbered by corpus vocabulary
+        self.vocabulary = {}
+        word_sets = [
+            {
+                self.vocabulary.setdefault(word, len(self.vocabulary))
+                for word in doc.words
+            }
+            for doc in documents
+        ]
+        self.word_rows, self.word_ids, self.word_count = make_pairs(word_sets)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, pk):
+        # ids are sorted by pk
+        position = np.searchsorted(self.ids, pk)
+        return position < len(self.ids) and self.ids[position] == pk
+
+    def count_common(self, rows, ids, size, query_ids):
+        """Number of query ids in each corpus row"""
+        mask = np.zeros(size, dtype=np.bool_)
+        query_ids = [pk for pk in query_ids if pk < size]
+        if not query_ids:
+            return np.zeros(len(self), dtype=np.float32)
+        mask[query_ids] = True
+        return np.bincount(rows, weights=mask[ids], minlength=len(self)).astype(
+            np.float32
+        )
+
+    def score(self, doc, weights) -> dict:
+        """Component scores (arrays in 0..1) of all corpus documents for doc"""
+        scores = {}
+
+        common = self.count_common(
+            self.skill_rows, self.skill_ids, self.skill_size, doc.skills
+        )
+        if self.model is CV:
+            # vacancy skills covered by CV
+            scores["skills"] = common / max(len(doc.skills), 1)
+        else:
+            scores["skills"] = np.divide(
+                common,
+                self.skill_count,
+                out=np.zeros(len(self), dtype=np.float32),
+                where=self.skill_count > 0,
+            )
+
+        same_city = self.city == (doc.city or -1)
+        same_region = self.region == (doc.region or -1)
+        scores["location"] = np.where(
+            same_city, 1.0, np.where(same_region, 0.5, 0.0)
+        ).astype(np.float32)
+
+        if self.model is CV:
+            expected, offered = self.salary, np.float32(doc.salary)
+        else:
+            expected, offered = np.float32(doc.salary), self.salary
+        overrun = np.divide(
+            expected - offered,
+            offered,
+            out=np.ones(len(self), dtype=np.float32),
+            where=offered > 0,
+        )
+        scores["salary"] = np.where(
+            expected <= offered, 1.0, np.clip(1.0 - overrun, 0.0, 1.0)
+        ).astype(np.float32)
+
+        query_words = [
+            self.vocabulary[word] for word in doc.words if word in self.vocabulary
+        ]
+        common = self.count_common(
+            self.word_rows, self.word_ids, len(self.vocabulary), query_words
+        )
+        norm = np.sqrt(self.word_count * np.float32(max(len(doc.words), 1)))
+        scores["position"] = np.divide(
+            common, norm, out=np.zeros(len(self), dtype=np.float32), where=norm > 0
+        )
+
+        if "experience" in weights:
+            scores["experience"] = np.minimum(
+                self.experience / EXPERIENCE_FULL_MONTHS, 1.0
+            )
+        return scores
+
+    def rank(self, doc, weights, limit=20) -> list:
+        """Best documents for doc: (id, score, component scores) by score"""
+        if not len(self):
+            return []
+        scores = self.score(doc, weights)
+        total = np.zeros(len(self), dtype=np.float32)
+        for name, weight in weights.items():
+            total += np.float32(weight) * scores[name]
+
+        limit = min(limit, len(self))
+        top = np.argpartition(-total, limit - 1)[:limit]
+        top = top[np.lexsort((self.ids[top], -total[top]))]
+        return [
+            (
+                int(self.ids[i]),
+                round(float(total[i]), 4),
+                {name: round(float(scores[name][i]), 4) for name in weights},
+            )
+            for i in top
+        ]
+
+
+def get_cv_document(cv) -> MatchDocument:
+    employee = cv.employee
+    return MatchDocument(
+        cv.pk,
+        employee.city_id,
+        employee.city.region_id,
+        cv.salary,
+        employee.skills.values_list("pk", flat=True),
+        get_words(cv.position),
+        cv.experience_months,
+    )
+
+
+def get_vacancy_document(vacancy, skill_names=None) -> MatchDocument:
+    if skill_names is None:
+        skill_names = get_skill_names()
+    text = " ".join((vacancy.title, vacancy.position, vacancy.description))
+    return MatchDocument(
+        vacancy.pk,
+        vacancy.city_id,
+        vacancy.city.region_id,
+        vacancy.salary,
+        find_skills(text, skill_names),
+        get_words(vacancy.position),
+    )
+
+
+def build_cv_corpus() -> MatchCorpus:
+    skill_names = get_skill_names()
+    cvs = list(
+        CV.objects.filter(status=ConstDocumentStatus.approved)
+        .order_by("pk")
+        .values_list(
+            "pk",
+            "employee_id",
+            "employee__city_id",
+            "employee__city__region_id",
+            "salary",
+            "position",
+            "experience_months",
+        )
+    )
+    employee_ids = {row[1] for row in cvs}
+    employee_skills = {}
+    for employee_id, skill_id in (
+        Employee.skills.through.objects.filter(employee_id__in=employee_ids)
+        .values_list("employee_id", "skill_id")
+        .iterator()
+    ):
+        employee_skills.setdefault(employee_id, []).append(skill_id)
+    return MatchCorpus(
+        CV,
+        [
+            MatchDocument(
+                pk,
+                city,
+                region,
+                salary,
+                employee_skills.get(employee_id, ()),
+                get_words(position),
+                experience,
+            )
+            for pk, employee_id, city, region, salary, position, experience in cvs
+        ],
+        skill_names,
+    )
+
+
+def build_vacancy_corpus() -> MatchCorpus:
+    skill_names = get_skill_names()
+    vacancies = (
+        Vacancy.objects.filter(status=ConstDocumentStatus.approved)
+        .order_by("pk")
+        .values_list(
+            "pk",
+            "city_id",
+            "city__region_id",
+            "salary",
+            "title",
+            "position",
+            "description",
+        )
+    )
+    return MatchCorpus(
+        Vacancy,
+        [
+            MatchDocument(
+                pk,
+                city,
+                region,
+                salary,
+                find_skills(" ".join((title, position, description)), skill_names),
+                get_words(position),
+            )
+            for pk, city, region, salary, title, position, description in vacancies.iterator()
+        ],
+        skill_names,
+    )
+
+
+CORPORA = {
+    CV: ProcessCache(build_cv_corpus, CORPUS_TTL),
+    Vacancy: ProcessCache(build_vacancy_corpus, CORPUS_TTL),
+}
+
+
+def get_corpus(model) -> MatchCorpus:
+    return CORPORA[model].get()
+
+
+def invalidate_corpus(**kwargs):
+    """Signal receiver (any signature)"""
+    for corpus in CORPORA.values():
+        corpus.invalidate()
+
+
+def is_matched(model, pk) -> bool:
+    """Document is in built corpus"""
+    corpus = CORPORA[model].peek()
+    return corpus is not None and pk in corpus
+
+
+def has_approved_cvs(employee_ids) -> bool:
+    return CV.objects.filter(
+        employee__in=employee_ids, status=ConstDocumentStatus.approved
+    ).exists()
+
+
+def document_saved(sender, instance, **kwargs):
+    """Signal receiver: saved or deleted CV or Vacancy"""
+    if instance.status_id == ConstDocumentStatus.approved or is_matched(
+        sender, instance.pk
+    ):
+        CORPORA[sender].invalidate()
+
+
+def documents_transitioned(sender, transitions, **kwargs):
+    """Signal receiver: CVs or vacancies moved by workflow"""
+    approved = ConstDocumentStatus.approved
+    if any(approved in (t.source_id, t.target_id) for t in transitions):
+        CORPORA[sender].invalidate()
+
+
+def experience_saved(sender, instance, **kwargs):
+    """Signal receiver: saved or deleted CVExperience (experience months)"""
+    if is_matched(CV, instance.cv_id):
+        CORPORA[CV].invalidate()
+
+
+def employee_saved(sender, instance, **kwargs):
+    """Signal receiver: saved Employee (city of CVs)"""
+    if has_approved_cvs([instance.pk]):
+        CORPORA[CV].invalidate()
+
+
+def employee_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Signal receiver: m2m_changed of Employee.skills"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse and pk_set is None:
+        # skill.skills.clear()
+        CORPORA[CV].invalidate()
+    elif has_approved_cvs(pk_set if reverse else [instance.pk]):
+        CORPORA[CV].invalidate()
+
+
+def skill_saved(sender, instance, created=False, **kwargs):
+    """
+    Signal receiver: saved or deleted Skill. New skills are in no CV row
+    till they are added to employees, vacancy texts get them with TTL
+    """
+    if not created:
+        invalidate_corpus()
+
+
+def clear_corpus():
+    """Drop built corpora, the next request builds them again"""
+    for corpus in CORPORA.values():
+        corpus.clear()
+
+
+def get_candidates(vacancy, limit=20) -> list:
+    """Best approved CVs for vacancy"""
+    corpus = get_corpus(CV)
+    document = get_vacancy_document(vacancy, corpus.skill_names)
+    return corpus.rank(document, CANDIDATE_WEIGHTS, limit)
+
+
+def get_matches(cv, limit=20) -> list:
+    """Best approved vacancies for CV"""
+    return get_corpus(Vacancy).rank(get_cv_document(cv), VACANCY_WEIGHTS, limit)
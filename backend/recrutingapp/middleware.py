@@ -0,0 +1,129 @@
+"""
+Request instrumentation: query count, SQL time, view and render time.
+
+Sampled requests get Server-Timing header and a log record
+(logger "recrutingapp.instrumentation") tagged with viewset and action.
+Settings (INSTRUMENTATION dict): SAMPLE_RATE (0..1), SERVER_TIMING (bool).
+"""
+
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("recrutingapp.instrumentation")
+
+DEFAULT_SETTINGS = {
+    "SAMPLE_RATE": 1.0,
+    "SERVER_TIMING": True,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "INSTRUMENTATION", {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_view_name(view_func, method) -> str:
+    """'CVViewSet.list' for viewsets, class or function name otherwise"""
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    if view_class is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method.lower(), method.lower())}"
+
+
+class RequestMetrics:
+    """Timings of one request, ms"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_name = ""
+        self.view_started = None
+        self.render_started = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.view_sql_time = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.sql_time += duration
+            if self.view_started is not None and self.render_started is None:
+                self.view_sql_time += duration
+
+    def get_values(self) -> dict:
+        finished = time.perf_counter()
+        render_started = self.render_started or finished
+        view_time = (
+            render_started - self.view_started if self.view_started is not None else 0
+        )
+        return {
+            "view": self.view_name,
+            "queries": self.queries,
+            "db_ms": round(self.sql_time * 1000, 2),
+            # view code outside SQL: serialization, permissions, etc.
+            "serialize_ms": round(max(view_time - self.view_sql_time, 0) * 1000, 2),
+            "render_ms": round((finished - render_started) * 1000, 2),
+            "total_ms": round((finished - self.started) * 1000, 2),
+        }
+
+
+class InstrumentationMiddleware:
+    """
+    Middleware measuring requests (sampled).
+    Should be the first one to cover the whole request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= get_setting("SAMPLE_RATE"):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.execute_wrapper))
+            response = self.get_response(request)
+
+        values = metrics.get_values()
+        if get_setting("SERVER_TIMING"):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={values["db_ms"]};desc="{values["queries"]} queries"',
+                    f'serialize;dur={values["serialize_ms"]}',
+                    f'render;dur={values["render_ms"]}',
+                    f'total;dur={values["total_ms"]}',
+                ]
+            )
+        logger.info(
+            "%s %s",
+            request.method,
+            request.path,
+            extra=dict(values, method=request.method, status=response.status_code),
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.view_name = get_view_name(view_func, request.method)
+            metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # called just before rendering of DRF (and template) responses
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+        return response
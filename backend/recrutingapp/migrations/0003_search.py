@@ -0,0 +1,121 @@
+# Generated by Django 4.1 on 2026-10-18 10:04
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+SEARCH_TABLES = ("recrutingapp_cv", "recrutingapp_vacancy")
+
+BATCH_SIZE = 10000
+
+# model name -> field name -> weight, as in recrutingapp.search at this state
+SEARCH_FIELDS = {
+    "CV": {
+        "title": "A",
+        "position": "A",
+        "description": "B",
+        "search_document": "C",
+    },
+    "Vacancy": {
+        "title": "A",
+        "position": "A",
+        "description": "B",
+    },
+}
+
+
+def fill_cv_documents(apps, ids):
+    """search_document of CVs from their experience and education"""
+    CV = apps.get_model("recrutingapp", "CV")
+    CVExperience = apps.get_model("recrutingapp", "CVExperience")
+    CVEducation = apps.get_model("recrutingapp", "CVEducation")
+    documents = {}
+    experience = CVExperience.objects.filter(cv_id__in=ids).values_list(
+        "cv_id", "company", "position", "content"
+    )
+    education = CVEducation.objects.filter(cv_id__in=ids).values_list(
+        "cv_id", "institution", "specialty", "content"
+    )
+    for items in (experience, education):
+        for cv_id, *texts in items:
+            documents.setdefault(cv_id, []).extend(texts)
+    CV.objects.bulk_update(
+        [
+            CV(id=cv_id, search_document="\n".join(texts))
+            for cv_id, texts in documents.items()
+        ],
+        ["search_document"],
+        batch_size=1000,
+    )
+
+
+def fill_search_data(apps, schema_editor):
+    """Search data of existing CVs and vacancies, in batches by id"""
+    is_postgresql = schema_editor.connection.vendor == "postgresql"
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("recrutingapp", model_name)
+        vector = None
+        for field_name, weight in fields.items():
+            field_vector = SearchVector(field_name, weight=weight, config="simple")
+            vector = field_vector if vector is None else vector + field_vector
+        ids = model.objects.order_by("pk").values_list("pk", flat=True)
+        batch = list(ids[:BATCH_SIZE])
+        while batch:
+            if model_name == "CV":
+                fill_cv_documents(apps, batch)
+            if is_postgresql:
+                model.objects.filter(pk__gte=batch[0], pk__lte=batch[-1]).update(
+                    search_vector=vector
+                )
+            batch = list(ids.filter(pk__gt=batch[-1])[:BATCH_SIZE])
+
+
+def create_search_indexes(apps, schema_editor):
+    """GIN indexes are PostgreSQL only, other backends use plain text lookups"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(
+            f"CREATE INDEX {table}_search_gin ON {table} USING gin (search_vector)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "recrutingapp",
+            "0002_city_cv_documentstatus_employer_gender_region_skill_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cv",
+            name="search_document",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="cv",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="vacancy",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(fill_search_data, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
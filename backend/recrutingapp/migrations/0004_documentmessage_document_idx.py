@@ -0,0 +1,20 @@
+# Generated by Django 4.1 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recrutingapp", "0003_search"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="documentmessage",
+            index=models.Index(
+                fields=["content_type", "object_id", "created_at"],
+                name="docmessage_document_idx",
+            ),
+        ),
+    ]
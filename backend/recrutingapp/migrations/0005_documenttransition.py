@@ -0,0 +1,82 @@
+# Generated by Django 4.1 on 2026-10-18 10:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("recrutingapp", "0004_documentmessage_document_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentTransition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "info",
+                    models.CharField(
+                        default="", help_text="Status info", max_length=150
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        help_text="Status before transition",
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="recrutingapp.documentstatus",
+                    ),
+                ),
+                (
+                    "target",
+                    models.ForeignKey(
+                        help_text="Status after transition",
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="recrutingapp.documentstatus",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "transition",
+                "verbose_name_plural": "transitions",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="documenttransition",
+            index=models.Index(
+                fields=["content_type", "object_id", "created_at"],
+                name="doctransition_document_idx",
+            ),
+        ),
+    ]
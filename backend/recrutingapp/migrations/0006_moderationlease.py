@@ -0,0 +1,63 @@
+# Generated by Django 4.1 on 2026-10-18 10:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("recrutingapp", "0005_documenttransition"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModerationLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField(help_text="Lease expiry")),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "moderator",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "moderation lease",
+                "verbose_name_plural": "moderation leases",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="moderationlease",
+            index=models.Index(fields=["expires_at"], name="modlease_expires_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="moderationlease",
+            constraint=models.UniqueConstraint(
+                fields=("content_type", "object_id"),
+                name="unique_lease_content_type_object_id",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1 on 2026-10-18 11:00
+
+import datetime
+
+from django.db import migrations, models
+
+
+def fill_experience_months(apps, schema_editor):
+    CV = apps.get_model("recrutingapp", "CV")
+    CVExperience = apps.get_model("recrutingapp", "CVExperience")
+    today = datetime.date.today()
+    months = {}
+    items = CVExperience.objects.values_list(
+        "cv_id", "datefrom", "dateto", "is_current"
+    )
+    for cv_id, datefrom, dateto, is_current in items.iterator():
+        end = today if is_current or dateto is None else dateto
+        length = (end.year - datefrom.year) * 12 + end.month - datefrom.month
+        months[cv_id] = months.get(cv_id, 0) + max(length, 0)
+    CV.objects.bulk_update(
+        [CV(id=cv_id, experience_months=value) for cv_id, value in months.items()],
+        ["experience_months"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recrutingapp", "0006_moderationlease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cv",
+            name="experience_months",
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="employee",
+            name="birthday",
+            field=models.DateField(db_index=True),
+        ),
+        migrations.RunPython(fill_experience_months, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.1 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recrutingapp", "0007_experience_months"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="city",
+            name="latitude",
+            field=models.FloatField(blank=True, help_text="Latitude", null=True),
+        ),
+        migrations.AddField(
+            model_name="city",
+            name="longitude",
+            field=models.FloatField(blank=True, help_text="Longitude", null=True),
+        ),
+    ]
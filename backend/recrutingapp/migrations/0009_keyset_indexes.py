@@ -0,0 +1,29 @@
+# Generated by Django 4.1 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recrutingapp", "0008_city_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cv",
+            index=models.Index(fields=["updated_at", "id"], name="cv_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="employer",
+            index=models.Index(fields=["updated_at", "id"], name="employer_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="newspost",
+            index=models.Index(fields=["created_at", "id"], name="newspost_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vacancy",
+            index=models.Index(fields=["updated_at", "id"], name="vacancy_keyset_idx"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1 on 2026-10-18 14:20
+
+from django.db import migrations
+
+# coordinates of cities of master data fixtures (recrutingapp/fixtures/cities.json)
+CITY_COORDINATES = {
+    "Москва": (55.7558, 37.6173),
+    "Химки": (55.897, 37.4297),
+    "Санкт-Петербург": (59.9386, 30.3141),
+    "Воронеж": (51.6608, 39.2003),
+}
+
+
+def fill_city_coordinates(apps, schema_editor):
+    """Coordinates of existing cities, other ones are left without them"""
+    City = apps.get_model("recrutingapp", "City")
+    for name, (latitude, longitude) in CITY_COORDINATES.items():
+        City.objects.filter(name=name, latitude__isnull=True).update(
+            latitude=latitude, longitude=longitude
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recrutingapp", "0009_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_city_coordinates, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,7 @@ from django.utils.translation import gettext_lazy as _
 
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVectorField
 
 from userapp.models import CustomUser
 
@@ -102,6 +103,78 @@ class DocumentMessage(models.Model):
     class Meta:
         verbose_name = _("message")
         verbose_name_plural = _("messages")
+        indexes = [
+            # message history of document
+            models.Index(
+                fields=["content_type", "object_id", "created_at"],
+                name="docmessage_document_idx",
+            )
+        ]
+
+
+class DocumentTransition(models.Model):
+    """
+    Generic log of document status transitions (recrutingapp.workflow)
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    source = models.ForeignKey(
+        DocumentStatus,
+        related_name="+",
+        help_text=_("Status before transition"),
+        on_delete=models.PROTECT,
+    )
+    target = models.ForeignKey(
+        DocumentStatus,
+        related_name="+",
+        help_text=_("Status after transition"),
+        on_delete=models.PROTECT,
+    )
+    info = models.CharField(max_length=150, help_text=_("Status info"), default="")
+    actor = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("transition")
+        verbose_name_plural = _("transitions")
+        indexes = [
+            # transition history of document
+            models.Index(
+                fields=["content_type", "object_id", "created_at"],
+                name="doctransition_document_idx",
+            )
+        ]
+
+
+class ModerationLease(models.Model):
+    """
+    Document on moderation taken by moderator till lease expiry
+    (recrutingapp.moderation)
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    moderator = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(help_text=_("Lease expiry"))
+
+    class Meta:
+        verbose_name = _("moderation lease")
+        verbose_name_plural = _("moderation leases")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"],
+                name="unique_lease_content_type_object_id",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="modlease_expires_idx"),
+        ]
 
 
 class DocMessagesMixin(models.Model):
@@ -148,6 +221,17 @@ class OwnedMixin(models.Model):
         abstract = True
 
 
+class SearchableMixin(models.Model):
+    """
+    Mix-in for full-text search vector (maintained by recrutingapp.search)
+    """
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+
 class Region(models.Model):
     """
     Geographic region for city
@@ -172,7 +256,7 @@ class Region(models.Model):
 
 class City(models.Model):
     """
-    City master data (name and region)
+    City master data (name, region and coordinates)
     """
 
     name = models.CharField(
@@ -190,6 +274,10 @@ class City(models.Model):
         on_delete=models.PROTECT,
     )
 
+    # WGS 84 degrees, for radius search
+    latitude = models.FloatField(null=True, blank=True, help_text=_("Latitude"))
+    longitude = models.FloatField(null=True, blank=True, help_text=_("Longitude"))
+
     @property
     def fullname(self) -> str:
         return ", ".join([self.name, " ,", str(self.region)])
@@ -299,6 +387,10 @@ class NewsPost(LoggingMixin, models.Model):
     class Meta:
         verbose_name = _("newspost")
         verbose_name_plural = _("newsposts")
+        indexes = [
+            # keyset pagination (recrutingapp.pagination)
+            models.Index(fields=["created_at", "id"], name="newspost_keyset_idx"),
+        ]
 
 
 class Employee(LoggingMixin, models.Model):
@@ -315,7 +407,8 @@ class Employee(LoggingMixin, models.Model):
     )
 
     name = models.CharField(_("Name"), max_length=100)
-    birthday = models.DateField()
+    # indexed for age filters (birthday ranges)
+    birthday = models.DateField(db_index=True)
     gender = models.ForeignKey(
         Gender,
         on_delete=models.PROTECT,
@@ -392,9 +485,13 @@ class Employer(OwnedMixin, LoggingMixin, DocStatusMixin, models.Model):
     class Meta:
         verbose_name = _("employer")
         verbose_name_plural = _("employers")
+        indexes = [
+            # keyset pagination (recrutingapp.pagination)
+            models.Index(fields=["updated_at", "id"], name="employer_keyset_idx"),
+        ]
 
 
-class CV(OwnedMixin, LoggingMixin, DocStatusMixin, models.Model):
+class CV(OwnedMixin, LoggingMixin, DocStatusMixin, SearchableMixin, models.Model):
     """
     Employee CV
     """
@@ -419,9 +516,20 @@ class CV(OwnedMixin, LoggingMixin, DocStatusMixin, models.Model):
 
     description = models.TextField()
 
+    # experience and education content, denormalized for search
+    search_document = models.TextField(default="", editable=False)
+    # total length of experience items, denormalized for filters
+    experience_months = models.PositiveIntegerField(
+        default=0, editable=False, db_index=True
+    )
+
     class Meta:
         verbose_name = _("cv")
         verbose_name_plural = _("cvs")
+        indexes = [
+            # keyset pagination (recrutingapp.pagination)
+            models.Index(fields=["updated_at", "id"], name="cv_keyset_idx"),
+        ]
 
 
 class CVExperience(models.Model):
@@ -483,7 +591,7 @@ class CVEducation(models.Model):
         verbose_name_plural = _("education")
 
 
-class Vacancy(OwnedMixin, LoggingMixin, DocStatusMixin, models.Model):
+class Vacancy(OwnedMixin, LoggingMixin, DocStatusMixin, SearchableMixin, models.Model):
     """
     Employer's vacancy
     """
@@ -515,6 +623,10 @@ class Vacancy(OwnedMixin, LoggingMixin, DocStatusMixin, models.Model):
     class Meta:
         verbose_name = _("vacancy")
         verbose_name_plural = _("vacancies")
+        indexes = [
+            # keyset pagination (recrutingapp.pagination)
+            models.Index(fields=["updated_at", "id"], name="vacancy_keyset_idx"),
+        ]
 
 
 class CVResponse(
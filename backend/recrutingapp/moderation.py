@@ -0,0 +1,142 @@
+"""
+Moderation queue of pending documents (employers, CVs, vacancies).
+
+Moderators take batches of the oldest pending documents as leases
+(ModerationLease) for LEASE_SECONDS. Documents are picked with
+SELECT ... FOR UPDATE SKIP LOCKED, so moderators taking batches at the same
+time get different documents without waiting, and leased documents are
+skipped till lease expiry. Decisions on leased documents are applied by
+workflow (recrutingapp.workflow) in one transaction, one UPDATE per
+document type and decision. Leases are released by document_transitioned
+signal (recrutingapp.signals).
+"""
+
+import datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recrutingapp.models import (
+    CV,
+    ConstDocumentStatus,
+    Employer,
+    ModerationLease,
+    Vacancy,
+)
+from recrutingapp.workflow import move_documents
+
+# type in queue -> model
+QUEUE_MODELS = {model._meta.model_name: model for model in (Employer, CV, Vacancy)}
+
+BATCH_SIZE = 20
+MAX_BATCH_SIZE = 100
+# decisions per request
+MAX_DECISIONS = 500
+LEASE_SECONDS = 600
+
+DECISION_STATUSES = (ConstDocumentStatus.approved, ConstDocumentStatus.rejected)
+
+
+def get_queue_type(content_type_id) -> str:
+    return ContentType.objects.get_for_id(content_type_id).model
+
+
+def get_pending(model, free):
+    """(updated_at, content type id, pk) of unleased pending documents"""
+    content_type = ContentType.objects.get_for_model(model)
+    queryset = (
+        model.objects.filter(status=ConstDocumentStatus.pending)
+        .exclude(
+            pk__in=ModerationLease.objects.filter(content_type=content_type).values(
+                "object_id"
+            )
+        )
+        .order_by("updated_at", "pk")
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        # documents picked by other moderators right now are skipped
+        queryset = queryset.select_for_update(skip_locked=True)
+    return [
+        (updated_at, content_type.pk, pk)
+        for pk, updated_at in queryset.values_list("pk", "updated_at")[:free]
+    ]
+
+
+def take_batch(moderator, size=BATCH_SIZE) -> list:
+    """
+    Leases of moderator: not decided documents of previous batch (lease is
+    extended) and the oldest pending documents up to batch size
+    """
+    now = timezone.now()
+    expires_at = now + datetime.timedelta(seconds=LEASE_SECONDS)
+    leases = ModerationLease.objects.filter(moderator=moderator)
+    with transaction.atomic():
+        ModerationLease.objects.filter(expires_at__lte=now).delete()
+        free = size - leases.update(expires_at=expires_at)
+        if free > 0:
+            pending = sorted(
+                document
+                for model in QUEUE_MODELS.values()
+                for document in get_pending(model, free)
+            )[:free]
+            # unique lease of document, taken by other moderator is skipped
+            ModerationLease.objects.bulk_create(
+                (
+                    ModerationLease(
+                        content_type_id=content_type_id,
+                        object_id=pk,
+                        moderator=moderator,
+                        expires_at=expires_at,
+                    )
+                    for _, content_type_id, pk in pending
+                ),
+                ignore_conflicts=True,
+            )
+        return list(leases.order_by("created_at", "pk"))
+
+
+def apply_decisions(moderator, decisions) -> dict:
+    """
+    Decisions (type, id, status, info) on documents leased by moderator,
+    keys of moved and skipped documents
+    """
+    groups = {}
+    for decision in decisions:
+        key = (decision["type"], decision["status"], decision["info"])
+        groups.setdefault(key, []).append(decision["id"])
+
+    moved = []
+    with transaction.atomic():
+        for (queue_type, target, info), ids in groups.items():
+            model = QUEUE_MODELS[queue_type]
+            leased = ModerationLease.objects.filter(
+                moderator=moderator,
+                content_type=ContentType.objects.get_for_model(model),
+                expires_at__gt=timezone.now(),
+            ).values("object_id")
+            transitions = move_documents(
+                model.objects.filter(pk__in=ids).filter(pk__in=leased),
+                target,
+                moderator,
+                info,
+            )
+            moved += [(queue_type, t.object_id) for t in transitions]
+
+    moved_keys = set(moved)
+    skipped = [
+        (decision["type"], decision["id"])
+        for decision in decisions
+        if (decision["type"], decision["id"]) not in moved_keys
+    ]
+    return {"moved": moved, "skipped": skipped}
+
+
+def release_leases(sender, transitions, **kwargs):
+    """Signal receiver: documents moved by workflow leave the queue"""
+    if not transitions:
+        return
+    ModerationLease.objects.filter(
+        content_type_id=transitions[0].content_type_id,
+        object_id__in=[transition.object_id for transition in transitions],
+    ).delete()
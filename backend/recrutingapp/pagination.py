@@ -0,0 +1,188 @@
+"""
+Pagination for document listings
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_MODE_OFFSET = "offset"
+PAGINATION_MODE_CURSOR = "cursor"
+
+
+class KeysetPagination(pagination.LimitOffsetPagination):
+    """
+    Limit/offset pagination (default, kept for old clients) or
+    keyset pagination by opaque cursor (?pagination=cursor or ?cursor=...).
+
+    Keyset mode orders by (-ordering_field, -id) and filters by the last
+    seen key instead of OFFSET, so every page costs the same, no COUNT(*)
+    is made and pages stay stable while documents are edited.
+    Ranked querysets (search or skill rank ordering) have no keyset, cursor
+    for them is rejected with 400, they are paginated by offset.
+    The response 'pagination' field tells which mode was used.
+    """
+
+    ordering_field = "updated_at"
+    mode_query_param = "pagination"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+    ranked_cursor_message = "Ranked results are paginated by offset only."
+
+    def get_mode(self, request) -> str:
+        if self.cursor_query_param in request.query_params:
+            return PAGINATION_MODE_CURSOR
+        if request.query_params.get(self.mode_query_param) == PAGINATION_MODE_CURSOR:
+            return PAGINATION_MODE_CURSOR
+        return PAGINATION_MODE_OFFSET
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.mode = self.get_mode(request)
+        if self.mode == PAGINATION_MODE_OFFSET:
+            return super().paginate_queryset(queryset, request, view)
+
+        if self.is_ranked(queryset):
+            raise ValidationError({self.mode_query_param: [self.ranked_cursor_message]})
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+        self.cursor = self.decode_cursor(request)
+
+        field = self.ordering_field
+        if self.cursor is None:
+            queryset = queryset.order_by(f"-{field}", "-id")
+        else:
+            value, pk, reverse = self.cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": pk})
+                ).order_by(field, "id")
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{field}__lt": value}) | Q(**{field: value, "id__lt": pk})
+                ).order_by(f"-{field}", "-id")
+
+        page = list(queryset[: self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[: self.limit]
+        is_reverse = self.cursor is not None and self.cursor[2]
+        if is_reverse:
+            page.reverse()
+
+        self.has_next = bool(page) and (has_more if not is_reverse else True)
+        self.has_previous = bool(page) and (
+            has_more if is_reverse else self.cursor is not None
+        )
+        self.first_key = self.get_key(page[0]) if page else None
+        self.last_key = self.get_key(page[-1]) if page else None
+        return page
+
+    def is_ranked(self, queryset) -> bool:
+        """Queryset is ordered by something else than the keyset"""
+        ordering = queryset.query.order_by
+        if not ordering:
+            return False
+        first = ordering[0]
+        return not isinstance(first, str) or first.lstrip("-") != self.ordering_field
+
+    def get_key(self, obj) -> tuple:
+        return getattr(obj, self.ordering_field), obj.pk
+
+    def encode_cursor(self, key, reverse=False) -> str:
+        value, pk = key
+        data = json.dumps([value.isoformat(), pk, int(reverse)])
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8")
+            value, pk, reverse = json.loads(data)
+            value = parse_datetime(value)
+            if value is None:
+                raise ValueError
+            return value, int(pk), bool(reverse)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_link(self, key, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(key, reverse)
+        )
+
+    def get_next_link(self):
+        if self.mode == PAGINATION_MODE_OFFSET:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.get_cursor_link(self.last_key, reverse=False)
+
+    def get_previous_link(self):
+        if self.mode == PAGINATION_MODE_OFFSET:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self.get_cursor_link(self.first_key, reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.mode == PAGINATION_MODE_OFFSET:
+            response = super().get_paginated_response(data)
+            response.data["pagination"] = self.mode
+            response.data.move_to_end("pagination", last=False)
+            return response
+        return Response(
+            OrderedDict(
+                [
+                    ("pagination", self.mode),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["pagination"] = {
+            "type": "string",
+            "enum": [PAGINATION_MODE_OFFSET, PAGINATION_MODE_CURSOR],
+            "example": PAGINATION_MODE_OFFSET,
+        }
+        response_schema["properties"]["count"]["description"] = "Offset mode only"
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters += [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Pagination mode",
+                "schema": {
+                    "type": "string",
+                    "enum": [PAGINATION_MODE_OFFSET, PAGINATION_MODE_CURSOR],
+                },
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor from 'next' or 'previous' link",
+                "schema": {"type": "string"},
+            },
+        ]
+        return parameters
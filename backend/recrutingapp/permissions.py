@@ -1,15 +1,22 @@
+"""
+Permissions of recruting App.
+
+Document permissions are declared as rules: role, ownership path and status
+conditions for request methods/actions. Rules are compiled to Q objects for
+querysets ('scope' - objects listed for user, 'rules' - object permissions
+of detail actions evaluated in the object query) and checked on objects
+loaded without the permission annotation.
+"""
+
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
 from rest_framework import permissions
 
-from recrutingapp.models import (
-    CV,
-    CVResponse,
-    ConstDocumentStatus,
-    Employer,
-    Vacancy,
-    VacancyResponse,
-)
+from recrutingapp.models import ConstDocumentStatus
 from userapp.models import UserRoles
 
+# annotation with result of object permission rules
+PERMITTED_FIELD = "permitted_by_rules"
+
 
 class IsOwner(permissions.BasePermission):
     """
@@ -22,6 +29,27 @@ class IsOwner(permissions.BasePermission):
         return obj.owner == request.user
 
 
+class IsOwnerOrSuperuser(permissions.BasePermission):
+    """
+    Object-level permission to only allow owners of an object or superusers.
+    Assumes the model instance has an `owner` attribute.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_superuser or obj.owner == request.user
+
+
+class IsModerator(permissions.BasePermission):
+    """
+    Permission to only allow moderators or superusers.
+    """
+
+    def has_permission(self, request, view):
+        return request.user.is_superuser or (
+            getattr(request.user, "role", None) == UserRoles.moderator.value
+        )
+
+
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
     Object-level permission to only allow owners of an object to edit it.
@@ -38,213 +66,317 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.owner == request.user
 
 
-class CVPermission(permissions.BasePermission):
+class Rule:
     """
-    Object-level permission for CV
-    Grants permission based on role, status
+    Condition of permission: all given parts must match.
+    Roles, methods and actions are checked on request, owner path and
+    statuses on object
+    """
+
+    def __init__(
+        self,
+        roles=None,
+        except_roles=None,
+        methods=None,
+        actions=None,
+        owner=None,
+        status_in=None,
+        status_not_in=None,
+    ):
+        self.roles = roles and {role.value for role in roles}
+        self.except_roles = except_roles and {role.value for role in except_roles}
+        self.methods = methods
+        self.actions = actions
+        # lookup path to owner, e.g. "owner" or "cv__owner"
+        self.owner = owner
+        self.status_in = status_in
+        self.status_not_in = status_not_in
+
+    def applies(self, user, method=None, action=None) -> bool:
+        role = getattr(user, "role", None)
+        return (
+            (self.roles is None or role in self.roles)
+            and (self.except_roles is None or role not in self.except_roles)
+            and (self.methods is None or method in self.methods)
+            and (self.actions is None or action in self.actions)
+        )
+
+    def get_q(self, user) -> Q:
+        q = Q()
+        if self.owner:
+            q &= Q(**{self.owner: user})
+        if self.status_in:
+            q &= Q(status__in=self.status_in)
+        if self.status_not_in:
+            q &= ~Q(status__in=self.status_not_in)
+        return q
+
+    def check(self, obj, user) -> bool:
+        if self.owner:
+            *path, field = self.owner.split("__")
+            target = obj
+            for name in path:
+                target = getattr(target, name)
+            if getattr(target, f"{field}_id") != user.pk:
+                return False
+        if self.status_in and obj.status_id not in self.status_in:
+            return False
+        if self.status_not_in and obj.status_id in self.status_not_in:
+            return False
+        return True
+
+
+def compile_rules(rules, user):
+    """OR of rule conditions, None if no rule applies"""
+    q = None
+    for rule in rules:
+        rule_q = rule.get_q(user)
+        if not rule_q:
+            # unconditional
+            return rule_q
+        q = rule_q if q is None else q | rule_q
+    return q
+
+
+class RulePermission(permissions.BasePermission):
+    """
+    Object-level permission by rules, superusers have all permissions
     """
 
-    def has_object_permission(self, request, view, obj: CV):
-        role = request.user.role
+    # objects in queryset of user (list and lookup of detail actions)
+    scope = ()
+    # object permissions of detail actions
+    rules = ()
+
+    def get_rules(self, request, view) -> list:
+        return [
+            rule
+            for rule in self.rules
+            if rule.applies(request.user, request.method, view.action)
+        ]
+
+    @classmethod
+    def filter_scope(cls, queryset, user):
+        if user.is_superuser:
+            return queryset
+        q = compile_rules(
+            [rule for rule in cls.scope if rule.applies(user)],
+            user,
+        )
+        if q is None:
+            return queryset.none()
+        return queryset.filter(q)
+
+    def annotate_queryset(self, queryset, request, view):
+        """Object query with result of permission rules"""
+        if request.user.is_superuser:
+            return queryset
+        q = compile_rules(self.get_rules(request, view), request.user)
+        if q is None or not q:
+            permitted = Value(q is not None)
+        else:
+            permitted = ExpressionWrapper(q, output_field=BooleanField())
+        return queryset.annotate(**{PERMITTED_FIELD: permitted})
 
+    def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
             return True
+        permitted = getattr(obj, PERMITTED_FIELD, None)
+        if permitted is not None:
+            return bool(permitted)
+        return any(
+            rule.check(obj, request.user) for rule in self.get_rules(request, view)
+        )
 
-        # employee has full permissions except changing data in pending status
-        if role == UserRoles.employee.value and obj.owner == request.user:
-            if (
-                request.method in permissions.SAFE_METHODS
-                or obj.status.id
-                in (
-                    ConstDocumentStatus.draft,
-                    ConstDocumentStatus.rejected,
-                )
-                or view.action == "destroy"
-            ):
-                return True
 
-        # moderator has read permissions on all documents, and write status permissions on moderated documents
-        elif role == UserRoles.moderator.value:
-            if request.method in permissions.SAFE_METHODS or (
-                obj
-                and obj.status.id == ConstDocumentStatus.pending
-                and view.action == "status"
-            ):
-                return True
+EDITABLE_STATUSES = (ConstDocumentStatus.draft, ConstDocumentStatus.rejected)
 
-        # employers can view all approved resume
-        elif role == UserRoles.employer.value:
-            if request.method in permissions.SAFE_METHODS and (
-                obj and obj.status.id == ConstDocumentStatus.approved
-            ):
-                return True
 
-        return False
+class CVPermission(RulePermission):
+    """
+    Object-level permission for CV
+    Grants permission based on role, status
+    """
 
+    scope = (
+        # employee -> own
+        Rule(roles=[UserRoles.employee], owner="owner"),
+        # moderator -> on moderation
+        Rule(roles=[UserRoles.moderator], status_in=[ConstDocumentStatus.pending]),
+        Rule(
+            except_roles=[UserRoles.employee, UserRoles.moderator],
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
+    rules = (
+        # employee has full permissions except changing data in pending status
+        Rule(
+            roles=[UserRoles.employee], owner="owner", methods=permissions.SAFE_METHODS
+        ),
+        Rule(roles=[UserRoles.employee], owner="owner", status_in=EDITABLE_STATUSES),
+        Rule(roles=[UserRoles.employee], owner="owner", actions=["destroy"]),
+        # moderator has read permissions on all documents, and write status permissions on moderated documents
+        Rule(roles=[UserRoles.moderator], methods=permissions.SAFE_METHODS),
+        Rule(
+            roles=[UserRoles.moderator],
+            actions=["status"],
+            status_in=[ConstDocumentStatus.pending],
+        ),
+        # employers can view all approved resume
+        Rule(
+            roles=[UserRoles.employer],
+            methods=permissions.SAFE_METHODS,
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
 
-class EmployerPermission(permissions.BasePermission):
+
+class EmployerPermission(RulePermission):
     """
     Object-level permission for employer profile
     Grants permission based on role, status
     """
 
-    def has_object_permission(self, request, view, obj: Employer):
-        role = request.user.role
-
-        if request.user.is_superuser:
-            return True
-
+    scope = (
+        # employer -> owned
+        Rule(roles=[UserRoles.employer], owner="owner"),
+        # moderator -> on moderation
+        Rule(roles=[UserRoles.moderator], status_in=[ConstDocumentStatus.pending]),
+        Rule(
+            except_roles=[UserRoles.employer, UserRoles.moderator],
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
+    rules = (
         # employer has full permissions on status change and restricted permissions on data change
-        if role == UserRoles.employer.value and obj.owner == request.user:
-            if (
-                request.method in permissions.SAFE_METHODS
-                or obj.status.id
-                in (
-                    ConstDocumentStatus.draft,
-                    ConstDocumentStatus.rejected,
-                )
-                or (view.action == "status")
-            ):
-                return True
-
+        Rule(
+            roles=[UserRoles.employer], owner="owner", methods=permissions.SAFE_METHODS
+        ),
+        Rule(roles=[UserRoles.employer], owner="owner", status_in=EDITABLE_STATUSES),
+        Rule(roles=[UserRoles.employer], owner="owner", actions=["status"]),
         # moderator has read permissions on all documents, and write status permissions on moderated documents
-        elif role == UserRoles.moderator.value:
-            if request.method in permissions.SAFE_METHODS or (
-                obj
-                and obj.status.id == ConstDocumentStatus.pending
-                and view.action == "status"
-            ):
-                return True
-
+        Rule(roles=[UserRoles.moderator], methods=permissions.SAFE_METHODS),
+        Rule(
+            roles=[UserRoles.moderator],
+            actions=["status"],
+            status_in=[ConstDocumentStatus.pending],
+        ),
         # all users can view all approved companies
-        else:
-            if request.method in permissions.SAFE_METHODS and (
-                obj and obj.status.id == ConstDocumentStatus.approved
-            ):
-                return True
+        Rule(
+            methods=permissions.SAFE_METHODS,
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
 
-        return False
 
-
-class VacancyPermission(permissions.BasePermission):
+class VacancyPermission(RulePermission):
     """
     Object-level permission for vacancies
     Grants permission based on role, status
     """
 
-    def has_object_permission(self, request, view, obj: Vacancy):
-        role = request.user.role
-
-        if request.user.is_superuser:
-            return True
-
+    scope = (
+        # employer -> own
+        Rule(roles=[UserRoles.employer], owner="owner"),
+        # moderator -> on moderation
+        Rule(roles=[UserRoles.moderator], status_in=[ConstDocumentStatus.pending]),
+        Rule(
+            except_roles=[UserRoles.employer, UserRoles.moderator],
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
+    rules = (
         # employer has full permissions except changing data in pending status
-        if role == UserRoles.employer.value and obj.owner == request.user:
-            if (
-                request.method in permissions.SAFE_METHODS
-                or obj.status.id
-                in (
-                    ConstDocumentStatus.draft,
-                    ConstDocumentStatus.rejected,
-                )
-                or view.action == "destroy"
-            ):
-                return True
-
+        Rule(
+            roles=[UserRoles.employer], owner="owner", methods=permissions.SAFE_METHODS
+        ),
+        Rule(roles=[UserRoles.employer], owner="owner", status_in=EDITABLE_STATUSES),
+        Rule(roles=[UserRoles.employer], owner="owner", actions=["destroy"]),
         # moderator has read permissions on all documents, and write status permissions on moderated documents
-        elif role == UserRoles.moderator.value:
-            if request.method in permissions.SAFE_METHODS or (
-                obj
-                and obj.status.id == ConstDocumentStatus.pending
-                and view.action == "status"
-            ):
-                return True
-
+        Rule(roles=[UserRoles.moderator], methods=permissions.SAFE_METHODS),
+        Rule(
+            roles=[UserRoles.moderator],
+            actions=["status"],
+            status_in=[ConstDocumentStatus.pending],
+        ),
         # employees can view all approved vacancies
-        elif role == UserRoles.employee.value:
-            if request.method in permissions.SAFE_METHODS and (
-                obj and obj.status.id == ConstDocumentStatus.approved
-            ):
-                return True
+        Rule(
+            roles=[UserRoles.employee],
+            methods=permissions.SAFE_METHODS,
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
 
-        return False
 
-
-class CVResponsePermission(permissions.BasePermission):
+class CVResponsePermission(RulePermission):
     """
     Object-level permission for responses on CV
     Grants permission based on role, status
     """
 
-    def has_object_permission(self, request, view, obj: CVResponse):
-        role = request.user.role
-
-        if request.user.is_superuser:
-            return True
-
+    scope = (
+        # employer -> own job offers
+        Rule(roles=[UserRoles.employer], owner="owner"),
+        # employee -> responses on own CV
+        Rule(roles=[UserRoles.employee], owner="cv__owner"),
+    )
+    rules = (
         # employer has full permissions on own job offers
-        if role == UserRoles.employer.value and obj.owner == request.user:
-            return True
-
+        Rule(roles=[UserRoles.employer], owner="owner"),
         # employees can view only response on their CV, not draft and change status while pending
-        elif role == UserRoles.employee.value:
-            if (
-                obj
-                and obj.cv.owner == request.user
-                and obj.status.id != ConstDocumentStatus.draft
-            ) and (
-                request.method in permissions.SAFE_METHODS
-                or (
-                    obj
-                    and obj.status.id == ConstDocumentStatus.pending
-                    and view.action == "status"
-                )
-                or (
-                    obj
-                    and obj.status.id == ConstDocumentStatus.approved
-                    and view.action == "messages"
-                )
-            ):
-                return True
-
-        return False
-
-
-class VacancyResponsePermission(permissions.BasePermission):
+        Rule(
+            roles=[UserRoles.employee],
+            owner="cv__owner",
+            methods=permissions.SAFE_METHODS,
+            status_not_in=[ConstDocumentStatus.draft],
+        ),
+        Rule(
+            roles=[UserRoles.employee],
+            owner="cv__owner",
+            actions=["status"],
+            status_in=[ConstDocumentStatus.pending],
+        ),
+        Rule(
+            roles=[UserRoles.employee],
+            owner="cv__owner",
+            actions=["messages"],
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
+
+
+class VacancyResponsePermission(RulePermission):
     """
     Object-level permission for responses on vacancies
     Grants permission based on role, status
     """
 
-    def has_object_permission(self, request, view, obj: VacancyResponse):
-        role = request.user.role
-
-        if request.user.is_superuser:
-            return True
-
+    scope = (
+        # employee -> own job requests
+        Rule(roles=[UserRoles.employee], owner="owner"),
+        # employer -> responses on own vacancies
+        Rule(roles=[UserRoles.employer], owner="vacancy__owner"),
+    )
+    rules = (
         # employee has full permissions on own job requests
-        if role == UserRoles.employee.value and obj.owner == request.user:
-            return True
-
+        Rule(roles=[UserRoles.employee], owner="owner"),
         # employers can view only not draft response on their Vacancies and change status while pending
-        elif role == UserRoles.employer.value:
-            if (
-                obj
-                and obj.vacancy.owner == request.user
-                and obj.status.id != ConstDocumentStatus.draft
-            ) and (
-                request.method in permissions.SAFE_METHODS
-                or (
-                    obj
-                    and obj.status.id == ConstDocumentStatus.pending
-                    and view.action == "status"
-                )
-                or (
-                    obj
-                    and obj.status.id == ConstDocumentStatus.approved
-                    and view.action == "messages"
-                )
-            ):
-                return True
-
-        return False
+        Rule(
+            roles=[UserRoles.employer],
+            owner="vacancy__owner",
+            methods=permissions.SAFE_METHODS,
+            status_not_in=[ConstDocumentStatus.draft],
+        ),
+        Rule(
+            roles=[UserRoles.employer],
+            owner="vacancy__owner",
+            actions=["status"],
+            status_in=[ConstDocumentStatus.pending],
+        ),
+        Rule(
+            roles=[UserRoles.employer],
+            owner="vacancy__owner",
+            actions=["messages"],
+            status_in=[ConstDocumentStatus.approved],
+        ),
+    )
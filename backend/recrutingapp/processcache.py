@@ -0,0 +1,101 @@
+"""
+Data derived from the database and kept in worker process memory
+(matching corpora, skill indexes, city grid, reference bundle).
+
+ProcessCache builds its value in the first request (or in background on
+worker start, config.wsgi and config.asgi) and serves it till TTL or
+invalidation. Expired value is rebuilt in background thread while the old
+one is served, or in request for cheap values (background=False).
+Invalidations come from model signals (recrutingapp.signals), other
+worker processes get no signals and see changes after TTL.
+"""
+
+import threading
+import time
+
+from django.db import connection
+
+_caches = []
+
+
+class ProcessCache:
+    def __init__(self, build, ttl, background=True):
+        self.build = build
+        self.ttl = ttl
+        self.background = background
+        self.value = None
+        self.created = 0.0
+        # value is current if no invalidations were made since its build began
+        self.generation = 0
+        self.built_generation = 0
+        self.rebuilding = False
+        self.lock = threading.Lock()
+        _caches.append(self)
+
+    @property
+    def is_expired(self) -> bool:
+        return (
+            self.built_generation != self.generation
+            or time.monotonic() - self.created > self.ttl
+        )
+
+    def rebuild(self):
+        generation = self.generation
+        value = self.build()
+        self.created = time.monotonic()
+        self.built_generation = generation
+        self.value = value
+
+    def rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            self.rebuilding = False
+            connection.close()
+
+    def start_rebuild(self):
+        with self.lock:
+            if not self.rebuilding:
+                self.rebuilding = True
+                threading.Thread(target=self.rebuild_in_background, daemon=True).start()
+
+    def start(self):
+        """Build in background (worker start)"""
+        if self.value is None:
+            self.start_rebuild()
+
+    def get(self):
+        value = self.value
+        if value is None:
+            with self.lock:
+                if self.value is None:
+                    self.rebuild()
+                value = self.value
+        elif self.is_expired:
+            if self.background:
+                self.start_rebuild()
+            else:
+                with self.lock:
+                    if self.is_expired:
+                        self.rebuild()
+                    value = self.value
+        return value
+
+    def peek(self):
+        """Built value or None (for incremental updates)"""
+        return self.value
+
+    def invalidate(self, **kwargs):
+        """Rebuild on next get, also a signal receiver (any signature)"""
+        self.generation += 1
+
+    def clear(self):
+        """Drop built value, the next get builds it again"""
+        self.value = None
+        self.generation += 1
+
+
+def clear_process_caches():
+    """Drop values of all caches of the process"""
+    for cache in _caches:
+        cache.clear()
@@ -0,0 +1,66 @@
+"""
+Reference data bundle (cities with regions, genders, statuses, skills).
+
+Served as prepared JSON with content-hash version. The bundle is a
+ProcessCache (recrutingapp.processcache) rebuilt in request, invalidated by
+model signals (recrutingapp.signals).
+"""
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recrutingapp.models import City, DocumentStatus, Gender, Region, Skill
+from recrutingapp.processcache import ProcessCache
+
+REFERENCE_MODELS = (City, Region, Gender, DocumentStatus, Skill)
+
+BUNDLE_TTL = 300
+
+
+class ReferenceBundle:
+    """Prepared reference data"""
+
+    def __init__(self, data: dict):
+        payload = json.dumps(
+            data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True
+        )
+        self.version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+        self.etag = f'"{self.version}"'
+        self.content = json.dumps(
+            dict(data, version=self.version),
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+            sort_keys=True,
+        ).encode("utf-8")
+
+
+def build_reference_data() -> dict:
+    cities = City.objects.order_by("name").values_list(
+        "id", "name", "region_id", "region__name", "latitude", "longitude"
+    )
+    return {
+        "cities": [
+            {
+                "id": city_id,
+                "name": name,
+                "region": region_id,
+                "fullname": City(name=name, region=Region(name=region_name)).fullname,
+                "latitude": latitude,
+                "longitude": longitude,
+            }
+            for city_id, name, region_id, region_name, latitude, longitude in cities
+        ],
+        "regions": list(Region.objects.order_by("name").values("id", "name")),
+        "genders": list(Gender.objects.order_by("id").values("id", "name")),
+        "statuses": list(DocumentStatus.objects.order_by("id").values("id", "name")),
+        "skills": list(Skill.objects.order_by("name").values("id", "name")),
+    }
+
+
+def build_reference_bundle() -> ReferenceBundle:
+    return ReferenceBundle(build_reference_data())
+
+
+reference_bundle = ProcessCache(build_reference_bundle, BUNDLE_TTL, background=False)
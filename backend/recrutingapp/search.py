@@ -0,0 +1,151 @@
+"""
+Full-text search for CVs and vacancies.
+
+PostgreSQL: weighted tsvector stored in `search_vector` (GIN indexed),
+ranked with ts_rank, supports phrases ("...") and prefixes (word*).
+Other backends (sqlite for development): icontains over the same fields.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+
+from recrutingapp.experience import get_experience_months
+from recrutingapp.models import CV, CVEducation, CVExperience, Vacancy
+
+SEARCH_CONFIG = "simple"
+
+# field name -> weight (A is the most relevant)
+SEARCH_FIELDS = {
+    CV: {
+        "title": "A",
+        "position": "A",
+        "description": "B",
+        "search_document": "C",
+    },
+    Vacancy: {
+        "title": "A",
+        "position": "A",
+        "description": "B",
+    },
+}
+
+QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+WORD_RE = re.compile(r"\w+")
+
+
+def is_fulltext_supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def get_search_vector(model) -> SearchVector:
+    """Weighted vector expression for model fields"""
+    vector = None
+    for field_name, weight in SEARCH_FIELDS[model].items():
+        field_vector = SearchVector(field_name, weight=weight, config=SEARCH_CONFIG)
+        vector = field_vector if vector is None else vector + field_vector
+    return vector
+
+
+def build_cv_documents(cv_ids) -> dict:
+    """Experience and education content for CVs (two queries for any amount)"""
+    documents = {cv_id: [] for cv_id in cv_ids}
+    experience = CVExperience.objects.filter(cv_id__in=cv_ids).values_list(
+        "cv_id", "company", "position", "content"
+    )
+    education = CVEducation.objects.filter(cv_id__in=cv_ids).values_list(
+        "cv_id", "institution", "specialty", "content"
+    )
+    for cv_id, *texts in list(experience) + list(education):
+        documents[cv_id].extend(texts)
+    return {cv_id: "\n".join(texts) for cv_id, texts in documents.items()}
+
+
+def update_search_index(model, ids):
+    """
+    Refresh denormalized search data for given objects.
+    Must be called after every write of searchable fields (or nested items).
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    if model is CV:
+        documents = build_cv_documents(ids)
+        months = get_experience_months(ids)
+        CV.objects.bulk_update(
+            [
+                CV(id=cv_id, search_document=doc, experience_months=months[cv_id])
+                for cv_id, doc in documents.items()
+            ],
+            ["search_document", "experience_months"],
+            batch_size=1000,
+        )
+    if is_fulltext_supported():
+        model.objects.filter(pk__in=ids).update(search_vector=get_search_vector(model))
+
+
+def update_search_index_all(model, batch_size=10000) -> int:
+    """Rebuild search data for all objects of model, returns objects count"""
+    count = 0
+    ids = model.objects.order_by("pk").values_list("pk", flat=True)
+    batch = []
+    for pk in ids.iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) >= batch_size:
+            update_search_index(model, batch)
+            count += len(batch)
+            batch = []
+    update_search_index(model, batch)
+    return count + len(batch)
+
+
+def parse_search_query(value: str) -> list:
+    """
+    Split user query into terms: list of (words, is_prefix).
+    "exact phrase" -> phrase term, word* -> prefix term, other -> word term
+    """
+    terms = []
+    for phrase, token in QUERY_TOKEN_RE.findall(value or ""):
+        is_prefix = not phrase and token.endswith("*")
+        words = tuple(w.lower() for w in WORD_RE.findall(phrase or token))
+        if words:
+            terms.append((words, is_prefix))
+    return terms
+
+
+def get_tsquery(terms) -> str:
+    """Raw tsquery text, all terms are required (AND)"""
+    parts = []
+    for words, is_prefix in terms:
+        lexemes = [f"'{w}'" for w in words]
+        if is_prefix:
+            lexemes[-1] += ":*"
+        parts.append("(" + " <-> ".join(lexemes) + ")")
+    return " & ".join(parts)
+
+
+def search_queryset(queryset, value: str):
+    """Filter queryset by search query, ordered by relevance where supported"""
+    terms = parse_search_query(value)
+    if not terms:
+        return queryset
+
+    model = queryset.model
+    if is_fulltext_supported():
+        query = SearchQuery(get_tsquery(terms), search_type="raw", config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F("search_vector"), query))
+            .order_by("-search_rank", "-updated_at", "-id")
+        )
+
+    # no phrase positions here, every word is required
+    for words, _ in terms:
+        for word in words:
+            word_q = Q()
+            for field_name in SEARCH_FIELDS[model]:
+                word_q |= Q(**{f"{field_name}__icontains": word})
+            queryset = queryset.filter(word_q)
+    return queryset
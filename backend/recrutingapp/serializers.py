@@ -3,7 +3,9 @@ All serializers for recruting App
 """
 
 import datetime
-from rest_framework import serializers, validators
+from django.db import transaction
+from django.db.models import Model, OuterRef, Subquery
+from rest_framework import relations, serializers, validators
 from drf_spectacular.utils import extend_schema_field
 
 from recrutingapp.models import (
@@ -24,6 +26,9 @@ from recrutingapp.models import (
     Vacancy,
     VacancyResponse,
 )
+from recrutingapp.moderation import DECISION_STATUSES, MAX_DECISIONS, QUEUE_MODELS
+from recrutingapp.reference import reference_bundle
+from recrutingapp.search import update_search_index
 
 
 # Mixins
@@ -60,16 +65,53 @@ class DocumentStatusMixinSerializer(serializers.Serializer):
         fields = ["status", "info"]
 
 
+class ModerationDecisionSerializer(serializers.Serializer):
+    """Decision on document of moderation queue"""
+
+    type = serializers.ChoiceField(choices=list(QUEUE_MODELS))
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=DECISION_STATUSES)
+    info = serializers.CharField(max_length=150, allow_blank=True, default="")
+
+
+class ModerationDecisionsSerializer(serializers.Serializer):
+    """Bulk decisions on moderation queue ('decisions' action)"""
+
+    decisions = ModerationDecisionSerializer(
+        many=True, allow_empty=False, max_length=MAX_DECISIONS
+    )
+
+
 class DocumentMessageSerializer(serializers.Serializer):
     """Serializer for document chat messages"""
 
+    id = serializers.IntegerField(read_only=True)
     sender = serializers.SlugRelatedField(read_only=True, slug_field="role")
     content = serializers.CharField(max_length=1024)
     created_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = DocumentMessage
-        fields = ["sender", "content", "created_at"]
+        fields = ["id", "sender", "content", "created_at"]
+
+
+# messages embedded in document, full history is read by 'messages' action
+EMBEDDED_MESSAGES = 20
+
+
+class LatestMessagesField(relations.ManyRelatedField):
+    """Last EMBEDDED_MESSAGES messages, oldest first"""
+
+    def get_attribute(self, instance):
+        name = self.source_attrs[-1]
+        if name in getattr(instance, "_prefetched_objects_cache", {}):
+            # limited by DocumentMessagesField.shape_queryset
+            return super().get_attribute(instance)
+        if instance.pk is None:
+            return []
+        messages = getattr(instance, name).select_related("sender")
+        latest = messages.order_by("-created_at", "-id")[:EMBEDDED_MESSAGES]
+        return list(reversed(latest))
 
 
 @extend_schema_field(DocumentMessageSerializer())
@@ -78,6 +120,28 @@ class DocumentMessagesField(serializers.RelatedField):
     Helper for nested serialization
     """
 
+    # joins for recrutingapp.shaping
+    select_related = ["sender"]
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in relations.MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return LatestMessagesField(**list_kwargs)
+
+    def shape_queryset(self, queryset):
+        """Prefetched messages: last EMBEDDED_MESSAGES of every document"""
+        latest = (
+            DocumentMessage.objects.filter(
+                content_type=OuterRef("content_type"), object_id=OuterRef("object_id")
+            )
+            .order_by("-created_at", "-id")
+            .values("pk")[:EMBEDDED_MESSAGES]
+        )
+        return queryset.filter(pk__in=Subquery(latest)).order_by("created_at", "id")
+
     def to_representation(self, value):
         return DocumentMessageSerializer(value).data
 
@@ -92,13 +156,29 @@ class GenderSerializer(serializers.ModelSerializer):
 
 
 class SkillWritableField(serializers.CharField):
-    """Skill serializer. Only for write."""
+    """Skill name. Only for write, skills are resolved by resolve_skills"""
 
-    def to_internal_value(self, data):
-        skill, is_created = Skill.objects.get_or_create(name=data)
-        if is_created:
-            skill.save()
-        return skill
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_length", Skill._meta.get_field("name").max_length)
+        super().__init__(**kwargs)
+
+
+def resolve_skills(names) -> list:
+    """
+    Skills by names (order kept, duplicates dropped): one lookup, unknown
+    names are inserted with one bulk insert ignoring concurrent inserts
+    """
+    names = list(dict.fromkeys(names))
+    skills = Skill.objects.in_bulk(names, field_name="name")
+    missing = [name for name in names if name not in skills]
+    if missing:
+        Skill.objects.bulk_create(
+            [Skill(name=name) for name in missing], ignore_conflicts=True
+        )
+        skills.update(Skill.objects.in_bulk(missing, field_name="name"))
+        # bulk insert sends no post_save to reference data receivers
+        transaction.on_commit(reference_bundle.invalidate)
+    return [skills[name] for name in names]
 
 
 class CitySerializer(serializers.ModelSerializer):
@@ -106,7 +186,7 @@ class CitySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = City
-        fields = ["id", "name", "region", "fullname"]
+        fields = ["id", "name", "region", "fullname", "latitude", "longitude"]
 
 
 # News
@@ -237,21 +317,19 @@ class EmployeeSerializerInt(OwnedModelMixin, serializers.ModelSerializer):
 
     def create(self, validated_data):
         skills_data = validated_data.pop("skills")
-        employee = super().create(validated_data)
-
-        for skill in skills_data:
-            employee.skills.add(skill)
-        employee.save()
+        with transaction.atomic():
+            employee = super().create(validated_data)
+            employee.skills.set(resolve_skills(skills_data))
         return employee
 
     def update(self, instance: Employee, validated_data):
-        skills_data = validated_data.pop("skills")
-        employee = super().update(instance, validated_data)
-        employee.skills.clear()
-
-        for skill in skills_data:
-            employee.skills.add(skill)
-        employee.save()
+        # skills are kept when list is not sent (partial update)
+        skills_data = validated_data.pop("skills", None)
+        with transaction.atomic():
+            employee = super().update(instance, validated_data)
+            if skills_data is not None:
+                # diff: only removed and added skills are written
+                employee.skills.set(resolve_skills(skills_data))
         return employee
 
     class Meta:
@@ -335,18 +413,75 @@ class EmployerSerializerInt(OwnedModelMixin, serializers.ModelSerializer):
 
 
 # CV
+def write_nested_items(model, parent_field, parent, items, existing=None):
+    """
+    Make nested rows of parent equal to validated items.
+    Items with id of existing row update it, other items are new rows:
+    one bulk_create, one bulk_update of changed fields and one delete,
+    whatever the number of items
+    """
+    if existing is None:
+        existing = model.objects.filter(**{parent_field: parent})
+    current = {obj.pk: obj for obj in existing}
+
+    created, updated, fields, kept = [], [], set(), set()
+    for item in items:
+        item = dict(item)
+        obj = current.get(item.pop("id", None))
+        if obj is None:
+            created.append(model(**{parent_field: parent}, **item))
+            continue
+        kept.add(obj.pk)
+        changed = set()
+        for name, value in item.items():
+            field = model._meta.get_field(name)
+            # related objects are compared by key, not loaded
+            old = getattr(obj, field.attname)
+            new = value.pk if isinstance(value, Model) else value
+            if old != new:
+                setattr(obj, name, value)
+                changed.add(name)
+        if changed:
+            updated.append(obj)
+            fields |= changed
+
+    removed = current.keys() - kept
+    if removed:
+        model.objects.filter(pk__in=removed).delete()
+    if updated:
+        model.objects.bulk_update(updated, sorted(fields))
+    if created:
+        model.objects.bulk_create(created)
+
+
+class CVExperienceListSerializer(serializers.ListSerializer):
+    """Experience items, cities are checked with one query"""
+
+    def validate(self, attrs):
+        ids = {item["city_id"] for item in attrs}
+        found = set(City.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        if ids - found:
+            raise serializers.ValidationError(
+                f"Invalid city pk: {', '.join(map(str, sorted(ids - found)))}."
+            )
+        return attrs
+
+
 class CVExperienceSerializerInt(serializers.ModelSerializer):
     """
     Serializer for employee experience (create/update)
     """
 
+    # existing item is updated, new item is created without id
+    id = serializers.IntegerField(required=False)
     datefrom = serializers.DateField(required=True)
     dateto = serializers.DateField(required=False)
     is_current = serializers.BooleanField()
-    city = serializers.PrimaryKeyRelatedField(queryset=City.objects.all())
+    city = serializers.IntegerField(source="city_id")
 
     class Meta:
         model = CVExperience
+        list_serializer_class = CVExperienceListSerializer
         fields = [
             "id",
             "datefrom",
@@ -389,6 +524,7 @@ class CVEducationSerializer(serializers.ModelSerializer):
     Serializer for employee education
     """
 
+    id = serializers.IntegerField(required=False)
     date = serializers.DateField()
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
@@ -445,34 +581,31 @@ class CVSerializerInt(OwnedModelMixin, LoggedModelMixin, serializers.ModelSerial
     def create(self, validated_data):
         experience_data = validated_data.pop("experience")
         education_data = validated_data.pop("education")
-        cv = CV.objects.create(**validated_data)
-        for experience_ in experience_data:
-            CVExperience.objects.create(cv=cv, **experience_)
-        for education_ in education_data:
-            CVEducation.objects.create(cv=cv, **education_)
+        with transaction.atomic():
+            cv = CV.objects.create(**validated_data)
+            write_nested_items(CVExperience, "cv", cv, experience_data, existing=())
+            write_nested_items(CVEducation, "cv", cv, education_data, existing=())
+            update_search_index(CV, [cv.pk])
         return cv
 
     def update(self, instance, validated_data: dict):
-        experience_data = validated_data.pop("experience")
-        education_data = validated_data.pop("education")
+        # items are kept when list is not sent (partial update)
+        experience_data = validated_data.pop("experience", None)
+        education_data = validated_data.pop("education", None)
 
         instance.title = validated_data.get("title", instance.title)
         instance.position = validated_data.get("position", instance.position)
         instance.salary = validated_data.get("salary", instance.salary)
         instance.description = validated_data.get("description", instance.description)
 
-        instance.save()
-
         cv = instance
-
-        if experience_data:
-            cv.experience.all().delete()
-            for experience_ in experience_data:
-                CVExperience.objects.create(cv=cv, **experience_)
-        if education_data:
-            cv.education.all().delete()
-            for education_ in education_data:
-                CVEducation.objects.create(cv=cv, **education_)
+        with transaction.atomic():
+            cv.save()
+            if experience_data is not None:
+                write_nested_items(CVExperience, "cv", cv, experience_data)
+            if education_data is not None:
+                write_nested_items(CVEducation, "cv", cv, education_data)
+            update_search_index(CV, [cv.pk])
         return cv
 
 
@@ -500,6 +633,7 @@ class CVSerializerExt(OwnedModelMixin, LoggedModelMixin, serializers.ModelSerial
             "description",
             "experience",
             "education",
+            "experience_months",
             "created_at",
             "updated_at",
             "is_favorite",
@@ -527,6 +661,16 @@ class VacancySerializerInt(
             raise serializers.ValidationError("No profile exists!")
         return super().validate(attrs)
 
+    def create(self, validated_data):
+        vacancy = super().create(validated_data)
+        update_search_index(Vacancy, [vacancy.pk])
+        return vacancy
+
+    def update(self, instance, validated_data):
+        vacancy = super().update(instance, validated_data)
+        update_search_index(Vacancy, [vacancy.pk])
+        return vacancy
+
     class Meta:
         model = Vacancy
         fields = [
@@ -734,3 +878,70 @@ class VacancyResponseSerializerExt(
             "messages",
         ]
         depth = 1
+
+
+# Import (recrutingapp.importer)
+class LookupField(serializers.Field):
+    """
+    Related object pk by id or name, resolved through in-memory table
+    from serializer context ("lookups")
+    """
+
+    default_error_messages = {"not_found": "Unknown value: {value}."}
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        pk = self.context["lookups"][self.lookup].resolve(data)
+        if pk is None:
+            self.fail("not_found", value=data)
+        return pk
+
+    def to_representation(self, value):
+        return value
+
+
+class VacancyImportSerializer(serializers.Serializer):
+    """Vacancy row of bulk import"""
+
+    title = serializers.CharField(max_length=60)
+    position = serializers.CharField(max_length=100)
+    salary = serializers.DecimalField(max_digits=10, decimal_places=0)
+    description = serializers.CharField()
+    city = LookupField("city")
+    # resolved only for imports without fixed employer
+    employer = LookupField("employer", required=False)
+
+
+class CVExperienceImportSerializer(serializers.Serializer):
+    """CV experience item of bulk import"""
+
+    datefrom = serializers.DateField()
+    dateto = serializers.DateField()
+    is_current = serializers.BooleanField(default=False)
+    city = LookupField("city")
+    company = serializers.CharField(max_length=100)
+    position = serializers.CharField(max_length=100)
+    content = serializers.CharField()
+
+
+class CVEducationImportSerializer(serializers.Serializer):
+    """CV education item of bulk import"""
+
+    date = serializers.DateField()
+    institution = serializers.CharField(max_length=100)
+    specialty = serializers.CharField(max_length=100)
+    content = serializers.CharField(max_length=1024)
+
+
+class CVImportSerializer(serializers.Serializer):
+    """CV row of bulk import (nested items in JSONL only)"""
+
+    title = serializers.CharField(max_length=60)
+    position = serializers.CharField(max_length=100)
+    salary = serializers.DecimalField(max_digits=10, decimal_places=0)
+    description = serializers.CharField()
+    experience = CVExperienceImportSerializer(many=True, required=False)
+    education = CVEducationImportSerializer(many=True, required=False)
@@ -0,0 +1,138 @@
+"""
+Queryset shaping: select_related/prefetch_related tree derived from
+serializer definition, so nested reading runs in a fixed number of queries.
+
+To-one relations rendered by nested serializers or slug fields are joined
+(select_related), to-many relations become Prefetch objects with their own
+shaped querysets. Custom related fields may declare extra joins needed by
+their representation in `select_related` attribute and limit or order
+prefetched objects by `shape_queryset(queryset)` method.
+"""
+
+import functools
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import relations, serializers
+
+
+class QuerysetShape:
+    """Relations to load with queryset of one model"""
+
+    def __init__(self, model):
+        self.model = model
+        self.select_related = []
+        # path -> QuerysetShape of related model
+        self.prefetch_related = {}
+        # queryset -> queryset functions
+        self.hooks = []
+
+    def add_select(self, path):
+        if path not in self.select_related:
+            self.select_related.append(path)
+
+    def add_prefetch(self, path, model):
+        if path not in self.prefetch_related:
+            self.prefetch_related[path] = QuerysetShape(model)
+        return self.prefetch_related[path]
+
+    def add_hook(self, hook):
+        if hook not in self.hooks:
+            self.hooks.append(hook)
+
+    def get_queryset(self):
+        queryset = self.apply(self.model._default_manager.all())
+        for hook in self.hooks:
+            queryset = hook(queryset)
+        return queryset
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(
+                *(
+                    Prefetch(path, queryset=shape.get_queryset())
+                    for path, shape in self.prefetch_related.items()
+                )
+            )
+        return queryset
+
+    def __repr__(self):
+        return (
+            f"<QuerysetShape {self.model.__name__} "
+            f"select={self.select_related} prefetch={self.prefetch_related}>"
+        )
+
+
+def get_relation(model, name):
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.is_relation:
+        return None
+    return model_field
+
+
+def join_path(prefix, name):
+    return f"{prefix}__{name}" if prefix else name
+
+
+def shape_serializer(serializer, shape, prefix=""):
+    """Collect relations used by serializer fields into shape (relative to prefix)"""
+    model = serializer.Meta.model
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        # dotted sources: join to-one relations up to the last one
+        path = prefix
+        field_model = model
+        model_field = None
+        for attr in field.source_attrs:
+            model_field = get_relation(field_model, attr)
+            if model_field is None:
+                break
+            path = join_path(path, attr)
+            if model_field.many_to_many or model_field.one_to_many:
+                break
+            field_model = model_field.related_model
+            if attr != field.source_attrs[-1]:
+                shape.add_select(path)
+        if model_field is None:
+            continue
+
+        related_model = model_field.related_model
+        is_many = model_field.many_to_many or model_field.one_to_many
+
+        if isinstance(field, serializers.ListSerializer) and is_many:
+            child_shape = shape.add_prefetch(path, related_model)
+            if isinstance(field.child, serializers.ModelSerializer):
+                shape_serializer(field.child, child_shape)
+
+        elif isinstance(field, relations.ManyRelatedField) and is_many:
+            child_shape = shape.add_prefetch(path, related_model)
+            for extra in getattr(field.child_relation, "select_related", ()):
+                child_shape.add_select(extra)
+            hook = getattr(field.child_relation, "shape_queryset", None)
+            if hook is not None:
+                child_shape.add_hook(hook)
+
+        elif isinstance(field, serializers.ModelSerializer) and not is_many:
+            shape.add_select(path)
+            shape_serializer(field, shape, path)
+
+        elif isinstance(field, relations.RelatedField) and not is_many:
+            if not field.use_pk_only_optimization():
+                shape.add_select(path)
+            for extra in getattr(field, "select_related", ()):
+                shape.add_select(join_path(path, extra))
+
+
+@functools.lru_cache(maxsize=None)
+def get_queryset_shape(serializer_class) -> QuerysetShape:
+    """Shape for serializer class (computed once per class)"""
+    shape = QuerysetShape(serializer_class.Meta.model)
+    shape_serializer(serializer_class(), shape)
+    return shape
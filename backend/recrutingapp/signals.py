@@ -0,0 +1,146 @@
+"""
+Signal receivers for in-process caches
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from recrutingapp.cvskills import (
+    cv_saved,
+    cvs_transitioned,
+    employee_skills_changed as cv_employee_skills_changed,
+)
+from recrutingapp.events import (
+    STREAM_MODELS,
+    publish_message,
+    publish_status,
+    publish_transitions,
+)
+from recrutingapp.favorites import favorite_changed
+from recrutingapp.geo import city_index
+from recrutingapp.matching import (
+    document_saved,
+    documents_transitioned,
+    employee_saved,
+    experience_saved,
+    employee_skills_changed as matching_employee_skills_changed,
+    skill_saved as matching_skill_saved,
+)
+from recrutingapp.models import (
+    CV,
+    City,
+    CVExperience,
+    DocumentMessage,
+    Employee,
+    Favorite,
+    Skill,
+    Vacancy,
+)
+from recrutingapp.moderation import QUEUE_MODELS, release_leases
+from recrutingapp.reference import REFERENCE_MODELS, reference_bundle
+from recrutingapp.suggest import employee_skills_changed, skill_deleted, skill_saved
+from recrutingapp.workflow import document_transitioned
+
+
+def connect_signals():
+    for model in REFERENCE_MODELS:
+        post_save.connect(
+            reference_bundle.invalidate,
+            sender=model,
+            dispatch_uid=f"reference_save_{model.__name__}",
+        )
+        post_delete.connect(
+            reference_bundle.invalidate,
+            sender=model,
+            dispatch_uid=f"reference_delete_{model.__name__}",
+        )
+    post_save.connect(city_index.invalidate, sender=City, dispatch_uid="geo_city_save")
+    post_delete.connect(
+        city_index.invalidate, sender=City, dispatch_uid="geo_city_delete"
+    )
+    for model in (CV, Vacancy):
+        post_save.connect(
+            document_saved,
+            sender=model,
+            dispatch_uid=f"matching_save_{model.__name__}",
+        )
+        post_delete.connect(
+            document_saved,
+            sender=model,
+            dispatch_uid=f"matching_delete_{model.__name__}",
+        )
+        document_transitioned.connect(
+            documents_transitioned,
+            sender=model,
+            dispatch_uid=f"matching_transition_{model.__name__}",
+        )
+    post_save.connect(
+        experience_saved,
+        sender=CVExperience,
+        dispatch_uid="matching_save_CVExperience",
+    )
+    post_delete.connect(
+        experience_saved,
+        sender=CVExperience,
+        dispatch_uid="matching_delete_CVExperience",
+    )
+    post_save.connect(
+        employee_saved,
+        sender=Employee,
+        dispatch_uid="matching_save_Employee",
+    )
+    m2m_changed.connect(
+        matching_employee_skills_changed,
+        sender=Employee.skills.through,
+        dispatch_uid="matching_employee_skills",
+    )
+    post_save.connect(
+        matching_skill_saved, sender=Skill, dispatch_uid="matching_save_Skill"
+    )
+    post_delete.connect(
+        matching_skill_saved, sender=Skill, dispatch_uid="matching_delete_Skill"
+    )
+    post_save.connect(skill_saved, sender=Skill, dispatch_uid="suggest_skill_save")
+    post_delete.connect(
+        skill_deleted, sender=Skill, dispatch_uid="suggest_skill_delete"
+    )
+    m2m_changed.connect(
+        employee_skills_changed,
+        sender=Employee.skills.through,
+        dispatch_uid="suggest_employee_skills",
+    )
+    post_save.connect(cv_saved, sender=CV, dispatch_uid="cvskills_cv_save")
+    post_delete.connect(cv_saved, sender=CV, dispatch_uid="cvskills_cv_delete")
+    document_transitioned.connect(
+        cvs_transitioned, sender=CV, dispatch_uid="cvskills_cv_transition"
+    )
+    m2m_changed.connect(
+        cv_employee_skills_changed,
+        sender=Employee.skills.through,
+        dispatch_uid="cvskills_employee_skills",
+    )
+    post_save.connect(
+        publish_message,
+        sender=DocumentMessage,
+        dispatch_uid="events_message",
+    )
+    for model in STREAM_MODELS:
+        post_save.connect(
+            publish_status,
+            sender=model,
+            dispatch_uid=f"events_status_{model.__name__}",
+        )
+        document_transitioned.connect(
+            publish_transitions,
+            sender=model,
+            dispatch_uid=f"events_transition_{model.__name__}",
+        )
+    for model in QUEUE_MODELS.values():
+        document_transitioned.connect(
+            release_leases,
+            sender=model,
+            dispatch_uid=f"moderation_transition_{model.__name__}",
+        )
+    post_save.connect(favorite_changed, sender=Favorite, dispatch_uid="favorites_save")
+    post_delete.connect(
+        favorite_changed, sender=Favorite, dispatch_uid="favorites_delete"
+    )
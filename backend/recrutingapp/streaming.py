@@ -0,0 +1,188 @@
+"""
+Server-Sent Events streams of response chats (ASGI only).
+
+GET /api/v<version>/protected/<cv-responses|vacancy-responses>/<id>/events/
+is served by EventStreamApp (config.asgi) without blocking a worker thread,
+other requests are passed to Django. The stream is authorized once by the
+response viewset: authentication, queryset and object permissions are the
+same as for reading the response. Browsers' EventSource can't send headers,
+so the stream takes short-lived 'ticket' query parameter issued for its path
+by GET <id>/events-ticket/ (userapp.authentication.StreamTicket).
+Streams are closed after STREAM_SECONDS, clients reconnect and are
+authorized again.
+"""
+
+import asyncio
+import io
+import json
+import re
+
+from asgiref.sync import sync_to_async
+from corsheaders.middleware import CorsMiddleware
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from recrutingapp.events import get_broker, get_channel
+from recrutingapp.views import CVResponseViewSet, VacancyResponseViewSet
+from userapp.authentication import StreamTicketAuthentication
+
+STREAM_PATH_RE = re.compile(
+    r"^/api/v(?P<version>1\.0|2\.1)/protected/"
+    r"(?P<prefix>cv-responses|vacancy-responses)/(?P<pk>\d+)/events/$"
+)
+
+STREAM_VIEWSETS = {
+    "cv-responses": CVResponseViewSet,
+    "vacancy-responses": VacancyResponseViewSet,
+}
+
+STREAM_ACTION = "events"
+
+KEEPALIVE_SECONDS = 15
+STREAM_SECONDS = 300
+# client reconnect delay
+RETRY_MS = 3000
+
+
+def format_event(event) -> bytes:
+    data = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8")
+
+
+def get_cors_headers(request) -> list:
+    response = CorsMiddleware(lambda request: HttpResponse())(request)
+    return [
+        (name, value)
+        for name, value in response.items()
+        if name.lower().startswith("access-control-")
+    ]
+
+
+def authorize(scope, match):
+    """
+    (rejected response, None) or (None, (document channel, CORS headers))
+    """
+    close_old_connections()
+    try:
+        request = ASGIRequest(scope, io.BytesIO())
+        view = STREAM_VIEWSETS[match["prefix"]]()
+        view.authentication_classes = [StreamTicketAuthentication] + list(
+            view.authentication_classes
+        )
+        view.action_map = {"get": STREAM_ACTION}
+        view.detail = True
+        view.args = ()
+        view.kwargs = {"version": match["version"], "pk": match["pk"]}
+        view.headers = {}
+        view.format_kwarg = None
+        view.request = view.initialize_request(request, **view.kwargs)
+        try:
+            view.initial(view.request, **view.kwargs)
+            instance = view.get_object()
+        except Exception as exc:
+            response = view.finalize_response(view.request, view.handle_exception(exc))
+            response.render()
+            return response, None
+        return None, (get_channel(instance), get_cors_headers(request))
+    finally:
+        close_old_connections()
+
+
+async def wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+class EventStreamApp:
+    """ASGI application: event streams or Django application"""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = None
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = STREAM_PATH_RE.match(scope["path"])
+        if match is None:
+            return await self.application(scope, receive, send)
+
+        rejected, stream = await sync_to_async(authorize)(scope, match)
+        if rejected is not None:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": rejected.status_code,
+                    "headers": [
+                        (name.encode("latin1"), value.encode("latin1"))
+                        for name, value in rejected.items()
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": rejected.content})
+            return
+
+        channel, headers = stream
+        await self.stream(channel, headers, receive, send)
+
+    async def stream(self, channel, headers, receive, send):
+        broker = get_broker()
+        subscription = broker.subscribe(channel)
+        headers = [
+            ("Content-Type", "text/event-stream; charset=utf-8"),
+            ("Cache-Control", "no-cache"),
+            # no proxy buffering (nginx)
+            ("X-Accel-Buffering", "no"),
+        ] + headers
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STREAM_SECONDS
+        disconnect = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (name.encode("latin1"), value.encode("latin1"))
+                        for name, value in headers
+                    ],
+                }
+            )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": f"retry: {RETRY_MS}\n\n".encode("utf-8"),
+                    "more_body": True,
+                }
+            )
+            while not disconnect.done():
+                timeout = min(KEEPALIVE_SECONDS, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                get = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    {get, disconnect},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if get in done:
+                    event = get.result()
+                    if event is None:
+                        break
+                    body = format_event(event)
+                else:
+                    get.cancel()
+                    if disconnect.done():
+                        break
+                    body = b": keepalive\n\n"
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": True}
+                )
+        finally:
+            broker.unsubscribe(subscription)
+            disconnected = disconnect.done()
+            disconnect.cancel()
+        if not disconnected:
+            await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,153 @@
+"""
+Skill name suggestions (autocomplete).
+
+SkillIndex keeps skill names sorted by lower-cased name with usage counts
+(employees with the skill), so names with a prefix are one bisect range and
+the most used of them are taken by numpy partition, no LIKE query per
+keystroke. The index is a ProcessCache (recrutingapp.processcache), new
+skills and changes of employee skills are applied to it incrementally after
+commit by signal receivers (recrutingapp.signals).
+"""
+
+import bisect
+import threading
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+
+from recrutingapp.models import Skill
+from recrutingapp.processcache import ProcessCache
+
+INDEX_TTL = 300
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 50
+
+# greater than any character of prefix
+KEY_END = "\U0010ffff"
+
+
+def get_key(name) -> tuple:
+    return (name.lower(), name)
+
+
+class SkillIndex:
+    """Sorted skill names with usage counts"""
+
+    def __init__(self, skills):
+        """skills: (pk, name, usage count)"""
+        entries = sorted((get_key(name), count) for _, name, count in skills)
+        # keys and counts are replaced together, readers take both at once
+        self.state = (
+            [key for key, _ in entries],
+            np.array([count for _, count in entries], dtype=np.int64),
+        )
+        self.names = {pk: name for pk, name, _ in skills}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def suggest(self, prefix, limit=SUGGEST_LIMIT) -> list:
+        """Skills with name prefix (case insensitive), most used first"""
+        keys, counts = self.state
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(keys, (prefix,))
+        hi = bisect.bisect_left(keys, (prefix + KEY_END,), lo)
+        window = counts[lo:hi]
+        if len(window) > limit:
+            # counts above the limit-th largest and the first names with it
+            threshold = np.partition(window, len(window) - limit)[-limit]
+            above = np.flatnonzero(window > threshold)
+            ties = np.flatnonzero(window == threshold)[: limit - len(above)]
+            top = np.concatenate((above, ties))
+        else:
+            top = np.arange(len(window))
+        top = sorted(top.tolist(), key=lambda i: (-window[i], i))
+        return [{"name": keys[lo + i][1], "count": int(window[i])} for i in top]
+
+    def add_skills(self, skills):
+        """New skills: (pk, name)"""
+        with self.lock:
+            skills = [(pk, name) for pk, name in skills if pk not in self.names]
+            if not skills:
+                return
+            keys, counts = self.state
+            new_keys = sorted(get_key(name) for _, name in skills)
+            # positions in current keys, new counts are inserted at once
+            positions = [bisect.bisect_left(keys, key) for key in new_keys]
+            keys = list(keys)
+            for offset, (position, key) in enumerate(zip(positions, new_keys)):
+                keys.insert(position + offset, key)
+            self.names.update(skills)
+            self.state = (keys, np.insert(counts, positions, 0))
+
+    def add_usage(self, pks, delta):
+        """Usage count of skills is changed by delta"""
+        with self.lock:
+            keys, counts = self.state
+            for pk in pks:
+                name = self.names.get(pk)
+                if name is not None:
+                    position = bisect.bisect_left(keys, get_key(name))
+                    counts[position] = max(counts[position] + delta, 0)
+
+
+def build_skill_index() -> SkillIndex:
+    skills = Skill.objects.annotate(usage=Count("skills")).values_list(
+        "pk", "name", "usage"
+    )
+    return SkillIndex(list(skills.iterator()))
+
+
+skill_index = ProcessCache(build_skill_index, INDEX_TTL)
+
+
+def skill_saved(sender, instance, created, **kwargs):
+    """Signal receiver: saved Skill"""
+    if skill_index.peek() is None:
+        return
+    if created:
+        skills = [(instance.pk, instance.name)]
+        transaction.on_commit(lambda: update_skills(skills))
+    else:
+        # renamed
+        skill_index.invalidate()
+
+
+def skill_deleted(sender, instance, **kwargs):
+    """Signal receiver: deleted Skill"""
+    skill_index.invalidate()
+
+
+def update_skills(skills):
+    index = skill_index.peek()
+    if index is not None:
+        index.add_skills(skills)
+
+
+def update_usage(pks, delta):
+    index = skill_index.peek()
+    if index is None:
+        return
+    # skills created by bulk insert (no post_save)
+    unknown = [pk for pk in pks if pk not in index.names]
+    if unknown:
+        index.add_skills(Skill.objects.filter(pk__in=unknown).values_list("pk", "name"))
+    index.add_usage(pks, delta)
+
+
+def employee_skills_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Signal receiver: m2m_changed of Employee.skills"""
+    if skill_index.peek() is None:
+        return
+    if action in ("post_add", "post_remove"):
+        delta = 1 if action == "post_add" else -1
+        if reverse:
+            # skill.skills.add(*employees)
+            pks, delta = [instance.pk], delta * len(pk_set)
+        else:
+            pks = list(pk_set)
+        transaction.on_commit(lambda: update_usage(pks, delta))
+    elif action == "post_clear":
+        skill_index.invalidate()
@@ -2,7 +2,20 @@
 Tests of /account/ url path viewsets from userapp
 """
 
+import asyncio
 import datetime
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from dateutil.relativedelta import relativedelta
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import (
     APITestCase,
@@ -13,19 +26,48 @@ from recrutingapp.models import (
     CVResponse,
     City,
     ConstDocumentStatus,
+    DocumentMessage,
     DocumentStatus,
+    DocumentTransition,
     Employee,
     Employer,
+    Favorite,
     Gender,
+    ModerationLease,
     NewsPost,
     NewsTag,
+    Skill,
     Vacancy,
     VacancyResponse,
 )
+from recrutingapp.benchmark import EndpointBenchmark, compare
+from recrutingapp.cvskills import (
+    MAX_SEARCH_SKILLS,
+    CVSkillIndex,
+    cv_skill_index,
+)
+from recrutingapp.datagen import DataGenerator
+from recrutingapp.experience import update_current_experience
+from recrutingapp.favorites import FavoriteCache
+from recrutingapp.geo import MAX_RADIUS, CityIndex, city_index
+from recrutingapp.permissions import VacancyResponsePermission
+from recrutingapp.reference import reference_bundle
+from recrutingapp.matching import (
+    CANDIDATE_WEIGHTS,
+    CORPORA,
+    MatchCorpus,
+    MatchDocument,
+    clear_corpus,
+)
+from recrutingapp.serializers import EMBEDDED_MESSAGES, resolve_skills
+from recrutingapp.streaming import EventStreamApp
+from recrutingapp.suggest import skill_index
+from recrutingapp.workflow import TransitionConflict, move_document, move_documents
+from userapp.authentication import StreamTicket
 from userapp.models import CustomUser, UserRoles
+from userapp.serializers import ClaimsTokenObtainPairSerializer
 from userapp.utils import UserGroupUtils, UserUtils
 
-
 FIXTURES = ["test_users.json", "test_data.json"]
 
 
@@ -1879,3 +1921,1588 @@ class TestVacancyResponseViewSets(RecrutingTestCase):
     def tearDown(self) -> None:
         self.client.logout()
         return super().tearDown()
+
+
+class TestSearch(RecrutingTestCase):
+    """
+    Full-text search (q parameter) test.
+    """
+
+    def setUp(self) -> None:
+        self.url_cv = "/api/v1.0/protected/cvs/"
+        self.url_vacancy = "/api/v1.0/protected/vacancies/"
+        return super().setUp()
+
+    def test_cv_search(self) -> None:
+        self.client.force_login(self.tu_employee)
+        data = dict(TestCVViewSets.test_data)
+        data["experience"] = [
+            dict(data["experience"][0], content="Highload kubernetes cluster")
+        ]
+        response = self.client.post(self.url_cv, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        new_id = response.data.get("id")
+        self.assertIn("kubernetes", CV.objects.get(id=new_id).search_document)
+
+        for query in ("kubernetes", '"highload kubernetes"', "kuber*"):
+            response = self.client.get(self.url_cv, {"q": query}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids = [item["id"] for item in response.data.get("results")]
+            self.assertEqual(ids, [new_id], query)
+
+        response = self.client.get(self.url_cv, {"q": "kubernetes absent"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data.get("results")), 0)
+        self.client.logout()
+
+    def test_vacancy_search(self) -> None:
+        self.client.force_login(self.tu_employee)
+        vacancy = Vacancy.objects.filter(status=ConstDocumentStatus.approved).first()
+        word = vacancy.position.split()[0]
+
+        response = self.client.get(self.url_vacancy, {"q": word}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [item["id"] for item in response.data.get("results")]
+        self.assertIn(vacancy.id, ids)
+        self.client.logout()
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestKeysetPagination(RecrutingTestCase):
+    """
+    Cursor pagination test (public news list).
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/public/news/"
+        return super().setUp()
+
+    def test_cursor_pages(self) -> None:
+        response = self.client.get(self.url, {"limit": 100}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("pagination"), "offset")
+        expected_ids = [item["id"] for item in response.data.get("results")]
+        self.assertTrue(len(expected_ids) > 2)
+
+        ids = []
+        pages = []
+        url = self.url + "?pagination=cursor&limit=2"
+        while url:
+            response = self.client.get(url, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data.get("pagination"), "cursor")
+            self.assertNotIn("count", response.data)
+            pages.append(response.data)
+            ids += [item["id"] for item in response.data.get("results")]
+            url = response.data.get("next")
+        self.assertEqual(ids, expected_ids)
+
+        # back from the last page
+        response = self.client.get(pages[-1]["previous"], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get("results"), pages[-2]["results"])
+
+        response = self.client.get(self.url, {"cursor": "invalid"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_ranked_cursor(self) -> None:
+        url = "/api/v1.0/protected/cvs/"
+        self.client.force_login(self.tu_employer)
+        params = {"skills_any": "Django", "skills_rank": True}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, dict(params, pagination="cursor"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.logout()
+
+
+class TestQuerysetShaping(RecrutingTestCase):
+    """
+    Nested serialization query count test.
+    """
+
+    def assert_constant_queries(self, user, url, max_queries) -> None:
+        self.client.force_login(user)
+        # warm up content types cache
+        self.client.get(url, format="json")
+        counts = []
+        for limit in (1, 100):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, {"limit": limit}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1], url)
+        self.assertLessEqual(counts[1], max_queries, url)
+        self.client.logout()
+
+    def test_list_queries(self) -> None:
+        CV.objects.update(status=ConstDocumentStatus.approved)
+        Vacancy.objects.update(status=ConstDocumentStatus.approved)
+        self.assertTrue(CV.objects.count() > 1)
+
+        # session, user, permissions, count, page + one query per to-many relation
+        self.assert_constant_queries(
+            self.tu_employer, "/api/v1.0/protected/cvs/", max_queries=10
+        )
+        self.assert_constant_queries(
+            self.tu_employee, "/api/v1.0/protected/vacancies/", max_queries=7
+        )
+        self.assert_constant_queries(
+            self.tu_employee, "/api/v1.0/protected/vacancy-responses/", max_queries=10
+        )
+
+
+class TestInstrumentation(RecrutingTestCase):
+    """
+    Server-Timing header and metrics log test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        return super().setUp()
+
+    def test_metrics(self) -> None:
+        self.client.force_login(self.tu_employer)
+        with self.assertLogs("recrutingapp.instrumentation", "INFO") as logs:
+            response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("render;dur=", response["Server-Timing"])
+
+        record = logs.records[-1]
+        self.assertEqual(record.view, "CVViewSet.list")
+        self.assertEqual(record.status, status.HTTP_200_OK)
+        self.assertTrue(record.queries > 0)
+
+    @override_settings(INSTRUMENTATION={"SAMPLE_RATE": 0})
+    def test_not_sampled(self) -> None:
+        self.client.force_login(self.tu_employer)
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestReferenceViewSet(RecrutingTestCase):
+    """
+    Reference data bundle test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/reference/"
+        return super().setUp()
+
+    def test_bundle(self) -> None:
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_login(self.tu_employee)
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(response["ETag"], f'"{data["version"]}"')
+        self.assertEqual(len(data["cities"]), City.objects.count())
+        for key in ("regions", "genders", "statuses", "skills"):
+            self.assertTrue(len(data[key]) > 0, key)
+
+        etag = response["ETag"]
+        with self.assertNumQueries(2):  # session, user
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # changes (e.g. in admin) invalidate bundle
+        Gender.objects.create(id="x", name="test")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertIn("test", [g["name"] for g in response.json()["genders"]])
+
+        # skills added by bulk insert of CV and employee writes
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_skills(["Reference skill"])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        skills = [skill["name"] for skill in response.json()["skills"]]
+        self.assertIn("Reference skill", skills)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestConditionalGet(RecrutingTestCase):
+    """
+    ETag/Last-Modified test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        CV.objects.update(status=ConstDocumentStatus.approved)
+        return super().setUp()
+
+    def test_detail(self) -> None:
+        self.client.force_login(self.tu_employer)
+        cv = CV.objects.first()
+        url = self.get_url_detail(self.url, cv.id)
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["ETag"].startswith("W/"))
+        self.assertTrue(response.has_header("Last-Modified"))
+        etag = response["ETag"]
+
+        # session, user, object with joins - no prefetch and serialization
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # nested object changed
+        cv.employee.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list(self) -> None:
+        self.client.force_login(self.tu_employer)
+        response = self.client.get(self.url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # other page
+        response = self.client.get(self.url, {"offset": 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # favorites are rendered in list
+        cv = CV.objects.first()
+        self.client.post(self.get_url_favorite(self.url, cv.id))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response["ETag"]
+        cv.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestImport(RecrutingTestCase):
+    """
+    Bulk import test.
+    """
+
+    def setUp(self) -> None:
+        self.url_cv = "/api/v1.0/protected/cvs/import/"
+        self.url_vacancy = "/api/v1.0/protected/vacancies/import/"
+        return super().setUp()
+
+    @staticmethod
+    def get_report(response) -> list:
+        content = b"".join(response.streaming_content).decode("utf-8")
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_vacancies_jsonl(self) -> None:
+        rows = [
+            dict(TestVacancyViewSets.test_data, title="import 1"),
+            dict(TestVacancyViewSets.test_data, title="import 2", city="Москва"),
+            dict(TestVacancyViewSets.test_data, city="unknown"),
+        ]
+        content = "\n".join(json.dumps(row) for row in rows) + "\n{broken\n"
+        upload = SimpleUploadedFile("vacancies.jsonl", content.encode("utf-8"))
+
+        self.client.force_login(self.tu_employee)
+        response = self.client.post(self.url_vacancy, {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(self.tu_employer)
+        upload.seek(0)
+        response = self.client.post(self.url_vacancy, {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = self.get_report(response)
+        self.assertEqual([r["line"] for r in report[:-1]], [3, 4])
+        self.assertIn("city", report[0]["errors"])
+        self.assertEqual(report[-1], {"imported": 2, "failed": 2})
+
+        vacancies = Vacancy.objects.filter(title__startswith="import")
+        self.assertEqual(vacancies.count(), 2)
+        for vacancy in vacancies:
+            self.assertEqual(vacancy.owner, self.tu_employer)
+            self.assertEqual(vacancy.employer.owner, self.tu_employer)
+            self.assertEqual(vacancy.status_id, ConstDocumentStatus.draft)
+
+    def test_cvs_csv(self) -> None:
+        content = (
+            "title,position,salary,description\n"
+            "import,developer,1000,text\n"
+            "import,,1000,text\n"
+        )
+        upload = SimpleUploadedFile("cvs.csv", content.encode("utf-8"))
+        self.client.force_login(self.tu_employee)
+        response = self.client.post(self.url_cv, {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = self.get_report(response)
+        self.assertEqual(report[0]["line"], 3)
+        self.assertIn("position", report[0]["errors"])
+        self.assertEqual(report[-1], {"imported": 1, "failed": 1})
+        self.assertEqual(CV.objects.filter(title="import").count(), 1)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestDataGenerator(RecrutingTestCase):
+    """
+    Synthetic data generator test.
+    """
+
+    def test_generate(self) -> None:
+        cv_count = CV.objects.count()
+        counts = DataGenerator(200, seed=1).run()
+        self.assertEqual(counts[CV._meta.db_table], 200)
+        self.assertEqual(CV.objects.count(), cv_count + 200)
+        for model in (Vacancy, CVResponse, VacancyResponse, Employer, Employee):
+            self.assertTrue(counts[model._meta.db_table] > 0, model)
+        for role in UserRoles:
+            self.assertTrue(
+                CustomUser.objects.filter(
+                    role=role.value, username__startswith="gen_"
+                ).exists()
+            )
+
+        # sequences continue after generated ids
+        user = CustomUser.objects.filter(username__startswith="gen_employer").first()
+        employer = Employer.objects.get(owner=user)
+        vacancy = Vacancy.objects.create(
+            owner=user,
+            updated_by=user,
+            employer=employer,
+            title="after",
+            city_id=employer.city_id,
+            position="after",
+            salary=1,
+            description="",
+        )
+        self.assertTrue(vacancy.pk > counts[Vacancy._meta.db_table])
+
+        # generated users can sign in
+        self.assertTrue(self.client.login(username=user.username, password="password"))
+        response = self.client.get("/api/v1.0/protected/cvs/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.logout()
+
+
+class TestEndpointBenchmark(RecrutingTestCase):
+    """
+    Endpoint benchmark test.
+    """
+
+    def test_benchmark(self) -> None:
+        from config.urls import router
+
+        key = FavoriteCache.get_key(self.tu_employer.pk, 0)
+        cache.set(key, frozenset([1]))
+        results = EndpointBenchmark(router, repeat=2, seed=1).run([20])
+        metrics = results["20:employer:protected/cvs:list"]
+        self.assertEqual(metrics["status"], status.HTTP_200_OK)
+        self.assertTrue(metrics["queries"] > 0)
+        self.assertIn("20:employer:protected/cvs:retrieve", results)
+        self.assertEqual(
+            results["20:anonymous:protected/cvs:list"]["status"],
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        # generated data is rolled back
+        self.assertFalse(
+            CustomUser.objects.filter(username__startswith="gen_").exists()
+        )
+        # with caches built from it
+        self.assertIsNone(reference_bundle.peek())
+        self.assertIsNone(CORPORA[CV].peek())
+        self.assertIsNone(cache.get(key))
+
+        self.assertEqual(compare(results, results), [])
+        slower = {key: dict(value) for key, value in results.items()}
+        slower["20:employer:protected/cvs:list"]["queries"] += 1
+        slower["20:employer:protected/cvs:list"]["p95_ms"] *= 10
+        slower["20:employer:protected/cvs:list"]["p95_ms"] += 100
+        regressions = compare(slower, results)
+        self.assertEqual(len(regressions), 2)
+        budgets = {"queries": 1, "time_ratio": 20, "min_ms": 1000}
+        self.assertEqual(compare(slower, results, budgets), [])
+
+
+class TestMatching(RecrutingTestCase):
+    """
+    CV and vacancy matching test.
+    """
+
+    def setUp(self) -> None:
+        clear_corpus()
+        return super().setUp()
+
+    def test_rank(self) -> None:
+        corpus = MatchCorpus(
+            CV,
+            [
+                MatchDocument(1, 1, 1, 900, [1, 2], ["python", "developer"], 60),
+                MatchDocument(2, 2, 1, 2000, [1], ["python", "developer"], 12),
+                MatchDocument(3, 3, 2, 1000, [], ["designer"], 0),
+            ],
+        )
+        vacancy = MatchDocument(10, 1, 1, 1000, [1, 2], ["python", "developer"])
+        ranked = corpus.rank(vacancy, CANDIDATE_WEIGHTS, limit=2)
+        self.assertEqual([pk for pk, _, _ in ranked], [1, 2])
+        pk, score, scores = ranked[0]
+        self.assertEqual(score, 1.0)
+        scores = ranked[1][2]
+        self.assertEqual(scores["skills"], 0.5)
+        self.assertEqual(scores["location"], 0.5)
+        self.assertEqual(scores["salary"], 0.0)
+        self.assertEqual(scores["position"], 1.0)
+        self.assertEqual(scores["experience"], 0.2)
+
+    def test_actions(self) -> None:
+        DataGenerator(100, seed=1).run()
+        vacancy = Vacancy.objects.filter(
+            owner__username__startswith="gen_employer"
+        ).first()
+        url = f"/api/v1.0/protected/vacancies/{vacancy.id}/candidates/"
+
+        self.client.force_login(self.tu_employer)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_login(vacancy.owner)
+        response = self.client.get(url, {"limit": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"limit": 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        scores = [item["match"]["score"] for item in response.data]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        ids = [item["id"] for item in response.data]
+        self.assertEqual(
+            CV.objects.filter(id__in=ids, status=ConstDocumentStatus.approved).count(),
+            5,
+        )
+
+        # corpus is older than status change, skill names are kept with it
+        CV.objects.filter(id=ids[1]).update(status=ConstDocumentStatus.draft)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {"limit": 5})
+        self.assertNotIn(ids[1], [item["id"] for item in response.data])
+        # whole skill table (skills of CVs are prefetched by id)
+        table = Skill._meta.db_table
+        self.assertFalse(
+            any(query["sql"].endswith(f'FROM "{table}"') for query in context)
+        )
+
+        cv = CV.objects.get(id=ids[0])
+        url = f"/api/v1.0/protected/cvs/{cv.id}/matches/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_login(cv.owner)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(len(response.data) > 0)
+        self.assertIn("skills", response.data[0]["match"])
+
+    def test_invalidation(self) -> None:
+        DataGenerator(20, seed=1).run()
+        employee = Employee.objects.filter(owner__username__startswith="gen_").first()
+        CV.objects.filter(employee=employee).update(status=ConstDocumentStatus.draft)
+        corpus = CORPORA[CV]
+        corpus.get()
+        cv = CV.objects.filter(status=ConstDocumentStatus.approved).first()
+        self.assertIn(cv.pk, corpus.peek())
+
+        # drafts, new skills and profiles without approved CVs
+        draft = CV.objects.exclude(status=ConstDocumentStatus.approved).first()
+        draft.title = "draft"
+        draft.save()
+        resolve_skills(["Matching skill"])
+        Skill.objects.create(name="Matching skill 2")
+        employee.save()
+        employee.skills.add(Skill.objects.first())
+        self.assertFalse(corpus.is_expired)
+
+        # approved document rows
+        cv.employee.save()
+        self.assertTrue(corpus.is_expired)
+        corpus.clear()
+        corpus.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            move_document(cv, ConstDocumentStatus.draft, cv.owner)
+        self.assertTrue(corpus.is_expired)
+
+    def tearDown(self) -> None:
+        clear_corpus()
+        return super().tearDown()
+
+
+class TestEventStream(RecrutingTestCase):
+    """
+    Response chat event stream test.
+    """
+
+    def setUp(self) -> None:
+        self.response = VacancyResponse.objects.get(pk=2)
+        self.path = f"/api/v1.0/protected/vacancy-responses/{self.response.pk}/events/"
+        return super().setUp()
+
+    def get_ticket(self, user) -> str:
+        self.client.force_login(user)
+        response = self.client.get(self.path.replace("/events/", "/events-ticket/"))
+        self.client.logout()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["ticket"]
+
+    def get_scope(self, ticket=None) -> dict:
+        query = b""
+        if ticket is not None:
+            query = f"ticket={ticket}".encode("latin1")
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": self.path,
+            "query_string": query,
+            "headers": [(b"host", b"testserver")],
+        }
+
+    async def run_stream(self, scope, publish=None) -> list:
+        """Sent ASGI messages, publish is called when stream is open"""
+        sent = []
+        received = asyncio.Queue()
+        opened = asyncio.Event()
+
+        async def send(message):
+            sent.append(message)
+            if message.get("more_body"):
+                opened.set()
+
+        app = asyncio.ensure_future(EventStreamApp(None)(scope, received.get, send))
+        await asyncio.wait(
+            {app, asyncio.ensure_future(opened.wait())},
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if opened.is_set():
+            await sync_to_async(publish)()
+            for _ in range(100):
+                if len(sent) > 3:
+                    break
+                await asyncio.sleep(0.01)
+            await received.put({"type": "http.disconnect"})
+        await app
+        return sent
+
+    def test_stream(self) -> None:
+        sent = async_to_sync(self.run_stream)(self.get_scope())
+        self.assertEqual(sent[0]["status"], status.HTTP_401_UNAUTHORIZED)
+
+        # tickets are issued to users who can read the response
+        self.client.force_login(self.tu_moderator)
+        response = self.client.get(self.path.replace("/events/", "/events-ticket/"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.logout()
+        ticket = StreamTicket.for_path(self.tu_moderator, self.path)
+        sent = async_to_sync(self.run_stream)(self.get_scope(ticket))
+        self.assertEqual(sent[0]["status"], status.HTTP_404_NOT_FOUND)
+
+        # ticket is valid for its path only, access tokens are not taken
+        ticket = StreamTicket.for_path(self.tu_employee, self.path + "other/")
+        sent = async_to_sync(self.run_stream)(self.get_scope(ticket))
+        self.assertEqual(sent[0]["status"], status.HTTP_401_UNAUTHORIZED)
+        token = ClaimsTokenObtainPairSerializer.get_token(self.tu_employee)
+        sent = async_to_sync(self.run_stream)(self.get_scope(token.access_token))
+        self.assertEqual(sent[0]["status"], status.HTTP_401_UNAUTHORIZED)
+
+        def publish():
+            with self.captureOnCommitCallbacks(execute=True):
+                DocumentMessage.objects.create(
+                    sender=self.tu_employer,
+                    content_type=ContentType.objects.get_for_model(VacancyResponse),
+                    object_id=self.response.pk,
+                    content="hello",
+                )
+                self.response.status_info = "info"
+                self.response.save()
+
+        ticket = self.get_ticket(self.tu_employee)
+        sent = async_to_sync(self.run_stream)(self.get_scope(ticket), publish)
+        self.assertEqual(sent[0]["status"], status.HTTP_200_OK)
+        self.assertIn(
+            (b"Content-Type", b"text/event-stream; charset=utf-8"), sent[0]["headers"]
+        )
+        body = b"".join(message.get("body", b"") for message in sent[1:])
+        events = [
+            block.split("\n")
+            for block in body.decode("utf-8").split("\n\n")
+            if block.startswith("event:")
+        ]
+        self.assertEqual(
+            [lines[0] for lines in events], ["event: message", "event: status"]
+        )
+        message = json.loads(events[0][1][len("data: ") :])
+        self.assertEqual(message["content"], "hello")
+        self.assertEqual(message["sender"], UserRoles.employer.value)
+        event = json.loads(events[1][1][len("data: ") :])
+        self.assertEqual(event["status_info"], "info")
+
+
+class TestMessageHistory(RecrutingTestCase):
+    """
+    Response message history test.
+    """
+
+    def setUp(self) -> None:
+        self.response = VacancyResponse.objects.get(pk=2)
+        self.url = "/api/v1.0/protected/vacancy-responses/"
+        content_type = ContentType.objects.get_for_model(VacancyResponse)
+        DocumentMessage.objects.filter(
+            content_type=content_type, object_id=self.response.pk
+        ).delete()
+        start = timezone.now() - datetime.timedelta(hours=1)
+        self.messages = DocumentMessage.objects.bulk_create(
+            DocumentMessage(
+                content_type=content_type,
+                object_id=self.response.pk,
+                sender=self.tu_employer,
+                content=f"message {i}",
+            )
+            for i in range(EMBEDDED_MESSAGES + 10)
+        )
+        for i, message in enumerate(self.messages):
+            message.created_at = start + datetime.timedelta(minutes=i)
+        DocumentMessage.objects.bulk_update(self.messages, ["created_at"])
+        return super().setUp()
+
+    def test_history(self) -> None:
+        url = self.get_url_message(self.url, self.response.pk)
+        self.client.force_login(self.tu_employee)
+        response = self.client.get(url, {"limit": 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        contents = [message["content"] for message in response.data["results"]]
+        count = len(self.messages)
+        self.assertEqual(
+            contents, [f"message {i}" for i in range(count - 1, count - 11, -1)]
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["content"], f"message {count - 11}"
+        )
+
+        since = self.messages[-3].created_at.isoformat()
+        response = self.client.get(url, {"since": since})
+        self.assertEqual(
+            [message["id"] for message in response.data["results"]],
+            [self.messages[-1].pk, self.messages[-2].pk],
+        )
+        response = self.client.get(url, {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # ISO 8601 format, invalid month and day
+        response = self.client.get(url, {"since": "2024-13-45T10:00:00"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("since", response.data)
+
+        self.client.force_login(self.tu_moderator)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_embedded(self) -> None:
+        latest = [message.pk for message in self.messages[-EMBEDDED_MESSAGES:]]
+        self.client.force_login(self.tu_employee)
+        response = self.client.get(self.get_url_detail(self.url, self.response.pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [message["id"] for message in response.data["messages"]], latest
+        )
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item = next(item for item in response.data if item["id"] == self.response.pk)
+        self.assertEqual([message["id"] for message in item["messages"]], latest)
+
+
+class TestFavoriteCache(RecrutingTestCase):
+    """
+    Favorites set cache test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        CV.objects.update(status=ConstDocumentStatus.approved)
+        self.content_type = ContentType.objects.get_for_model(CV)
+        Favorite.objects.filter(user=self.tu_employer).delete()
+        return super().setUp()
+
+    def test_favorites(self) -> None:
+        self.client.force_login(self.tu_employer)
+        cv = CV.objects.first()
+        url_favorite = self.get_url_favorite(self.url, cv.id)
+        self.client.post(url_favorite)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        favorites = {
+            item["id"] for item in response.data["results"] if item["is_favorite"]
+        }
+        self.assertEqual(favorites, {cv.id})
+
+        # cached set, no favorite queries
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        table = Favorite._meta.db_table
+        self.assertFalse(any(table in query["sql"] for query in context))
+
+        response = self.client.get(self.url, {"is_favorite": True})
+        self.assertEqual([item["id"] for item in response.data["results"]], [cv.id])
+        response = self.client.get(self.url, {"is_favorite": False})
+        self.assertNotIn(cv.id, [item["id"] for item in response.data["results"]])
+
+        response = self.client.get(self.url + "favorites/", {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["id"], cv.id)
+        self.assertTrue(response.data["results"][0]["is_favorite"])
+
+        # set is dropped on change
+        self.client.delete(url_favorite)
+        self.assertEqual(
+            FavoriteCache.get_ids(self.tu_employer.pk, self.content_type.pk),
+            frozenset(),
+        )
+        response = self.client.get(self.get_url_detail(self.url, cv.id))
+        self.assertFalse(response.data["is_favorite"])
+
+    def test_favorites_etag(self) -> None:
+        self.client.force_login(self.tu_employer)
+        etags = []
+        # sets with the same size and sum
+        for object_ids in ((1, 4), (2, 3)):
+            with self.captureOnCommitCallbacks(execute=True):
+                Favorite.objects.filter(user=self.tu_employer).delete()
+                for object_id in object_ids:
+                    Favorite.objects.create(
+                        user=self.tu_employer,
+                        content_type=self.content_type,
+                        object_id=object_id,
+                    )
+            etags.append(self.client.get(self.url)["ETag"])
+        self.assertNotEqual(etags[0], etags[1])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[0])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestRulePermission(RecrutingTestCase):
+    """
+    Permission rules compiled to queryset filters test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/vacancy-responses/"
+        cv = CV.objects.filter(owner=self.tu_employee).first()
+        self.responses = {}
+        for status_id in (
+            ConstDocumentStatus.draft,
+            ConstDocumentStatus.pending,
+            ConstDocumentStatus.approved,
+        ):
+            vacancy = Vacancy.objects.filter(owner=self.tu_employer).first()
+            vacancy.pk = None
+            vacancy.save()
+            self.responses[status_id] = VacancyResponse.objects.create(
+                vacancy=vacancy,
+                cv=cv,
+                owner=self.tu_employee,
+                updated_by=self.tu_employee,
+                status_id=status_id,
+            )
+        return super().setUp()
+
+    def test_compiled(self) -> None:
+        # rules filter the same objects as object checks
+        objects = list(VacancyResponse.objects.all())
+        for user in (self.tu_employee, self.tu_employer, self.tu_moderator):
+            for rule in VacancyResponsePermission.rules:
+                permitted = set(
+                    VacancyResponse.objects.filter(rule.get_q(user)).values_list(
+                        "pk", flat=True
+                    )
+                )
+                checked = {obj.pk for obj in objects if rule.check(obj, user)}
+                self.assertEqual(permitted, checked)
+
+    def test_detail(self) -> None:
+        self.client.force_login(self.tu_employer)
+        draft = self.responses[ConstDocumentStatus.draft]
+        pending = self.responses[ConstDocumentStatus.pending]
+        approved = self.responses[ConstDocumentStatus.approved]
+
+        # in scope, not permitted
+        response = self.client.get(self.get_url_detail(self.url, draft.pk))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(
+            self.get_url_message(self.url, pending.pk),
+            self.get_request_data_message(),
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        # object and permission in one query, no vacancy lookup
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                self.get_url_status(self.url, approved.pk),
+                self.get_request_data_status(ConstDocumentStatus.rejected),
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        table = VacancyResponse._meta.db_table
+        self.assertEqual(len([query for query in context if table in query["sql"]]), 1)
+
+        response = self.client.patch(
+            self.get_url_status(self.url, pending.pk),
+            self.get_request_data_status(ConstDocumentStatus.approved),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # out of scope
+        self.client.force_login(self.tu_moderator)
+        response = self.client.get(self.get_url_detail(self.url, approved.pk))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestWorkflow(RecrutingTestCase):
+    """
+    Document status workflow test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        cvs = CV.objects.filter(owner=self.tu_employee).order_by("pk")
+        ids = list(cvs.values_list("pk", flat=True)[:3])
+        CV.objects.filter(pk__in=ids).update(status=ConstDocumentStatus.pending)
+        self.cvs = list(cvs.filter(pk__in=ids))
+        return super().setUp()
+
+    def test_status_action(self) -> None:
+        cv = self.cvs[0]
+        url = self.get_url_status(self.url, cv.pk)
+        self.client.force_login(self.tu_moderator)
+        response = self.client.patch(
+            url,
+            self.get_request_data_status(ConstDocumentStatus.approved, "ok"),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"status": ConstDocumentStatus.approved, "status_info": "ok"},
+        )
+        transition = DocumentTransition.objects.get(
+            content_type=ContentType.objects.get_for_model(CV), object_id=cv.pk
+        )
+        self.assertEqual(transition.source_id, ConstDocumentStatus.pending)
+        self.assertEqual(transition.target_id, ConstDocumentStatus.approved)
+        self.assertEqual(transition.actor, self.tu_moderator)
+
+        # not allowed transition
+        CV.objects.filter(pk=cv.pk).update(status=ConstDocumentStatus.draft)
+        self.client.force_login(self.tu_employee)
+        response = self.client.patch(
+            url,
+            self.get_request_data_status(ConstDocumentStatus.rejected),
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_conflict(self) -> None:
+        stale = CV.objects.get(pk=self.cvs[0].pk)
+        move_document(self.cvs[0], ConstDocumentStatus.approved, self.tu_moderator)
+        with self.assertRaises(TransitionConflict):
+            move_document(stale, ConstDocumentStatus.rejected, self.tu_moderator)
+        self.assertEqual(
+            CV.objects.get(pk=stale.pk).status_id, ConstDocumentStatus.approved
+        )
+
+    def test_batch(self) -> None:
+        ids = [cv.pk for cv in self.cvs]
+        CV.objects.filter(pk=ids[0]).update(status=ConstDocumentStatus.draft)
+        with CaptureQueriesContext(connection) as context:
+            transitions = move_documents(
+                CV.objects.filter(pk__in=ids),
+                ConstDocumentStatus.approved,
+                self.tu_moderator,
+                "batch",
+            )
+        updates = [query for query in context if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            sorted(transition.object_id for transition in transitions), ids[1:]
+        )
+        self.assertEqual(
+            list(CV.objects.filter(pk__in=ids).order_by("pk").values_list("status_id")),
+            [
+                (ConstDocumentStatus.draft,),
+                (ConstDocumentStatus.approved,),
+                (ConstDocumentStatus.approved,),
+            ],
+        )
+
+        # owner can't approve own documents
+        transitions = move_documents(
+            CV.objects.filter(pk=ids[0]),
+            ConstDocumentStatus.pending,
+            self.tu_employee,
+        )
+        self.assertEqual(len(transitions), 1)
+        transitions = move_documents(
+            CV.objects.filter(pk=ids[0]),
+            ConstDocumentStatus.approved,
+            self.tu_employee,
+        )
+        self.assertEqual(transitions, [])
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestModeration(RecrutingTestCase):
+    """
+    Moderation queue test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/moderation/"
+        self.other_moderator, _ = UserUtils.create_test_user(
+            dict(
+                UserUtils.test_moderator,
+                username="testModerator2",
+                email="testModerator2@ru.ru",
+            ),
+            raise_if_exists=False,
+        )
+        CV.objects.update(status=ConstDocumentStatus.pending)
+        Vacancy.objects.update(status=ConstDocumentStatus.pending)
+        Employer.objects.update(status=ConstDocumentStatus.approved)
+        return super().setUp()
+
+    def test_leases(self) -> None:
+        pending = CV.objects.count() + Vacancy.objects.count()
+        size = pending // 2
+
+        self.client.force_login(self.tu_moderator)
+        response = self.client.get(self.url, {"limit": size})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        batch = {(item["type"], item["id"]) for item in response.data}
+        self.assertEqual(len(batch), size)
+        self.assertEqual(response.data[0]["document"]["id"], response.data[0]["id"])
+
+        # same batch again, other moderator gets other documents
+        response = self.client.get(self.url, {"limit": size})
+        self.assertEqual({(item["type"], item["id"]) for item in response.data}, batch)
+        self.client.force_login(self.other_moderator)
+        response = self.client.get(self.url, {"limit": pending})
+        other = {(item["type"], item["id"]) for item in response.data}
+        self.assertEqual(len(other), pending - size)
+        self.assertFalse(batch & other)
+
+        # expired leases are taken again
+        ModerationLease.objects.filter(moderator=self.tu_moderator).update(
+            expires_at=timezone.now()
+        )
+        response = self.client.get(self.url, {"limit": pending})
+        self.assertEqual(len(response.data), pending)
+
+        self.client.force_login(self.tu_employer)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_decisions(self) -> None:
+        self.client.force_login(self.tu_moderator)
+        response = self.client.get(self.url, {"limit": 4})
+        leased = [(item["type"], item["id"]) for item in response.data]
+        not_leased = CV.objects.exclude(
+            pk__in=[pk for queue_type, pk in leased if queue_type == "cv"]
+        ).first()
+        decisions = [
+            {"type": queue_type, "id": pk, "status": ConstDocumentStatus.approved}
+            for queue_type, pk in leased[:3]
+        ] + [
+            {
+                "type": leased[3][0],
+                "id": leased[3][1],
+                "status": ConstDocumentStatus.rejected,
+                "info": "incomplete",
+            },
+            {"type": "cv", "id": not_leased.pk, "status": ConstDocumentStatus.approved},
+        ]
+        response = self.client.post(
+            self.url + "decisions/", {"decisions": decisions}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted((item["type"], item["id"]) for item in response.data["moved"]),
+            sorted(leased),
+        )
+        self.assertEqual(
+            response.data["skipped"], [{"type": "cv", "id": not_leased.pk}]
+        )
+        self.assertEqual(
+            CV.objects.get(pk=not_leased.pk).status_id, ConstDocumentStatus.pending
+        )
+        self.assertFalse(ModerationLease.objects.filter(moderator=self.tu_moderator))
+
+        response = self.client.post(
+            self.url + "decisions/",
+            {"decisions": [{"type": "cv", "id": 1, "status": "d"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestNestedWrites(RecrutingTestCase):
+    """
+    CV experience/education diff writes test.
+    """
+
+    @staticmethod
+    def get_experience(index):
+        return {
+            "datefrom": "2020-01-01",
+            "dateto": "2021-01-01",
+            "is_current": False,
+            "city": City.objects.first().pk,
+            "company": f"company {index}",
+            "position": "developer",
+            "content": "content",
+        }
+
+    @staticmethod
+    def get_education(index):
+        return {
+            "date": "2015-06-01",
+            "specialty": "specialty",
+            "institution": f"institution {index}",
+            "content": "content",
+        }
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        self.client.force_login(self.tu_employee)
+        return super().setUp()
+
+    def create_cv(self, count):
+        response = self.client.post(
+            self.url,
+            {
+                "title": "title",
+                "position": "developer",
+                "salary": "1000",
+                "description": "description",
+                "experience": [self.get_experience(i) for i in range(count)],
+                "education": [self.get_education(i) for i in range(count)],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return CV.objects.get(pk=response.data["id"])
+
+    def get_data(self, cv):
+        response = self.client.get(self.get_url_detail(self.url, cv.pk))
+        data = {
+            key: response.data[key]
+            for key in ("title", "position", "salary", "description")
+        }
+        data["experience"] = [
+            dict(item, city=item["city"]["id"]) for item in response.data["experience"]
+        ]
+        data["education"] = response.data["education"]
+        return data
+
+    def test_diff(self) -> None:
+        cv = self.create_cv(3)
+        ids = list(cv.experience.order_by("pk").values_list("pk", flat=True))
+        data = self.get_data(cv)
+        data["experience"] = sorted(data["experience"], key=lambda item: item["id"])
+        data["experience"][0]["company"] = "fixed typo"
+        del data["experience"][1]
+        data["experience"].append(self.get_experience(3))
+
+        response = self.client.put(
+            self.get_url_detail(self.url, cv.pk), data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        experience = list(cv.experience.order_by("pk"))
+        self.assertEqual([obj.pk for obj in experience[:2]], [ids[0], ids[2]])
+        self.assertEqual(experience[0].company, "fixed typo")
+        self.assertEqual(experience[2].company, "company 3")
+        self.assertEqual(cv.education.count(), 3)
+
+    def test_bounded_statements(self) -> None:
+        counts = []
+        for size in (2, 20):
+            cv = self.create_cv(size)
+            data = self.get_data(cv)
+            data["experience"][0]["company"] = "fixed typo"
+            with CaptureQueriesContext(connection) as context:
+                self.client.put(
+                    self.get_url_detail(self.url, cv.pk), data, format="json"
+                )
+            counts.append(len(context))
+        self.assertEqual(counts[0], counts[1])
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestSkillResolution(RecrutingTestCase):
+    """
+    Employee skills resolution and M2M diff test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/employees/"
+        self.employee = Employee.objects.get(owner=self.tu_employee)
+        self.url_detail = self.get_url_detail(self.url, self.employee.pk)
+        self.data = {
+            "email": self.employee.email,
+            "name": self.employee.name,
+            "birthday": "1990-01-01",
+            "city": self.employee.city_id,
+            "gender": self.employee.gender_id,
+            "description": "description",
+        }
+        self.client.force_login(self.tu_employee)
+        return super().setUp()
+
+    def put_skills(self, names):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.put(
+                self.url_detail, dict(self.data, skills=names), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context)
+
+    def test_resolve(self) -> None:
+        Skill.objects.create(name="existing skill")
+        skills = resolve_skills(["new skill", "existing skill", "new skill"])
+        self.assertEqual(
+            [skill.name for skill in skills], ["new skill", "existing skill"]
+        )
+        self.assertTrue(all(skill.pk for skill in skills))
+        with self.assertNumQueries(1):
+            resolve_skills(["new skill", "existing skill"])
+
+    def test_diff(self) -> None:
+        names = [f"skill {i}" for i in range(30)]
+        self.put_skills(names)
+        through = Employee.skills.through
+        rows = dict(
+            through.objects.filter(employee=self.employee).values_list(
+                "skill__name", "pk"
+            )
+        )
+        self.assertEqual(set(rows), set(names))
+
+        # one skill replaced, other rows of join table are kept
+        names = names[1:] + ["skill 30"]
+        few = self.put_skills(names)
+        new_rows = dict(
+            through.objects.filter(employee=self.employee).values_list(
+                "skill__name", "pk"
+            )
+        )
+        self.assertEqual(set(new_rows), set(names))
+        self.assertEqual(
+            {name: new_rows[name] for name in names[:-1]},
+            {name: rows[name] for name in names[:-1]},
+        )
+
+        # statements don't depend on number of changed skills
+        many = self.put_skills([f"other skill {i}" for i in range(30)])
+        self.assertEqual(few, many)
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestSkillSuggest(RecrutingTestCase):
+    """
+    Skill suggestions index test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/skills/suggest/"
+        skill_index.clear()
+        self.employee = Employee.objects.get(owner=self.tu_employee)
+        Skill.objects.bulk_create(
+            Skill(name=name) for name in ("Pythonic", "PyTest", "Perl", "pandas")
+        )
+        self.employee.skills.add(Skill.objects.get(name="PyTest"))
+        self.client.force_login(self.tu_employee)
+        return super().setUp()
+
+    def get_names(self, prefix, **params):
+        response = self.client.get(self.url, dict(params, prefix=prefix))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in response.data]
+
+    def test_suggest(self) -> None:
+        names = self.get_names("py")
+        self.assertEqual(names[0], "PyTest")
+        self.assertIn("Pythonic", names)
+        self.assertNotIn("Perl", names)
+        self.assertEqual(self.get_names("p", limit=1), ["PyTest"])
+
+        # index is served without skill queries
+        with CaptureQueriesContext(connection) as context:
+            self.get_names("pa")
+        table = Skill._meta.db_table
+        self.assertFalse(any(table in query["sql"] for query in context))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"prefix": "p", "limit": 1000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_incremental(self) -> None:
+        self.get_names("py")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.skills.set(resolve_skills(["Pythonic", "PyPI packaging"]))
+        index = skill_index.get()
+        self.assertEqual(
+            index.suggest("py"),
+            [
+                {"name": "PyPI packaging", "count": 1},
+                {"name": "Pythonic", "count": 1},
+                {"name": "PyTest", "count": 0},
+            ],
+        )
+        self.assertFalse(skill_index.is_expired)
+
+    def tearDown(self) -> None:
+        skill_index.clear()
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestCVSkillSearch(RecrutingTestCase):
+    """
+    CV search by skills with inverted index test.
+    """
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        cv_skill_index.clear()
+        DataGenerator(20, seed=1).run()
+        approved = CV.objects.filter(
+            status=ConstDocumentStatus.approved,
+            owner__username__startswith="gen_employee",
+        )
+        first = approved.first()
+        second = approved.exclude(employee=first.employee).first()
+        self.cvs = [first, second]
+        # one approved CV per employee
+        approved.filter(employee__in=[first.employee, second.employee]).exclude(
+            pk__in=[first.pk, second.pk]
+        ).update(status=ConstDocumentStatus.draft)
+        self.skills = resolve_skills(["Search A", "Search B", "Search C"])
+        first.employee.skills.set(self.skills)
+        second.employee.skills.set([self.skills[0], self.skills[2]])
+        self.client.force_login(self.tu_employer)
+        return super().setUp()
+
+    def get_ids(self, **params) -> list:
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_index(self) -> None:
+        index = CVSkillIndex([(1, 10), (1, 11), (2, 10), (3, 11), (3, 12), (4, None)])
+        ids, scores = index.search([10, 11])
+        self.assertEqual(ids.tolist(), [1])
+        ids, scores = index.search(nice=[11, 12])
+        self.assertEqual(ids.tolist(), [1, 3])
+        self.assertEqual(scores.tolist(), [1, 2])
+        ids, scores = index.search([10], [12])
+        self.assertEqual(ids.tolist(), [1, 2])
+        self.assertEqual(scores.tolist(), [0, 0])
+        self.assertEqual(index.search([13])[0].tolist(), [])
+
+        index.update([1, 5], [(5, 10), (5, 12)])
+        self.assertEqual(index.search([10])[0].tolist(), [2, 5])
+        self.assertEqual(index.search(nice=[11])[0].tolist(), [3])
+        self.assertEqual(len(index), 4)
+
+    def test_filter(self) -> None:
+        first, second = [cv.pk for cv in self.cvs]
+        self.assertEqual(self.get_ids(skills="search a, SEARCH B"), [first])
+        self.assertEqual(
+            sorted(self.get_ids(skills_any="Search C")), sorted([first, second])
+        )
+        self.assertEqual(
+            self.get_ids(skills="Search A", skills_any="Search B", skills_rank=True),
+            [first, second],
+        )
+        self.assertEqual(self.get_ids(skills="Search A,Unknown"), [])
+
+        # index is used instead of joins through employee skills
+        table = Employee.skills.through._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            self.get_ids(skills="Search A,Search B")
+        cv_queries = [
+            query["sql"]
+            for query in context
+            if f'FROM "{CV._meta.db_table}"' in query["sql"]
+        ]
+        self.assertTrue(cv_queries)
+        self.assertFalse(any(table in sql for sql in cv_queries))
+
+        names = ",".join(f"Skill {i}" for i in range(MAX_SEARCH_SKILLS + 1))
+        response = self.client.get(self.url, {"skills": names})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cap(self) -> None:
+        first, second = [cv.pk for cv in self.cvs]
+        # the best CVs, then the newest ones are passed to SQL
+        with mock.patch("recrutingapp.cvskills.MAX_SEARCH_RESULTS", 1):
+            self.assertEqual(self.get_ids(skills_any="Search A,Search B"), [first])
+            self.assertEqual(self.get_ids(skills="Search C"), [max(first, second)])
+
+    def test_incremental(self) -> None:
+        first, second = self.cvs
+        self.get_ids(skills="Search A")
+        with self.captureOnCommitCallbacks(execute=True):
+            second.employee.skills.add(self.skills[1])
+        self.assertEqual(
+            sorted(self.get_ids(skills="Search A,Search B")),
+            sorted([first.pk, second.pk]),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            move_document(first, ConstDocumentStatus.draft, first.owner)
+        self.assertEqual(self.get_ids(skills="Search B"), [second.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.get_ids(skills_any="Search A,Search B"), [])
+        self.assertFalse(cv_skill_index.is_expired)
+
+    def tearDown(self) -> None:
+        cv_skill_index.clear()
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestAgeExperienceFilters(RecrutingTestCase):
+    """
+    CV age and experience length filters test.
+    """
+
+    @staticmethod
+    def get_experience(datefrom, dateto, is_current=False):
+        return {
+            "datefrom": datefrom,
+            "dateto": dateto,
+            "is_current": is_current,
+            "city": City.objects.first().pk,
+            "company": "company",
+            "position": "developer",
+            "content": "content",
+        }
+
+    def setUp(self) -> None:
+        self.url = "/api/v1.0/protected/cvs/"
+        self.employee = Employee.objects.get(owner=self.tu_employee)
+        self.client.force_login(self.tu_employee)
+        response = self.client.post(
+            self.url,
+            {
+                "title": "title",
+                "position": "developer",
+                "salary": "1000",
+                "description": "description",
+                "experience": [
+                    self.get_experience("2018-01-01", "2020-07-01"),
+                    self.get_experience("2020-09-01", "2021-09-01"),
+                ],
+                "education": [],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.cv = CV.objects.get(pk=response.data["id"])
+        return super().setUp()
+
+    def get_ids(self, **params) -> list:
+        response = self.client.get(self.url, dict(params, limit=100))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_experience(self) -> None:
+        self.assertEqual(self.cv.experience_months, 42)
+        self.assertIn(self.cv.pk, self.get_ids(experience_min=3, experience_max=3))
+        self.assertNotIn(self.cv.pk, self.get_ids(experience_min=4))
+        self.assertNotIn(self.cv.pk, self.get_ids(experience_max=2))
+
+        # recomputed on experience writes
+        start = datetime.date.today() - relativedelta(years=5)
+        response = self.client.patch(
+            self.get_url_detail(self.url, self.cv.pk),
+            {"experience": [self.get_experience(start, start, is_current=True)]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.get_url_detail(self.url, self.cv.pk))
+        self.assertEqual(response.data["experience_months"], 60)
+        self.assertIn(self.cv.pk, self.get_ids(experience_min=5))
+
+        # current jobs are moved by periodic refresh
+        CV.objects.filter(pk=self.cv.pk).update(experience_months=0)
+        self.assertGreaterEqual(update_current_experience(), 1)
+        self.cv.refresh_from_db()
+        self.assertEqual(self.cv.experience_months, 60)
+
+    def test_age(self) -> None:
+        today = datetime.date.today()
+        self.employee.birthday = today - relativedelta(years=30)
+        self.employee.save()
+        self.assertIn(self.cv.pk, self.get_ids(age_min=30, age_max=30))
+        self.assertNotIn(self.cv.pk, self.get_ids(age_min=31))
+        self.assertNotIn(self.cv.pk, self.get_ids(age_max=29))
+
+        # out of range years are rejected, not passed to date arithmetic
+        for params in ({"age_min": 10**6}, {"age_max": -1}, {"experience_min": 10**6}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # 31 tomorrow
+        self.employee.birthday = today - relativedelta(years=31, days=-1)
+        self.employee.save()
+        self.assertEqual(self.employee.age, 30)
+        self.assertIn(self.cv.pk, self.get_ids(age_max=30))
+        self.assertNotIn(self.cv.pk, self.get_ids(age_min=31))
+
+    def tearDown(self) -> None:
+        self.client.logout()
+        return super().tearDown()
+
+
+class TestLocationFilters(RecrutingTestCase):
+    """
+    Region and radius location filters test.
+    """
+
+    def setUp(self) -> None:
+        city_index.clear()
+        # Khimki is ~19 km from Moscow, Voronezh is ~470 km
+        self.moscow, self.khimki, self.voronezh = (
+            City.objects.get(pk=pk) for pk in (1, 2, 4)
+        )
+        self.employee = Employee.objects.get(owner=self.tu_employee)
+        self.employee.city = self.khimki
+        self.employee.save()
+        self.cv = CV.objects.filter(owner=self.tu_employee).first()
+        self.vacancy = Vacancy.objects.filter(owner=self.tu_employer).first()
+        Vacancy.objects.filter(pk=self.vacancy.pk).update(city=self.voronezh)
+        return super().setUp()
+
+    def get_ids(self, url, **params) -> list:
+        response = self.client.get(url, dict(params, limit=100))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_index(self) -> None:
+        index = CityIndex(
+            [
+                (1, 1, 55.7558, 37.6173),
+                (2, 2, 55.8970, 37.4297),
+                (3, 2, None, None),
+                (4, 3, 0.0, 179.9),
+                (5, 3, 0.0, -179.9),
+                (6, 4, 89.9, 0.0),
+                (7, 4, 89.9, 180.0),
+            ]
+        )
+        self.assertEqual(index.get_region(2), [2, 3])
+        self.assertEqual(sorted(index.within(55.7558, 37.6173, 30)), [1, 2])
+        self.assertEqual(index.within(55.7558, 37.6173, 10), [1])
+        self.assertEqual(index.near(3, 100), [3])
+        self.assertEqual(index.near(8, 100), [])
+        # cells across the antimeridian and around the pole
+        self.assertEqual(sorted(index.near(4, 50)), [4, 5])
+        self.assertEqual(sorted(index.near(6, 50)), [6, 7])
+
+    def test_cv_filters(self) -> None:
+        url = "/api/v1.0/protected/cvs/"
+        self.client.force_login(self.tu_employee)
+        self.assertIn(self.cv.pk, self.get_ids(url, near=self.moscow.pk, radius=30))
+        self.assertNotIn(self.cv.pk, self.get_ids(url, near=self.moscow.pk, radius=10))
+        self.assertIn(self.cv.pk, self.get_ids(url, near=self.khimki.pk))
+        self.assertIn(self.cv.pk, self.get_ids(url, region=self.khimki.region_id))
+        self.assertNotIn(self.cv.pk, self.get_ids(url, region=self.moscow.region_id))
+
+        # city ids instead of conditions on city and region tables
+        with CaptureQueriesContext(connection) as context:
+            self.get_ids(url, region=self.khimki.region_id)
+        condition = f'"city_id" IN ({self.khimki.pk})'
+        self.assertTrue(any(condition in query["sql"] for query in context))
+
+        response = self.client.get(url, {"radius": 10})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"near": self.moscow.pk, "radius": 5000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_vacancy_filters(self) -> None:
+        url = "/api/v1.0/protected/vacancies/"
+        self.client.force_login(self.tu_employer)
+        ids = self.get_ids(url, near=self.moscow.pk, radius=500)
+        self.assertIn(self.vacancy.pk, ids)
+        ids = self.get_ids(url, near=self.moscow.pk, radius=400)
+        self.assertNotIn(self.vacancy.pk, ids)
+
+        # coordinates changed
+        self.voronezh.latitude, self.voronezh.longitude = 55.8, 37.6
+        self.voronezh.save()
+        ids = self.get_ids(url, near=self.moscow.pk, radius=30)
+        self.assertIn(self.vacancy.pk, ids)
+
+        # city without coordinates is only near itself
+        self.voronezh.latitude = self.voronezh.longitude = None
+        self.voronezh.save()
+        ids = self.get_ids(url, near=self.moscow.pk, radius=MAX_RADIUS)
+        self.assertNotIn(self.vacancy.pk, ids)
+        self.assertIn(self.vacancy.pk, self.get_ids(url, near=self.voronezh.pk))
+
+    def tearDown(self) -> None:
+        city_index.clear()
+        self.client.logout()
+        return super().tearDown()
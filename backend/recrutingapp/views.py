@@ -2,24 +2,34 @@
 All custom views for recruting App.
 """
 
+import io
+import json
+
 from rest_framework import permissions
-from rest_framework import pagination
 from rest_framework import viewsets
 from rest_framework import mixins
+from rest_framework import serializers
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
 
-from django.db.models import Exists, OuterRef
+from django.db.models import Count, Max
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
 from django.contrib.contenttypes.models import ContentType
 from recrutingapp.models import (
     CVResponse,
     City,
     ConstDocumentStatus,
     DocumentMessage,
-    DocumentStatus,
     Employer,
     Favorite,
     Gender,
@@ -35,6 +45,9 @@ from recrutingapp.permissions import (
     CVResponsePermission,
     EmployerPermission,
     IsOwner,
+    IsModerator,
+    IsOwnerOrSuperuser,
+    RulePermission,
     VacancyPermission,
     VacancyResponsePermission,
 )
@@ -51,6 +64,7 @@ from recrutingapp.serializers import (
     EmployerSerializerExt,
     EmployerSerializerInt,
     GenderSerializer,
+    ModerationDecisionsSerializer,
     NewsPublicListSerializer,
     NewsPublicDetailSerializer,
     NewsTagStaffSerializer,
@@ -60,12 +74,264 @@ from recrutingapp.serializers import (
     VacancySerializerExt,
     VacancySerializerInt,
 )
+from recrutingapp.conditional import (
+    get_timestamp_fields,
+    get_timestamp_paths,
+    get_timestamps,
+    make_etag,
+    set_validators,
+)
+from recrutingapp.favorites import FavoriteCache
 from recrutingapp.filters import NewsFilter, CVFilter, VacancyFilter
-from userapp.models import UserRoles
+from recrutingapp.importer import FORMATS, CVImporter, VacancyImporter, detect_format
+from recrutingapp.matching import get_candidates, get_matches
+from recrutingapp.moderation import (
+    BATCH_SIZE,
+    MAX_BATCH_SIZE,
+    apply_decisions,
+    get_queue_type,
+    take_batch,
+)
+from recrutingapp.pagination import PAGINATION_MODE_CURSOR, KeysetPagination
+from recrutingapp.reference import reference_bundle
+from recrutingapp.shaping import get_queryset_shape
+from recrutingapp.suggest import MAX_SUGGEST_LIMIT, SUGGEST_LIMIT, skill_index
+from recrutingapp.workflow import TransitionConflict, TransitionError, move_document
+from userapp.authentication import StreamTicket
 
 REQUEST_METHODS_CHANGE = ("POST", "PUT", "PATCH")
 
 
+class QuerysetShapingMixin:
+    """
+    Mixin for read actions.
+    Loads relations used by action serializer with fixed number of queries
+    """
+
+    shaped_actions = ("list", "retrieve", "favorites")
+
+    def shape_queryset(self, queryset):
+        if self.action in self.shaped_actions:
+            return get_queryset_shape(self.get_serializer_class()).apply(queryset)
+        return queryset
+
+
+class RulePermissionMixin:
+    """
+    Mixin for views with rule permissions (RulePermission).
+    Lists scope of user, detail actions load object with result of
+    permission rules in one query
+    """
+
+    def filter_scope(self, queryset):
+        # permissions of viewset, actions could override permission_classes
+        for permission_class in type(self).permission_classes:
+            if issubclass(permission_class, RulePermission):
+                queryset = permission_class.filter_scope(queryset, self.request.user)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, "detail", None):
+            for permission in self.get_permissions():
+                if isinstance(permission, RulePermission):
+                    queryset = permission.annotate_queryset(
+                        queryset, self.request, self
+                    )
+        return queryset
+
+
+class ConditionalGetMixin:
+    """
+    Mixin for list and retrieve actions with conditional GET.
+    Sends ETag and Last-Modified, checks If-None-Match/If-Modified-Since
+    before serialization and returns 304 on match
+    """
+
+    def get_validator_parts(self) -> list:
+        request = self.request
+        return [
+            request.get_full_path(),
+            request.user.pk,
+            getattr(request.user, "role", ""),
+            request.accepted_renderer.format,
+            self.get_serializer_class().__name__,
+        ]
+
+    def get_not_modified(self, etag, last_modified):
+        return get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=last_modified and int(last_modified.timestamp()),
+        )
+
+    def get_list_validators(self, queryset):
+        """ETag and Last-Modified from aggregates of filtered queryset"""
+        fields = get_timestamp_fields(self.get_serializer_class())
+        aggregates = {"count": Count("pk")}
+        for index, field in enumerate(fields):
+            aggregates[f"updated_{index}"] = Max(field)
+
+        values = queryset.prefetch_related(None).order_by().aggregate(**aggregates)
+        timestamps = [values[f"updated_{index}"] for index in range(len(fields))]
+        etag = make_etag(
+            *self.get_validator_parts(),
+            *sorted(values.items()),
+            *self.get_favorites_validator(queryset.model),
+        )
+        return etag, max(filter(None, timestamps), default=None)
+
+    def get_favorites_validator(self, model) -> tuple:
+        """Favorites of user rendered in documents (FavoriteMixin)"""
+        if not hasattr(self, "get_favorite_ids"):
+            return ()
+        ids = self.get_favorite_ids(model)
+        if ids is None:
+            return ()
+        # the whole set is digested by make_etag
+        return (",".join(str(pk) for pk in sorted(ids)),)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_list_validators(queryset)
+
+        response = self.get_not_modified(etag, last_modified)
+        if response is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                response = self.get_paginated_response(serializer.data)
+            else:
+                serializer = self.get_serializer(queryset, many=True)
+                response = Response(serializer.data)
+
+        set_validators(response, etag, last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # object with joined relations only, prefetch after validation
+        prefetch_lookups = queryset._prefetch_related_lookups
+        queryset = queryset.prefetch_related(None)
+        joins = [path for path in get_timestamp_paths(serializer_class) if path]
+        if joins:
+            queryset = queryset.select_related(*joins)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, instance)
+
+        timestamps = get_timestamps(instance, serializer_class)
+        last_modified = max(timestamps, default=None)
+        etag = make_etag(
+            *self.get_validator_parts(),
+            *timestamps,
+            *self.get_favorites_validator(type(instance)),
+        )
+
+        response = self.get_not_modified(etag, last_modified)
+        if response is None:
+            prefetch_related_objects([instance], *prefetch_lookups)
+            response = Response(self.get_serializer(instance).data)
+
+        set_validators(response, etag, last_modified)
+        return response
+
+
+class ImportMixin:
+    """
+    Mixin for bulk import from JSONL/CSV file ('file' field).
+    Rows are imported while the report is streamed (JSON lines)
+    """
+
+    importer_class = None
+
+    @extend_schema(
+        description="Bulk import from JSONL or CSV file",
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "format": {"type": "string", "enum": list(FORMATS)},
+                },
+            }
+        },
+        responses={200: OpenApiTypes.STR, 400: None},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request, version=None):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["No file was submitted."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fmt = request.data.get("format") or detect_format(upload.name)
+        if fmt not in FORMATS:
+            return Response(
+                {"format": [f"Supported formats: {', '.join(FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            importer = self.importer_class(request.user)
+        except serializers.ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        upload.open("rb")
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        report = (
+            json.dumps(record, ensure_ascii=False) + "\n"
+            for record in importer.run(stream, fmt)
+        )
+        return StreamingHttpResponse(report, content_type="application/x-ndjson")
+
+
+class MatchingMixin:
+    """
+    Mixin for documents matched with approved documents of other model.
+    Provide method for ranked response, actions are defined in views
+    """
+
+    match_limit = 20
+    max_match_limit = 100
+
+    def get_match_limit(self) -> int:
+        try:
+            limit = int(self.request.query_params.get("limit", self.match_limit))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= self.max_match_limit:
+            raise serializers.ValidationError(
+                {"limit": [f"Must be from 1 to {self.max_match_limit}."]}
+            )
+        return limit
+
+    def get_match_response(self, matches, queryset, serializer_class):
+        """Serialized documents in matches order with 'match' scores"""
+        ids = [pk for pk, _, _ in matches]
+        queryset = get_queryset_shape(serializer_class).apply(
+            queryset.filter(pk__in=ids)
+        )
+        documents = {obj.pk: obj for obj in self.mark_favorites(queryset)}
+        data = []
+        for pk, score, scores in matches:
+            if pk not in documents:
+                continue
+            item = serializer_class(documents[pk]).data
+            item["match"] = dict(scores, score=score)
+            data.append(item)
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class LoggedModelMixin:
     """
     Mixin for logging object changes.
@@ -100,37 +366,30 @@ class DocStatusModelMixin:
         responses={
             200: None,
             400: None,
+            409: None,
         },
     )
     @action(detail=True, methods=["patch"])
     def status(self, request, version=None, pk=None):
         obj = self.get_object()
         serializer = DocumentStatusMixinSerializer(data=request.data)
-        if serializer.is_valid():
-            new_status = serializer.validated_data["status"]
-            new_status_info = serializer.validated_data["info"]
-            if obj and (
-                (new_status == ConstDocumentStatus.draft and obj.owner == request.user)
-                or (
-                    obj.status.id
-                    in (ConstDocumentStatus.draft, ConstDocumentStatus.rejected)
-                    and new_status == ConstDocumentStatus.pending
-                )
-                or (
-                    obj.status.id == ConstDocumentStatus.pending
-                    and obj.owner != request.user
-                    and new_status
-                    in (ConstDocumentStatus.approved, ConstDocumentStatus.rejected)
-                )
-            ):
-                status_obj = DocumentStatus.objects.get(id=new_status)
-                obj.status = status_obj
-                obj.status_info = new_status_info
-                obj.save()
-                return Response({"status": new_status})
-        else:
+        if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        return Response(status=status.HTTP_400_BAD_REQUEST)
+        try:
+            move_document(
+                obj,
+                serializer.validated_data["status"],
+                request.user,
+                serializer.validated_data["info"],
+            )
+        except TransitionConflict:
+            return Response(
+                {"status": ["Document status was changed."]},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except TransitionError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        return Response({"status": obj.status_id, "status_info": obj.status_info})
 
 
 class FavoriteMixin:
@@ -180,18 +439,27 @@ class FavoriteMixin:
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
-    def annotate_qs_is_favorite_field(self, queryset):
-        """
-        Internal method providing is_favorite attribute to queryset
-        """
-        if self.request.user.is_authenticated:
-            is_favorite_subquery = Favorite.objects.filter(
-                object_id=OuterRef("pk"),
-                user=self.request.user,
-                content_type=ContentType.objects.get_for_model(queryset.model),
-            )
-            queryset = queryset.annotate(is_favorite=Exists(is_favorite_subquery))
-        return queryset
+    def get_favorite_ids(self, model):
+        """Ids of user's favorite objects of model, None for anonymous"""
+        if not self.request.user.is_authenticated:
+            return None
+        content_type = ContentType.objects.get_for_model(model)
+        return FavoriteCache.get_ids(self.request.user.pk, content_type.pk)
+
+    def mark_favorites(self, objects):
+        """Set is_favorite attribute of objects (list or queryset)"""
+        objects = list(objects)
+        if objects:
+            ids = self.get_favorite_ids(type(objects[0]))
+            if ids is not None:
+                for obj in objects:
+                    obj.is_favorite = obj.pk in ids
+        return objects
+
+    def get_serializer(self, *args, **kwargs):
+        if args and args[0] is not None:
+            self.mark_favorites(args[0] if kwargs.get("many") else [args[0]])
+        return super().get_serializer(*args, **kwargs)
 
     @action(
         detail=False,
@@ -205,12 +473,27 @@ class FavoriteMixin:
         """
         List of objects in favorites
         """
-        queryset = self.get_queryset().filter(is_favorite=True)
-        serializer_class = self.get_serializer_class()
-        serializer = serializer_class(queryset, many=True)
+        ids = self.get_favorite_ids(self.get_queryset().model)
+        queryset = self.get_queryset().filter(pk__in=ids)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class MessagePagination(KeysetPagination):
+    """Message history: always by cursor, newest first"""
+
+    default_limit = 50
+    max_limit = 200
+    ordering_field = "created_at"
+
+    def get_mode(self, request) -> str:
+        return PAGINATION_MODE_CURSOR
+
+
 class MessagesMixin:
     """
     Mixin for objects with chat/feedback.
@@ -218,20 +501,37 @@ class MessagesMixin:
     """
 
     @extend_schema(
-        request=DocumentMessageSerializer(), responses=DocumentMessageSerializer()
+        description="Message history, newest first",
+        methods=["GET"],
+        parameters=[
+            OpenApiParameter(
+                "since",
+                OpenApiTypes.DATETIME,
+                description="Only messages created after this time",
+            )
+        ],
+        responses=DocumentMessageSerializer(many=True),
+    )
+    @extend_schema(
+        methods=["PATCH"],
+        request=DocumentMessageSerializer(),
+        responses=DocumentMessageSerializer(),
     )
     @action(
         detail=True,
-        methods=["patch"],
+        methods=["get", "patch"],
         url_path="messages",
     )
     def messages(self, request, version=None, pk=None):
         """
-        Add message
+        Message history or add message
         """
         instance = self.get_object()
         content_type = ContentType.objects.get_for_model(instance)
 
+        if request.method == "GET":
+            return self.get_message_history(request, content_type, instance)
+
         serializer_in = DocumentMessageSerializer(data=request.data)
         if serializer_in.is_valid():
             message_content = serializer_in.validated_data["content"]
@@ -246,13 +546,43 @@ class MessagesMixin:
             return Response(data=serializer_out.data, status=status.HTTP_201_CREATED)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    def get_message_history(self, request, content_type, instance):
+        queryset = DocumentMessage.objects.filter(
+            content_type=content_type, object_id=instance.id
+        ).select_related("sender")
+
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = parse_datetime(since.replace(" ", "+"))
+            except ValueError:
+                # well formed, but not a valid datetime
+                since = None
+            if since is None:
+                return Response(
+                    {"since": ["Datetime in ISO 8601 format required."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            queryset = queryset.filter(created_at__gt=since)
+
+        paginator = MessagePagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = DocumentMessageSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 
-class NewsPagination(pagination.LimitOffsetPagination):
+class NewsPagination(KeysetPagination):
     default_limit = 10
+    ordering_field = "created_at"
 
 
 class NewsPublicViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    ConditionalGetMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     """View for end or anonimous users"""
 
@@ -319,11 +649,158 @@ class CityViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = CitySerializer
     pagination_class = None
 
-    queryset = City.objects.all()
+    queryset = City.objects.select_related("region")
+
+
+class ReferenceViewSet(viewsets.ViewSet):
+    """
+    Cached reference data bundle (cities, regions, genders, statuses, skills).
+    Version is a content hash, sent as strong ETag
+    """
+
+    permission_classes = [
+        permissions.IsAuthenticated,
+    ]
+
+    @extend_schema(request=None, responses={200: None, 304: None})
+    def list(self, request, version=None):
+        bundle = reference_bundle.get()
+        if bundle.etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(bundle.content, content_type="application/json")
+        response["ETag"] = bundle.etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class SkillViewSet(viewsets.ViewSet):
+    """
+    Skill names suggestions from in-process index
+    """
+
+    permission_classes = [
+        permissions.IsAuthenticated,
+    ]
+
+    @extend_schema(
+        description="Existing skills with name prefix, most used first",
+        parameters=[
+            OpenApiParameter("prefix", OpenApiTypes.STR, required=True),
+            OpenApiParameter("limit", OpenApiTypes.INT, description="Result size"),
+        ],
+        responses={200: None, 400: None},
+    )
+    @action(detail=False, methods=["get"], url_path="suggest")
+    def suggest(self, request, version=None):
+        prefix = request.query_params.get("prefix", "").strip()
+        if not prefix:
+            return Response(
+                {"prefix": ["This parameter is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", SUGGEST_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= MAX_SUGGEST_LIMIT:
+            return Response(
+                {"limit": [f"Must be from 1 to {MAX_SUGGEST_LIMIT}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(skill_index.get().suggest(prefix, limit))
+
+
+class ModerationViewSet(viewsets.ViewSet):
+    """
+    Moderation queue: batch of pending documents leased to moderator,
+    bulk decisions on leased documents
+    """
+
+    permission_classes = [
+        permissions.IsAuthenticated,
+        IsModerator,
+    ]
+    serializer_classes = {
+        "employer": EmployerSerializerExt,
+        "cv": CVSerializerExt,
+        "vacancy": VacancySerializerExt,
+    }
+
+    def get_batch_size(self) -> int:
+        try:
+            size = int(self.request.query_params.get("limit", BATCH_SIZE))
+        except ValueError:
+            size = 0
+        if not 0 < size <= MAX_BATCH_SIZE:
+            raise serializers.ValidationError(
+                {"limit": [f"Must be from 1 to {MAX_BATCH_SIZE}."]}
+            )
+        return size
+
+    def get_documents(self, leases) -> dict:
+        """(type, id) -> document on moderation"""
+        ids = {}
+        for lease in leases:
+            queue_type = get_queue_type(lease.content_type_id)
+            ids.setdefault(queue_type, []).append(lease.object_id)
+        documents = {}
+        for queue_type, pks in ids.items():
+            serializer_class = self.serializer_classes[queue_type]
+            queryset = get_queryset_shape(serializer_class).apply(
+                serializer_class.Meta.model.objects.filter(
+                    pk__in=pks, status=ConstDocumentStatus.pending
+                )
+            )
+            for obj in queryset:
+                documents[(queue_type, obj.pk)] = serializer_class(obj).data
+        return documents
+
+    @extend_schema(
+        description="Batch of documents on moderation leased to moderator",
+        parameters=[
+            OpenApiParameter("limit", OpenApiTypes.INT, description="Batch size")
+        ],
+        responses={200: None},
+    )
+    def list(self, request, version=None):
+        leases = take_batch(request.user, self.get_batch_size())
+        documents = self.get_documents(leases)
+        data = []
+        for lease in leases:
+            key = (get_queue_type(lease.content_type_id), lease.object_id)
+            if key in documents:
+                data.append(
+                    {
+                        "type": key[0],
+                        "id": key[1],
+                        "lease_expires_at": lease.expires_at,
+                        "document": documents[key],
+                    }
+                )
+        return Response(data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        description="Approve/reject leased documents in one transaction",
+        request=ModerationDecisionsSerializer,
+        responses={200: None, 400: None},
+    )
+    @action(detail=False, methods=["post"], url_path="decisions")
+    def decisions(self, request, version=None):
+        serializer = ModerationDecisionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = apply_decisions(request.user, serializer.validated_data["decisions"])
+        return Response(
+            {
+                key: [{"type": queue_type, "id": pk} for queue_type, pk in keys]
+                for key, keys in result.items()
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class EmployeeProtectedViewSet(
-    OwnedModelMixin, LoggedModelMixin, viewsets.ModelViewSet
+    QuerysetShapingMixin, OwnedModelMixin, LoggedModelMixin, viewsets.ModelViewSet
 ):
     """View for employee"""
 
@@ -336,9 +813,7 @@ class EmployeeProtectedViewSet(
     pagination_class = None
 
     def get_queryset(self):
-        return Employee.objects.filter(owner=self.request.user).prefetch_related(
-            "skills", "city"
-        )
+        return self.shape_queryset(Employee.objects.filter(owner=self.request.user))
 
     def get_serializer_class(self):
         if self.request.method in REQUEST_METHODS_CHANGE:
@@ -346,26 +821,32 @@ class EmployeeProtectedViewSet(
         return EmployeeSerializerExt
 
 
-class EmployerPagination(pagination.LimitOffsetPagination):
+class EmployerPagination(KeysetPagination):
     default_limit = 10
 
 
 class EmployerPublicViewSet(
-    mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+    ConditionalGetMixin,
+    QuerysetShapingMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
 ):
     """View for end or anonimous users"""
 
-    queryset = (
-        Employer.objects.filter(status=ConstDocumentStatus.approved)
-        .order_by("-updated_at")
-        .prefetch_related("city")
-    )
+    queryset = Employer.objects.filter(status=ConstDocumentStatus.approved)
     permission_classes = [permissions.DjangoModelPermissionsOrAnonReadOnly]
     serializer_class = EmployerSerializerExt
     pagination_class = EmployerPagination
 
+    def get_queryset(self):
+        return self.shape_queryset(super().get_queryset().order_by("-updated_at"))
+
 
 class EmployerProtectedViewSet(
+    RulePermissionMixin,
+    ConditionalGetMixin,
+    QuerysetShapingMixin,
     OwnedModelMixin,
     LoggedModelMixin,
     DocStatusModelMixin,
@@ -382,23 +863,8 @@ class EmployerProtectedViewSet(
     pagination_class = EmployerPagination
 
     def get_queryset(self):
-        role = self.request.user.role
-
-        if self.request.user.is_superuser:
-            qs = Employer.objects.all()
-
-        # employer -> owned or published
-        elif role == UserRoles.employer.value:
-            qs = Employer.objects.filter(owner=self.request.user)
-
-        # moderator -> on moderation
-        elif role == UserRoles.moderator.value:
-            qs = Employer.objects.filter(status=ConstDocumentStatus.pending)
-
-        else:
-            qs = Employer.objects.filter(status=ConstDocumentStatus.approved)
-
-        return qs.order_by("-updated_at").prefetch_related("city")
+        qs = self.filter_scope(Employer.objects.all())
+        return self.shape_queryset(qs.order_by("-updated_at"))
 
     def get_serializer_class(self):
         if self.request.method in REQUEST_METHODS_CHANGE:
@@ -406,15 +872,20 @@ class EmployerProtectedViewSet(
         return EmployerSerializerExt
 
 
-class CVPagination(pagination.LimitOffsetPagination):
+class CVPagination(KeysetPagination):
     default_limit = 10
 
 
 class CVViewSet(
+    RulePermissionMixin,
+    ConditionalGetMixin,
+    QuerysetShapingMixin,
     OwnedModelMixin,
     LoggedModelMixin,
     DocStatusModelMixin,
     FavoriteMixin,
+    ImportMixin,
+    MatchingMixin,
     viewsets.ModelViewSet,
 ):
     """View for CV"""
@@ -426,31 +897,13 @@ class CVViewSet(
     ]
     serializer_class = CVSerializerExt
     pagination_class = CVPagination
+    importer_class = CVImporter
 
     filterset_class = CVFilter
 
     def get_queryset(self):
-        role = self.request.user.role
-
-        if self.request.user.is_superuser:
-            qs = CV.objects.all()
-
-        # employee -> own
-        elif role == UserRoles.employee.value:
-            qs = CV.objects.filter(owner=self.request.user)
-
-        # moderator -> on moderation
-        elif role == UserRoles.moderator.value:
-            qs = CV.objects.filter(status=ConstDocumentStatus.pending)
-
-        else:
-            qs = CV.objects.filter(status=ConstDocumentStatus.approved)
-
-        return (
-            self.annotate_qs_is_favorite_field(qs)
-            .order_by("-updated_at")
-            .prefetch_related("employee", "experience", "education")
-        )
+        qs = self.filter_scope(CV.objects.all())
+        return self.shape_queryset(qs.order_by("-updated_at"))
 
     def get_serializer_class(self):
         if self.request.method in REQUEST_METHODS_CHANGE:
@@ -463,16 +916,47 @@ class CVViewSet(
             owner=request.user, updated_by=request.user, employee=request.user.employee
         )
 
+    @extend_schema(
+        description="Best approved vacancies for CV with match scores",
+        parameters=[
+            OpenApiParameter("limit", OpenApiTypes.INT, description="Result size")
+        ],
+        responses=VacancySerializerExt(many=True),
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="matches",
+        permission_classes=[
+            permissions.IsAuthenticated,
+            IsOwnerOrSuperuser,
+        ],
+    )
+    def matches(self, request, version=None, pk=None):
+        """
+        Vacancies matching CV
+        """
+        instance = self.get_object()
+        matches = get_matches(instance, self.get_match_limit())
+        # corpus can be older than document statuses
+        approved = Vacancy.objects.filter(status=ConstDocumentStatus.approved)
+        return self.get_match_response(matches, approved, VacancySerializerExt)
+
 
-class VacancyPagination(pagination.LimitOffsetPagination):
+class VacancyPagination(KeysetPagination):
     default_limit = 10
 
 
 class VacancyViewSet(
+    RulePermissionMixin,
+    ConditionalGetMixin,
+    QuerysetShapingMixin,
     OwnedModelMixin,
     LoggedModelMixin,
     DocStatusModelMixin,
     FavoriteMixin,
+    ImportMixin,
+    MatchingMixin,
     viewsets.ModelViewSet,
 ):
     """View for Vacancies"""
@@ -484,31 +968,13 @@ class VacancyViewSet(
     ]
     serializer_class = VacancySerializerExt
     pagination_class = VacancyPagination
+    importer_class = VacancyImporter
 
     filterset_class = VacancyFilter
 
     def get_queryset(self):
-        role = self.request.user.role
-
-        if self.request.user.is_superuser:
-            qs = Vacancy.objects.all().prefetch_related
-
-        # employer -> own
-        elif role == UserRoles.employer.value:
-            qs = Vacancy.objects.filter(owner=self.request.user)
-
-        # moderator -> on moderation
-        elif role == UserRoles.moderator.value:
-            qs = Vacancy.objects.filter(status=ConstDocumentStatus.pending)
-
-        else:
-            qs = Vacancy.objects.filter(status=ConstDocumentStatus.approved)
-
-        return (
-            self.annotate_qs_is_favorite_field(qs)
-            .prefetch_related("employer", "city")
-            .order_by("-updated_at")
-        )
+        qs = self.filter_scope(Vacancy.objects.all())
+        return self.shape_queryset(qs.order_by("-updated_at"))
 
     def get_serializer_class(self):
         if self.request.method in REQUEST_METHODS_CHANGE:
@@ -521,12 +987,57 @@ class VacancyViewSet(
             owner=request.user, updated_by=request.user, employer=request.user.employer
         )
 
+    @extend_schema(
+        description="Best approved CVs for vacancy with match scores",
+        parameters=[
+            OpenApiParameter("limit", OpenApiTypes.INT, description="Result size")
+        ],
+        responses=CVSerializerExt(many=True),
+    )
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="candidates",
+        permission_classes=[
+            permissions.IsAuthenticated,
+            IsOwnerOrSuperuser,
+        ],
+    )
+    def candidates(self, request, version=None, pk=None):
+        """
+        CVs matching vacancy
+        """
+        instance = self.get_object()
+        matches = get_candidates(instance, self.get_match_limit())
+        # corpus can be older than document statuses
+        approved = CV.objects.filter(status=ConstDocumentStatus.approved)
+        return self.get_match_response(matches, approved, CVSerializerExt)
+
+
+class EventStreamMixin:
+    """
+    Mixin for objects with event stream (recrutingapp.streaming, ASGI only).
+    Stream ticket is issued to users who can read the object
+    """
+
+    @extend_schema(request=None, responses={200: None})
+    @action(detail=True, methods=["get"], url_path="events-ticket")
+    def events_ticket(self, request, version=None, pk=None):
+        """Ticket for GET <id>/events/?ticket=<ticket>"""
+        self.get_object()
+        path = request.path[: -len("events-ticket/")] + "events/"
+        ticket = StreamTicket.for_path(request.user, path)
+        return Response({"ticket": str(ticket)}, headers={"Cache-Control": "no-store"})
+
 
 class CVResponseViewSet(
+    RulePermissionMixin,
+    QuerysetShapingMixin,
     OwnedModelMixin,
     LoggedModelMixin,
     DocStatusModelMixin,
     MessagesMixin,
+    EventStreamMixin,
     viewsets.ModelViewSet,
 ):
     """View for CV response"""
@@ -540,23 +1051,8 @@ class CVResponseViewSet(
     pagination_class = None
 
     def get_queryset(self):
-        role = self.request.user.role
-
-        if self.request.user.is_superuser:
-            qs = CVResponse.objects.all()
-
-        # employer -> own vacancy
-        elif role == UserRoles.employer.value:
-            qs = CVResponse.objects.filter(owner=self.request.user)
-
-        # employee -> own CV
-        elif role == UserRoles.employee.value:
-            qs = CVResponse.objects.filter(cv__owner=self.request.user)
-
-        else:
-            qs = CVResponse.objects.none()
-
-        return qs.prefetch_related("cv", "vacancy").order_by("-updated_at")
+        qs = self.filter_scope(CVResponse.objects.all())
+        return self.shape_queryset(qs.order_by("-updated_at"))
 
     def get_serializer_class(self):
         if self.request.method in REQUEST_METHODS_CHANGE:
@@ -565,10 +1061,13 @@ class CVResponseViewSet(
 
 
 class VacancyResponseViewSet(
+    RulePermissionMixin,
+    QuerysetShapingMixin,
     OwnedModelMixin,
     LoggedModelMixin,
     DocStatusModelMixin,
     MessagesMixin,
+    EventStreamMixin,
     viewsets.ModelViewSet,
 ):
     """View for Vacancy response"""
@@ -582,23 +1081,8 @@ class VacancyResponseViewSet(
     pagination_class = None
 
     def get_queryset(self):
-        role = self.request.user.role
-
-        if self.request.user.is_superuser:
-            qs = VacancyResponse.objects.all()
-
-        # employer -> own vacancy
-        elif role == UserRoles.employer.value:
-            qs = VacancyResponse.objects.filter(vacancy__owner=self.request.user)
-
-        # employee -> own CV
-        elif role == UserRoles.employee.value:
-            qs = VacancyResponse.objects.filter(owner=self.request.user)
-
-        else:
-            qs = VacancyResponse.objects.none()
-
-        return qs.prefetch_related("cv", "vacancy").order_by("-updated_at")
+        qs = self.filter_scope(VacancyResponse.objects.all())
+        return self.shape_queryset(qs.order_by("-updated_at"))
 
     def get_serializer_class(self):
         if self.request.method in REQUEST_METHODS_CHANGE:
@@ -0,0 +1,172 @@
+"""
+Status workflow of documents (DocStatusMixin models).
+
+Allowed transitions are declared in TRANSITIONS: source statuses, target
+status and actor guard (document owner or other user). Documents are moved
+by one conditional UPDATE with source statuses and guards in WHERE, so of
+concurrent transitions of the same document only one succeeds. Every move
+is recorded as DocumentTransition and sent as document_transitioned signal,
+receivers are connected in recrutingapp.signals.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from recrutingapp.models import ConstDocumentStatus, DocumentTransition
+
+# actor guards
+OWNER = "owner"
+OTHER = "other"
+
+# sender - document model, transitions - list of DocumentTransition
+document_transitioned = Signal()
+
+
+class Transition:
+    """Move to target status from source statuses (None - any)"""
+
+    def __init__(self, target, source=None, actor=None):
+        self.target = target
+        self.source = source
+        self.actor = actor
+
+    def allows(self, status_id, owner_id, user) -> bool:
+        if self.source is not None and status_id not in self.source:
+            return False
+        if self.actor == OWNER:
+            return owner_id == user.pk
+        if self.actor == OTHER:
+            return owner_id != user.pk
+        return True
+
+    def get_q(self, user) -> Q:
+        q = Q()
+        if self.source is not None:
+            q &= Q(status__in=self.source)
+        if self.actor == OWNER:
+            q &= Q(owner=user)
+        elif self.actor == OTHER:
+            q &= ~Q(owner=user)
+        return q
+
+
+TRANSITIONS = (
+    # owner returns document to draft
+    Transition(ConstDocumentStatus.draft, actor=OWNER),
+    # sent to moderation/review
+    Transition(
+        ConstDocumentStatus.pending,
+        source=(ConstDocumentStatus.draft, ConstDocumentStatus.rejected),
+    ),
+    # moderator/reviewer decision
+    Transition(
+        ConstDocumentStatus.approved,
+        source=(ConstDocumentStatus.pending,),
+        actor=OTHER,
+    ),
+    Transition(
+        ConstDocumentStatus.rejected,
+        source=(ConstDocumentStatus.pending,),
+        actor=OTHER,
+    ),
+)
+
+
+class TransitionError(Exception):
+    pass
+
+
+class TransitionConflict(TransitionError):
+    """Document was changed by other request"""
+
+
+def get_transitions(target, transitions=TRANSITIONS) -> list:
+    return [transition for transition in transitions if transition.target == target]
+
+
+def get_transition_q(target, user, transitions=TRANSITIONS):
+    """WHERE of allowed moves to target, None if there are no transitions"""
+    q = None
+    for transition in get_transitions(target, transitions):
+        q = transition.get_q(user) if q is None else q | transition.get_q(user)
+    return q
+
+
+def record_transitions(model, rows, target, user, info) -> list:
+    """DocumentTransition of moved rows (pk, source status), signal sent"""
+    content_type = ContentType.objects.get_for_model(model)
+    records = DocumentTransition.objects.bulk_create(
+        DocumentTransition(
+            content_type=content_type,
+            object_id=pk,
+            source_id=source,
+            target_id=target,
+            info=info,
+            actor=user,
+        )
+        for pk, source in rows
+    )
+    document_transitioned.send(sender=model, transitions=records)
+    return records
+
+
+def move_document(obj, target, user, info=""):
+    """
+    Move loaded document to target status, object is updated.
+    TransitionError if move is not allowed, TransitionConflict if status
+    was changed after the document was loaded
+    """
+    allowed = any(
+        transition.allows(obj.status_id, obj.owner_id, user)
+        for transition in get_transitions(target)
+    )
+    if not allowed:
+        raise TransitionError()
+
+    model = type(obj)
+    now = timezone.now()
+    with transaction.atomic():
+        # conditional on loaded status
+        updated = model.objects.filter(pk=obj.pk, status=obj.status_id).update(
+            status=target, status_info=info, updated_by=user, updated_at=now
+        )
+        if not updated:
+            raise TransitionConflict()
+        record_transitions(model, [(obj.pk, obj.status_id)], target, user, info)
+
+    obj.status_id = target
+    obj.status_info = info
+    obj.updated_by = user
+    obj.updated_at = now
+    return obj
+
+
+def move_documents(queryset, target, user, info="") -> list:
+    """
+    Move documents of queryset allowed to move to target status with one
+    UPDATE, transitions of moved documents
+    """
+    q = get_transition_q(target, user)
+    if q is None:
+        return []
+    model = queryset.model
+    queryset = queryset.filter(q).order_by()
+    if connection.features.has_select_for_update_of:
+        queryset = queryset.select_for_update(of=("self",))
+    else:
+        queryset = queryset.select_for_update()
+
+    with transaction.atomic():
+        # rows are locked till commit (if supported by database)
+        rows = list(queryset.values_list("pk", "status_id"))
+        if not rows:
+            return []
+        updated = model.objects.filter(q, pk__in=[pk for pk, _ in rows]).update(
+            status=target, status_info=info, updated_by=user, updated_at=timezone.now()
+        )
+        if updated != len(rows):
+            raise TransitionConflict()
+        return record_transitions(model, rows, target, user, info)
@@ -7,3 +7,10 @@ from userapp import models
 class CustomUserAdmin(admin.ModelAdmin):
     list_display = ["id", "username", "email", "is_active", "date_created"]
     ordering = ["-date_created"]
+
+
+@admin.register(models.MailOutbox)
+class MailOutboxAdmin(admin.ModelAdmin):
+    list_display = ["id", "to", "subject", "status", "attempts", "created_at"]
+    list_filter = ["status"]
+    ordering = ["-created_at"]
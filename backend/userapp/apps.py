@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class UserappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "userapp"
+
+    def ready(self):
+        from userapp.signals import connect_signals
+
+        connect_signals()
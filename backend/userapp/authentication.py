@@ -0,0 +1,105 @@
+"""
+JWT authentication with user claims.
+
+Access token carries fields used by viewsets and permissions
+(role, is_superuser, is_validated...), so request user is built
+from the token without a query. Claim "ver" (userapp.cache.AuthVersion)
+revokes tokens when any of these fields or password are changed.
+Tokens without claims are handled by the standard DB lookup.
+
+Stream ticket is a short-lived token for one URL path, passed in query
+string where headers can't be sent (EventSource), so access tokens never
+get into access logs.
+"""
+
+import datetime
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from userapp.cache import AuthVersion
+from userapp.models import CustomUser
+
+VERSION_CLAIM = "ver"
+USER_CLAIMS = ("username", "role", "is_superuser", "is_staff", "is_validated")
+PATH_CLAIM = "path"
+
+STREAM_TICKET_PARAM = "ticket"
+
+
+def set_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token[VERSION_CLAIM] = AuthVersion.compute(user)
+
+
+def get_claims_user(token) -> CustomUser:
+    """
+    Unsaved user with claim fields only, good for permission checks
+    and foreign keys. Never save it, reload from DB for other fields.
+    """
+    user = CustomUser(
+        id=token[api_settings.USER_ID_CLAIM],
+        is_active=True,
+        **{claim: token[claim] for claim in USER_CLAIMS},
+    )
+    user._state.adding = False
+    user._state.db = "default"
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or any(c not in validated_token for c in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        if validated_token[VERSION_CLAIM] != AuthVersion.get(user_id):
+            raise AuthenticationFailed(
+                _("User data has been changed, token is revoked"),
+                code="token_revoked",
+            )
+        return get_claims_user(validated_token)
+
+
+class StreamTicket(Token):
+    token_type = "stream"
+    lifetime = datetime.timedelta(seconds=60)
+
+    @classmethod
+    def for_path(cls, user, path) -> "StreamTicket":
+        ticket = cls.for_user(user)
+        for claim in USER_CLAIMS:
+            ticket[claim] = getattr(user, claim)
+        # request user can be built from claims, without password
+        ticket[VERSION_CLAIM] = AuthVersion.get(user.pk)
+        ticket[PATH_CLAIM] = path
+        return ticket
+
+
+class StreamTicketAuthentication(BaseAuthentication):
+    """Stream ticket of 'ticket' query parameter, valid for its path only"""
+
+    def authenticate(self, request):
+        value = request.query_params.get(STREAM_TICKET_PARAM)
+        if not value:
+            return None
+        try:
+            ticket = StreamTicket(value)
+        except TokenError as exc:
+            raise AuthenticationFailed(str(exc), code="ticket_not_valid")
+        if ticket.get(PATH_CLAIM) != request.path:
+            raise AuthenticationFailed(
+                _("Ticket is issued for another path"), code="ticket_not_valid"
+            )
+        return ClaimsJWTAuthentication().get_user(ticket), ticket
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
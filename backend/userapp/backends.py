@@ -0,0 +1,24 @@
+"""
+Authentication backends
+"""
+
+from django.contrib.auth.backends import ModelBackend
+
+from userapp.cache import PermissionCache
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Model backend with permission sets from shared cache,
+    so DjangoModelPermissions checks don't query groups on every request
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = PermissionCache.get_permissions(
+                user_obj.pk,
+                lambda: super(ModelBackend, self).get_all_permissions(user_obj),
+            )
+        return user_obj._perm_cache
@@ -0,0 +1,102 @@
+"""
+Shared permission cache (django cache framework).
+
+User permission set is stored under key with two versions:
+global (groups and group permissions) and per user (membership).
+Versions are changed by signals (userapp.signals), old keys just expire.
+
+Auth version is a digest of user fields embedded into JWT claims
+(userapp.authentication), tokens with other version are rejected.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from userapp.models import CustomUser
+
+PERMISSION_CACHE_TIMEOUT = 3600
+
+GLOBAL_VERSION_KEY = "perms-version"
+USER_VERSION_KEY = "perms-version:{user_id}"
+PERMISSIONS_KEY = "perms:{user_id}:{global_version}:{user_version}"
+
+AUTH_VERSION_TIMEOUT = 300
+AUTH_VERSION_KEY = "auth-version:{user_id}"
+
+
+class PermissionCache:
+    @staticmethod
+    def new_version() -> str:
+        return str(time.time_ns())
+
+    @staticmethod
+    def get_key(user_id) -> str:
+        user_version_key = USER_VERSION_KEY.format(user_id=user_id)
+        versions = cache.get_many([GLOBAL_VERSION_KEY, user_version_key])
+        return PERMISSIONS_KEY.format(
+            user_id=user_id,
+            global_version=versions.get(GLOBAL_VERSION_KEY, 0),
+            user_version=versions.get(user_version_key, 0),
+        )
+
+    @staticmethod
+    def get_permissions(user_id, get_permissions) -> set:
+        """Permission set from cache, get_permissions() is called on miss"""
+        key = PermissionCache.get_key(user_id)
+        permissions = cache.get(key)
+        if permissions is None:
+            permissions = get_permissions()
+            cache.set(key, permissions, PERMISSION_CACHE_TIMEOUT)
+        return permissions
+
+    @staticmethod
+    def invalidate_user(user_id):
+        cache.set(
+            USER_VERSION_KEY.format(user_id=user_id),
+            PermissionCache.new_version(),
+            None,
+        )
+
+    @staticmethod
+    def invalidate_all():
+        cache.set(GLOBAL_VERSION_KEY, PermissionCache.new_version(), None)
+
+
+class AuthVersion:
+    """
+    Version of user claims: changed with role, flags, activity and password.
+    Cached value is dropped on user save, TTL bounds staleness
+    of changes made by queryset.update()
+    """
+
+    @staticmethod
+    def compute(user) -> str:
+        value = "|".join(
+            str(v)
+            for v in (
+                user.role,
+                user.is_superuser,
+                user.is_staff,
+                user.is_validated,
+                user.is_active,
+                user.password,
+            )
+        )
+        return salted_hmac("userapp.auth_version", value).hexdigest()[:16]
+
+    @staticmethod
+    def get(user_id) -> str:
+        """Current version, empty string for deleted user"""
+        key = AUTH_VERSION_KEY.format(user_id=user_id)
+        version = cache.get(key)
+        if version is None:
+            user = CustomUser.objects.filter(pk=user_id).first()
+            version = AuthVersion.compute(user) if user is not None else ""
+            cache.set(key, version, AUTH_VERSION_TIMEOUT)
+        return version
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(AUTH_VERSION_KEY.format(user_id=user_id))
@@ -0,0 +1,58 @@
+"""
+Delivery of outgoing mail from outbox.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from userapp.outbox import BATCH_SIZE, MAX_ATTEMPTS, MailWorker, requeue_dead
+
+MODES = ["run", "once", "requeue"]
+
+
+class Command(BaseCommand):
+    help = (
+        "This command using for sending outgoing mail in loop (default), "
+        "sending due mail once (-m once) or returning dead mail to queue (-m requeue)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-m",
+            "--mode",
+            choices=MODES,
+            default=MODES[0],
+            dest="mode",
+            help="Worker mode",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="Seconds between queue polls"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=BATCH_SIZE, help="Mail per transaction"
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=MAX_ATTEMPTS,
+            help="Attempts before mail is dead",
+        )
+
+    def handle(self, *args, **options):
+        if options["mode"] == MODES[2]:
+            count = requeue_dead()
+            self.stdout.write(self.style.SUCCESS(f"{count} mail returned to queue"))
+            return
+
+        worker = MailWorker(options["batch_size"], options["max_attempts"])
+        while True:
+            counts = worker.drain()
+            if any(counts.values()):
+                self.stdout.write(
+                    f"{counts['sent']} sent, {counts['retry']} to retry, "
+                    f"{counts['dead']} dead"
+                )
+            if options["mode"] == MODES[1]:
+                return
+            time.sleep(options["interval"])
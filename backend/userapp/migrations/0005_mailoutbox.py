@@ -0,0 +1,82 @@
+# Generated by Django 4.1 on 2026-10-18 10:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("userapp", "0004_alter_customuser_role"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=256, verbose_name="subject")),
+                ("body", models.TextField(verbose_name="body")),
+                ("from_email", models.CharField(max_length=256, verbose_name="from")),
+                ("to", models.CharField(max_length=256, verbose_name="to")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("sent", "sent"),
+                            ("dead", "dead"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="delivery status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="delivery attempts"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="next delivery attempt",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, default="", verbose_name="last delivery error"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created"),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="sent"),
+                ),
+            ],
+            options={
+                "verbose_name": "outgoing mail",
+                "verbose_name_plural": "outgoing mail",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="mailoutbox",
+            index=models.Index(
+                fields=["status", "next_attempt_at"], name="mailoutbox_due_idx"
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin, UserManager
 from django.contrib.auth.validators import ASCIIUsernameValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -94,3 +95,43 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def get_short_name(self):
         """Return the short name for the user."""
         return self.first_name
+
+
+class MailStatus(Enum):
+    pending = "pending"
+    sent = "sent"
+    dead = "dead"
+
+
+class MailOutbox(models.Model):
+    """
+    Outgoing e-mail, written in the transaction of the changes it reports
+    and delivered by mail worker (userapp.outbox)
+    """
+
+    subject = models.CharField(_("subject"), max_length=256)
+    body = models.TextField(_("body"))
+    from_email = models.CharField(_("from"), max_length=256)
+    to = models.CharField(_("to"), max_length=256)
+    status = models.CharField(
+        _("delivery status"),
+        max_length=20,
+        default=MailStatus.pending.value,
+        choices=[(s.value, s.name) for s in MailStatus],
+    )
+    attempts = models.PositiveIntegerField(_("delivery attempts"), default=0)
+    next_attempt_at = models.DateTimeField(
+        _("next delivery attempt"), default=timezone.now
+    )
+    last_error = models.TextField(_("last delivery error"), default="", blank=True)
+    created_at = models.DateTimeField(_("created"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("sent"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("outgoing mail")
+        verbose_name_plural = _("outgoing mail")
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="mailoutbox_due_idx"
+            )
+        ]
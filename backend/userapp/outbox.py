@@ -0,0 +1,130 @@
+"""
+Transactional outbox for e-mail.
+
+Mail is stored in MailOutbox in the caller's transaction, so it exists only
+if the changes it reports are committed. Worker (mailworker command) sends
+due mail in batches over one SMTP connection. Failed mail is retried with
+exponential backoff and marked dead after MAX_ATTEMPTS.
+"""
+
+import datetime
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from userapp.models import MailOutbox, MailStatus
+
+DEFAULT_FROM_EMAIL = "noreply@example.com"
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+# delay after the first failure, doubled after every next one
+BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+
+def enqueue_mail(subject, body, to, from_email=DEFAULT_FROM_EMAIL) -> MailOutbox:
+    return MailOutbox.objects.create(
+        subject=subject, body=body, to=to, from_email=from_email
+    )
+
+
+def get_backoff(attempts) -> datetime.timedelta:
+    seconds = BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return datetime.timedelta(seconds=min(seconds, MAX_BACKOFF_SECONDS))
+
+
+class MailWorker:
+    """Delivery of due outbox mail, one SMTP connection per worker"""
+
+    def __init__(self, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.connection = None
+
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def send(self, mail):
+        message = EmailMessage(
+            mail.subject,
+            mail.body,
+            mail.from_email,
+            [mail.to],
+            connection=self.connection,
+        )
+        # connection is kept open by worker between messages
+        self.open()
+        self.connection.send_messages([message])
+
+    def get_due(self):
+        queryset = MailOutbox.objects.filter(
+            status=MailStatus.pending.value, next_attempt_at__lte=timezone.now()
+        ).order_by("next_attempt_at", "pk")
+        if connection.features.has_select_for_update_skip_locked:
+            # parallel workers take different mail
+            queryset = queryset.select_for_update(skip_locked=True)
+        return list(queryset[: self.batch_size])
+
+    def process_batch(self) -> dict:
+        """Send one batch of due mail, counts by result"""
+        counts = {"sent": 0, "retry": 0, "dead": 0}
+        with transaction.atomic():
+            batch = self.get_due()
+            for mail in batch:
+                mail.attempts += 1
+                try:
+                    self.send(mail)
+                except Exception as e:
+                    # broken connection is opened again for the next mail
+                    self.close()
+                    mail.last_error = f"{e.__class__.__name__}: {e}"[:1000]
+                    if mail.attempts >= self.max_attempts:
+                        mail.status = MailStatus.dead.value
+                        counts["dead"] += 1
+                    else:
+                        mail.next_attempt_at = timezone.now() + get_backoff(
+                            mail.attempts
+                        )
+                        counts["retry"] += 1
+                else:
+                    mail.status = MailStatus.sent.value
+                    mail.sent_at = timezone.now()
+                    mail.last_error = ""
+                    counts["sent"] += 1
+            MailOutbox.objects.bulk_update(
+                batch,
+                ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+            )
+        return counts
+
+    def drain(self) -> dict:
+        """Send batches while there is due mail, total counts"""
+        total = {"sent": 0, "retry": 0, "dead": 0}
+        try:
+            while True:
+                counts = self.process_batch()
+                for key, value in counts.items():
+                    total[key] += value
+                if sum(counts.values()) < self.batch_size:
+                    return total
+        finally:
+            self.close()
+
+
+def requeue_dead() -> int:
+    """Dead mail to pending with new attempts"""
+    return MailOutbox.objects.filter(status=MailStatus.dead.value).update(
+        status=MailStatus.pending.value, attempts=0, next_attempt_at=timezone.now()
+    )
@@ -2,9 +2,17 @@ import random
 
 from django.core.validators import validate_email
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 
 from rest_framework import serializers, validators
-
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from userapp.authentication import set_user_claims
 from userapp.models import UserRoles, CustomUser
 from userapp.utils import UserGroupUtils, send_confirmation_mail
 
@@ -42,11 +50,9 @@ class SignUpSerializer(serializers.ModelSerializer):
         user.validation_code = validation_code
         user.is_validated = False
         user.set_password(validated_data["password"])
-        user.save()
-        try:
+        with transaction.atomic():
+            user.save()
             send_confirmation_mail(user)
-        except Exception:
-            pass
         return user
 
 
@@ -96,3 +102,50 @@ class UserSerializer(serializers.ModelSerializer):
             "role": {"read_only": True},
             "is_validated": {"read_only": True},
         }
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair with user claims (userapp.authentication)
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        set_user_claims(token, user)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Access token with current user claims, user is read from DB
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user = CustomUser.objects.filter(
+            pk=refresh.get(api_settings.USER_ID_CLAIM)
+        ).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                "User not found or inactive", code="user_inactive"
+            )
+        set_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
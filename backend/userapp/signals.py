@@ -0,0 +1,86 @@
+"""
+Permission cache and auth version invalidation
+"""
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+from userapp.cache import AuthVersion, PermissionCache
+from userapp.models import CustomUser
+
+M2M_CHANGES = ("post_add", "post_remove", "post_clear")
+PERMISSION_FIELDS = ("is_superuser", "is_active")
+
+
+def user_relations_changed(sender, instance, action, reverse, **kwargs):
+    """User groups or permissions changed (user.groups.add, group.user_set.add)"""
+    if action not in M2M_CHANGES:
+        return
+    if reverse:
+        PermissionCache.invalidate_all()
+    else:
+        PermissionCache.invalidate_user(instance.pk)
+
+
+def group_permissions_changed(sender, action, **kwargs):
+    if action in M2M_CHANGES:
+        PermissionCache.invalidate_all()
+
+
+def group_deleted(sender, **kwargs):
+    PermissionCache.invalidate_all()
+
+
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    # permission set depends on is_superuser and is_active only,
+    # saves of other fields (last_login on sign in) keep cached set
+    instance._permission_flags_changed = False
+    if instance._state.adding:
+        return
+    if update_fields is not None and set(update_fields).isdisjoint(PERMISSION_FIELDS):
+        return
+    previous = (
+        CustomUser.objects.filter(pk=instance.pk)
+        .values_list(*PERMISSION_FIELDS)
+        .first()
+    )
+    instance._permission_flags_changed = previous != tuple(
+        getattr(instance, field) for field in PERMISSION_FIELDS
+    )
+
+
+def user_saved(sender, instance, created, **kwargs):
+    # new user never gets permissions of deleted one with the same id;
+    # again after commit, a request in between could cache old set
+    if not created and not getattr(instance, "_permission_flags_changed", True):
+        return
+    PermissionCache.invalidate_user(instance.pk)
+    transaction.on_commit(lambda: PermissionCache.invalidate_user(instance.pk))
+
+
+def user_changed(sender, instance, **kwargs):
+    # again after commit, a request in between could cache old version
+    AuthVersion.invalidate(instance.pk)
+    transaction.on_commit(lambda: AuthVersion.invalidate(instance.pk))
+
+
+def connect_signals():
+    for through in (CustomUser.groups.through, CustomUser.user_permissions.through):
+        m2m_changed.connect(
+            user_relations_changed,
+            sender=through,
+            dispatch_uid=f"perms_{through.__name__}",
+        )
+    m2m_changed.connect(
+        group_permissions_changed,
+        sender=Group.permissions.through,
+        dispatch_uid="perms_group_permissions",
+    )
+    post_delete.connect(group_deleted, sender=Group, dispatch_uid="perms_group")
+    pre_save.connect(user_saving, sender=CustomUser, dispatch_uid="perms_user_pre")
+    post_save.connect(user_saved, sender=CustomUser, dispatch_uid="perms_user")
+    post_save.connect(user_changed, sender=CustomUser, dispatch_uid="auth_user_save")
+    post_delete.connect(
+        user_changed, sender=CustomUser, dispatch_uid="auth_user_delete"
+    )
@@ -2,13 +2,21 @@
 Tests of /account/ url path viewsets from userapp
 """
 
+import smtplib
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import override_settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import (
     APITestCase,
 )
 
-from userapp.models import CustomUser, UserRoles
-from userapp.utils import UserGroupUtils
+from userapp.cache import PermissionCache
+from userapp.models import CustomUser, MailOutbox, MailStatus, UserRoles
+from userapp.outbox import MailWorker, requeue_dead
+from userapp.utils import UserGroupUtils, UserUtils
 
 TESTUSERS = {
     "employer": {
@@ -93,3 +101,197 @@ class TestAccountViewSet(APITestCase):
             user.delete()
         UserGroupUtils.delete_user_groups()
         return super().tearDown()
+
+
+class TestPermissionCache(APITestCase):
+    """
+    Cached permission sets test.
+    """
+
+    def setUp(self) -> None:
+        UserGroupUtils.create_user_groups()
+        self.user, _ = UserUtils.create_test_user(UserUtils.test_employee)
+        return super().setUp()
+
+    def get_user(self) -> CustomUser:
+        # new instance without per-object cache
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def test_cache(self) -> None:
+        self.assertTrue(self.get_user().has_perm("recrutingapp.add_cv"))
+
+        user = self.get_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("recrutingapp.add_cv"))
+
+        # membership change
+        self.user.groups.clear()
+        self.assertFalse(self.get_user().has_perm("recrutingapp.add_cv"))
+
+        # groups recreation
+        self.user.groups.add(*UserGroupUtils.get_groups_for_role(self.user.role))
+        self.assertTrue(self.get_user().has_perm("recrutingapp.add_cv"))
+        UserGroupUtils.delete_user_groups()
+        self.assertFalse(self.get_user().has_perm("recrutingapp.add_cv"))
+
+    def test_superuser_demoted(self) -> None:
+        perm = "recrutingapp.delete_city"
+        self.assertFalse(self.get_user().has_perm(perm))
+        self.user.is_superuser = True
+        self.user.save()
+        # all permissions are cached for superuser
+        self.assertIn(perm, self.get_user().get_all_permissions())
+
+        self.user.is_superuser = False
+        self.user.save()
+        self.assertFalse(self.get_user().has_perm(perm))
+        self.assertTrue(self.get_user().has_perm("recrutingapp.add_cv"))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.get_user().has_perm("recrutingapp.add_cv"))
+
+    def test_unrelated_save_keeps_cache(self) -> None:
+        key = PermissionCache.get_key(self.user.pk)
+        # sign in saves last_login only
+        self.assertTrue(
+            self.client.login(
+                username=self.user.username,
+                password=UserUtils.test_employee["password"],
+            )
+        )
+        self.user.first_name = "changed"
+        self.user.save()
+        self.assertEqual(PermissionCache.get_key(self.user.pk), key)
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertNotEqual(PermissionCache.get_key(self.user.pk), key)
+
+    def tearDown(self) -> None:
+        self.user.delete()
+        return super().tearDown()
+
+
+class TestClaimsAuthentication(APITestCase):
+    """
+    JWT with user claims test.
+    """
+
+    def setUp(self) -> None:
+        self.token_url = "/api/token/"
+        self.refresh_url = "/api/token/refresh/"
+        self.sign_in_url = "/api/v1.0/accounts/signin/"
+
+        UserGroupUtils.create_user_groups()
+        self.user, _ = UserUtils.create_test_user(UserUtils.test_employee)
+        return super().setUp()
+
+    def get_tokens(self) -> dict:
+        response = self.client.post(
+            self.token_url,
+            {
+                "username": UserUtils.test_employee["username"],
+                "password": UserUtils.test_employee["password"],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def sign_in(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.get(self.sign_in_url)
+        self.client.credentials()
+        return response
+
+    def test_claims(self) -> None:
+        tokens = self.get_tokens()
+        self.assertEqual(self.sign_in(tokens["access"]).status_code, 200)
+
+        # only the view query, user is built from claims
+        with self.assertNumQueries(1):
+            response = self.sign_in(tokens["access"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["username"], self.user.username)
+
+        # claims changed, token is revoked
+        self.user.is_validated = False
+        self.user.save()
+        response = self.sign_in(tokens["access"])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # refreshed token has current claims
+        response = self.client.post(
+            self.refresh_url, {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.sign_in(response.data["access"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data[0]["is_validated"])
+
+        # inactive user can't refresh
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(
+            self.refresh_url, {"refresh": tokens["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def tearDown(self) -> None:
+        self.user.delete()
+        UserGroupUtils.delete_user_groups()
+        return super().tearDown()
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+
+class TestMailOutbox(APITestCase):
+    """
+    Outgoing mail delivery test.
+    """
+
+    def test_signup_mail(self) -> None:
+        data = TESTUSERS["employee"]
+        response = self.client.post("/api/v1.0/accounts/signup/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # queued with user, not sent in request
+        self.assertEqual(len(mail.outbox), 0)
+        outgoing = MailOutbox.objects.get(to=data["email"])
+        self.assertEqual(outgoing.status, MailStatus.pending.value)
+
+        counts = MailWorker().drain()
+        self.assertEqual(counts, {"sent": 1, "retry": 0, "dead": 0})
+        self.assertEqual(len(mail.outbox), 1)
+        user = CustomUser.objects.get(username=data["username"])
+        self.assertIn(user.validation_code, mail.outbox[0].body)
+        outgoing.refresh_from_db()
+        self.assertEqual(outgoing.status, MailStatus.sent.value)
+        self.assertEqual(MailWorker().drain()["sent"], 0)
+
+    @override_settings(EMAIL_BACKEND="userapp.tests.FailingEmailBackend")
+    def test_retry(self) -> None:
+        outgoing = MailOutbox.objects.create(
+            subject="subject", body="body", from_email="a@ru.ru", to="b@ru.ru"
+        )
+        worker = MailWorker(max_attempts=2)
+        self.assertEqual(worker.drain(), {"sent": 0, "retry": 1, "dead": 0})
+        outgoing.refresh_from_db()
+        self.assertEqual(outgoing.attempts, 1)
+        self.assertTrue(outgoing.next_attempt_at > timezone.now())
+        self.assertIn("SMTPServerDisconnected", outgoing.last_error)
+        # not due yet
+        self.assertEqual(worker.drain(), {"sent": 0, "retry": 0, "dead": 0})
+
+        MailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(worker.drain(), {"sent": 0, "retry": 0, "dead": 1})
+        outgoing.refresh_from_db()
+        self.assertEqual(outgoing.status, MailStatus.dead.value)
+
+        self.assertEqual(requeue_dead(), 1)
+        outgoing.refresh_from_db()
+        self.assertEqual(outgoing.status, MailStatus.pending.value)
+        self.assertEqual(outgoing.attempts, 0)
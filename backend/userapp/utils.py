@@ -1,19 +1,18 @@
 from enum import Enum
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import send_mail
 from django.contrib.auth.models import Group, Permission
 
 from userapp.models import CustomUser, UserRoles
+from userapp.outbox import enqueue_mail
 
 
 def send_confirmation_mail(user):
-    send_mail(
+    """Queued in current transaction, delivered by mail worker"""
+    enqueue_mail(
         "E-mail confirmation",
         "Your confirmation code is " + user.validation_code,
-        "noreply@example.com",
-        [user.email],
-        fail_silently=False,
+        user.email,
     )
 
 
@@ -52,15 +52,13 @@ class EmailConfirmViewSet(
         # serializer_class=None,
     )
     def resend(self, request, version=None, pk=None):
-        user = request.user
+        # request user can be built from token claims
+        user = CustomUser.objects.get(pk=request.user.pk)
         if user.is_validated:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        # try:
         send_confirmation_mail(user)
         return Response(status=status.HTTP_201_CREATED)
-        # except Exception:
-        #   return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class SignInViewSet(